@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmark NetCDF write profiles (compression and chunking) on a ctm.nc file
+
+Reports file size and read latency (whole map for a time step and all times at
+a point) for each write profile in bpch2netCDF.NetCDF_write_profiles.
+
+Usage
+---
+python benchmark_NetCDF_write_profiles.py [ctm.nc] [variable]
+
+Notes
+---
+ - Defaults to the ctm.nc file used by the tests (../data/ctm.nc) and O3.
+ - Files are re-opened for each read, so timings include opening the file,
+ but the operating system's cache will still hold recently read data.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from netCDF4 import Dataset
+from bpch2netCDF import apply_NetCDF_write_profile, NetCDF_write_profiles
+
+
+def main(filename='../data/ctm.nc', var='IJ_AVG_S__O3', repeats=5):
+    """
+    Driver to benchmark the NetCDF write profiles
+    """
+    folder = tempfile.mkdtemp()
+    try:
+        files = {'default': filename}
+        for profile in sorted(NetCDF_write_profiles.keys()):
+            files[profile] = os.path.join(folder, 'ctm_{}.nc'.format(profile))
+            apply_NetCDF_write_profile(filename, profile=profile,
+                                       output_file=files[profile])
+        # Print size and read latencies for each profile
+        header = '{:>12} {:>10} {:>12} {:>12} {:>12}'
+        print(header.format('profile', 'size (MB)', 'map (ms)',
+                            'point (ms)', 'all (ms)'))
+        for profile in ['default'] + sorted(NetCDF_write_profiles.keys()):
+            times = time_reads(files[profile], var=var, repeats=repeats)
+            size = os.path.getsize(files[profile]) / 1E6
+            print('{:>12} {:>10.2f} {:>12.2f} {:>12.2f} {:>12.2f}'.format(
+                profile, size, *times))
+    finally:
+        shutil.rmtree(folder)
+
+
+def time_reads(filename, var='IJ_AVG_S__O3', repeats=5):
+    """
+    Get the fastest time (ms) to read a map, a point time series and all data
+    """
+    with Dataset(filename, 'r') as rootgrp:
+        dims = rootgrp.variables[var].dimensions
+    time_ind = [n for n, i in enumerate(dims) if 'time' in i.lower()][0]
+    # Map = single time step; point = all times for the first column
+    map_slab = [slice(None)] * len(dims)
+    map_slab[time_ind] = 0
+    point_slab = [0] * len(dims)
+    point_slab[time_ind] = slice(None)
+    times = []
+    for slab in (tuple(map_slab), tuple(point_slab), Ellipsis):
+        timings = []
+        for repeat in range(repeats):
+            start = time.time()
+            with Dataset(filename, 'r') as rootgrp:
+                rootgrp.variables[var][slab]
+            timings += [(time.time() - start) * 1E3]
+        times += [min(timings)]
+    return times
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
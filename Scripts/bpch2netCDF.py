@@ -13,6 +13,7 @@ import sys
 import glob
 import os
 import netCDF4
+import numpy as np
 try:
     import iris
 except ImportError:
@@ -34,7 +35,7 @@ except ImportError:
 
 def convert_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
                       remake=False, hemco_file_list=None, verbose=True,
-                      bpch_file_type="*.ctm.nc"):
+                      bpch_file_type="*.ctm.nc", append=False, profile=None):
     """
     Converts GEOS-Chem outputs to netCDF
 
@@ -44,6 +45,8 @@ def convert_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
     filename (str):  specific the netCDF filename you want to use
     bpch_file_list (list): list the bpch files you want to use
     remake (boolean): Overwrite any old files (default=False)
+    append (boolean): append any new bpch files to an existing NetCDF
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
 
     Notes
     -----
@@ -58,7 +61,8 @@ def convert_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
 #    try:
     bpch_to_netCDF(folder=folder, filename=filename,
                    bpch_file_list=bpch_file_list, remake=remake,
-                   file_type=bpch_file_type, verbose=verbose)
+                   file_type=bpch_file_type, append=append, profile=profile,
+                   verbose=verbose)
 #    except:
 #        logging.error("Could not convert bpch to netCDF in {_dir}"\
 #                .format(_dir=folder))
@@ -136,7 +140,8 @@ def hemco_to_netCDF(folder, hemco_file_list=None, remake=False):
 def bpch_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
                    remake=False, filetype="*ctm.bpch*",
                    check4_trac_avg_if_no_ctm_bpch=True, backend='PyGChem',
-                   verbose=False, **kwargs):
+                   streaming=False, n_workers=4, append=False, profile=None,
+                   complevel=None, verbose=False, **kwargs):
     """
     Converts GEOS-Chem ctm.bpch output file(s) to NetCDF
 
@@ -148,11 +153,31 @@ def bpch_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
     remake (boolean): overwrite existing NetCDF file
     filetype (str): string with wildcards to match filenames
     ( e.g. *ctm.bpch*, trac_avg.*, or *ts*bpch* )
+    backend (str): library to convert with (PyGChem, iris or PNC)
+    streaming (boolean): convert files one at a time in worker processes and
+        append to the NetCDF (resuming from any files already appended)
+    n_workers (int): number of worker processes to use if streaming
+    append (boolean): if the NetCDF exists, append any bpch files not already
+        in it (instead of skipping conversion)
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
+        to compress and chunk the NetCDF with (default: library settings)
+    complevel (int): zlib compression level to use with profile
     verbose (boolean): print (minor) logging to screen
 
     Returns
     -------
     (None) saves a NetCDF file to disk
+
+    Notes
+    -----
+     - The bpch files converted (with their sizes and modification times) are
+     recorded in a global attribute of the NetCDF, which is used to find new
+     files to convert when appending. NetCDF files made before this was
+     recorded need to be remade (remake=True) to allow appending.
+     - If a profile is given, files are converted one at a time (as with
+     streaming=True), so the NetCDF is compressed and chunked as it is
+     written. Files appended to keep their existing settings. To apply a
+     profile to an existing NetCDF use apply_NetCDF_write_profile.
     """
     import os
     # Check if file already exists and warn about remaking
@@ -164,10 +189,24 @@ def bpch_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
     output_file = os.path.join(folder, filename)
 
     # If the netCDf file already exists dont overwrite it without remake=True.
-    if not remake:
+    # ( unless streaming, which resumes by appending any files not yet added )
+    if remake and streaming and os.path.exists(output_file):
+        os.remove(output_file)
+    if (not remake) and (not streaming) and (not append):
         if os.path.exists(output_file):
             logging.warning(output_file + ' already exists. Not recreating.')
             return
+    # If appending to an existing file, only add files not already in it.
+    appending = append and (not remake) and os.path.exists(output_file)
+    if appending:
+        if len(get_bpch_manifest_in_netCDF(output_file)) == 0:
+            logging.info(output_file + ' has no record of bpch files ' +
+                            'converted. Not appending (use remake=True).')
+            return
+        streaming = True
+    # Write profiles are applied as the NetCDF is created (when streaming)
+    if not isinstance(profile, type(None)):
+        streaming = True
 
     # Look for files if file list is not provided.
     if isinstance(bpch_file_list, type(None)):
@@ -180,6 +219,10 @@ def bpch_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
             logging.info('WARNING! - now trying filetype={}'.format(filetype))
             bpch_files = glob.glob(folder + '/' + filetype)
         # Raise error if no files matching filetype
+        if (len(bpch_files) == 0) and appending:
+            logging.info("No bpch files ({}) to append in {}".format(filetype,
+                                                                  folder))
+            return
         if len(bpch_files) == 0:
             logging.error("No bpch files ({}) found in {}".format(filetype,
                                                                   folder))
@@ -203,7 +246,13 @@ def bpch_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
     if verbose:
         print(("Creating a netCDF from {} file(s).".format(len(bpch_files)) +
                " This can take some time..."))
-    if backend == 'PyGChem':
+    if streaming:
+        # Convert files individually and append to NetCDF along time
+        bpch_to_netCDF_streaming(bpch_files=bpch_files,
+                                 output_file=output_file, backend=backend,
+                                 n_workers=n_workers, profile=profile,
+                                 complevel=complevel, verbose=verbose)
+    elif backend == 'PyGChem':
         # Load all the files into memory
         bpch_data = datasets.load(bpch_files)
         # Save the netCDF file
@@ -231,11 +280,13 @@ def bpch_to_netCDF(folder=None, filename='ctm.nc', bpch_file_list=None,
             # Make sure the time dimension is unlimitetd
             ds = xr.concat(ds_l, dim='time')
             # Now save the combined file
-            ds.to_netcdf(folder+filename,
-                         unlimited_dims={'time_counter': True})
+            ds.to_netcdf(folder+filename, unlimited_dims={'time': True})
             # Remove the temporary files
             for TEMP_ncfile in TEMP_ncfiles:
                 os.remove(TEMP_ncfile)
+    # Record the files converted (to allow appending of new files later)
+    if (not streaming) and os.path.exists(output_file):
+        record_bpch_files_in_netCDF(output_file, bpch_files)
 
     logging.info("A netCDF file has been created with the name {ctm}"
                  .format(ctm=output_file))
@@ -259,6 +310,336 @@ def bpch_to_netCDF_via_PNC(format='bpch2', filename='ctm.nc',
     pnc.pncwrite(infile, output_file)
 
 
+def bpch_to_netCDF_streaming(bpch_files=None, output_file=None,
+                             backend='PNC', n_workers=4, time_dim='time',
+                             profile=None, complevel=None, verbose=False):
+    """
+    Convert bpch files one at a time (in worker processes) and append to NetCDF
+
+    Parameters
+    ----------
+    bpch_files (list): full paths of the bpch files to convert
+    output_file (str): full path of the NetCDF to create or append to
+    backend (str): library to convert each file with (PyGChem or PNC)
+    n_workers (int): number of worker processes converting files
+    time_dim (str): name of the (unlimited) time dimension to append along
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
+        to create output_file with (default: library settings)
+    complevel (int): zlib compression level to use with profile
+    verbose (boolean): print (minor) logging to screen
+
+    Returns
+    -------
+    (None) saves a NetCDF file to disk
+
+    Notes
+    -----
+     - Each worker converts a single bpch file to a temporary NetCDF, which is
+     then appended to output_file (in time order) and removed. So no more than
+     one file's data is held in memory per process. Files are only given to
+     workers as earlier files are appended, so no more than n_workers
+     temporary files are on disk at once.
+     - The bpch files appended are recorded in the NetCDF's global attributes,
+     so a conversion that stops part way through resumes from the files not
+     yet appended. Files are appended in the order converted, so any new files
+     dated before those already in output_file will not be in time order.
+    """
+    import multiprocessing
+    from collections import deque
+    # Skip files that have already been appended (e.g. before a crash)
+    n_files = len(bpch_files)
+    bpch_files = get_bpch_files_not_in_netCDF(output_file, bpch_files)
+    logging.info("Appending {} bpch file(s) to {} ({} already present)".format(
+        len(bpch_files), output_file, n_files-len(bpch_files)))
+    if len(bpch_files) == 0:
+        return
+    # Convert each file to a temporary NetCDF in the same folder
+    folder, filename = os.path.split(output_file)
+    jobs = []
+    for n_bpch_file, bpch_file in enumerate(bpch_files):
+        TEMP_ncfile = os.path.join(folder, 'TEMP_stream_{}_{}'.format(
+            n_bpch_file, filename))
+        jobs += [(bpch_file, TEMP_ncfile, backend)]
+    n_workers = max(1, min(n_workers, len(jobs)))
+    pool = multiprocessing.Pool(n_workers)
+    try:
+        # Convert at most one file per worker ahead of the files appended
+        # ( results are taken in order, so they are appended in time order )
+        converting = deque([pool.apply_async(_convert_bpch_file2netCDF, (i,))
+                            for i in jobs[:n_workers]])
+        n_submitted = len(converting)
+        while len(converting) > 0:
+            bpch_file, TEMP_ncfile = converting.popleft().get()
+            append_netCDF_along_time(TEMP_ncfile, output_file,
+                                     source=bpch_file, time_dim=time_dim,
+                                     profile=profile, complevel=complevel)
+            os.remove(TEMP_ncfile)
+            if verbose:
+                print("Appended {} to {}".format(bpch_file, output_file))
+            if n_submitted < len(jobs):
+                converting.append(pool.apply_async(_convert_bpch_file2netCDF,
+                                                   (jobs[n_submitted],)))
+                n_submitted += 1
+    finally:
+        pool.close()
+        pool.join()
+        # Remove any temporary files left (e.g. after an error)
+        for NIU, TEMP_ncfile, NIU in jobs:
+            if os.path.exists(TEMP_ncfile):
+                os.remove(TEMP_ncfile)
+
+
+def _convert_bpch_file2netCDF(args):
+    """ Convert a single bpch file to NetCDF (worker for streaming) """
+    bpch_file, output_file, backend = args
+    logging.debug("Converting {} to {}".format(bpch_file, output_file))
+    if backend == 'PyGChem':
+        datasets.save(datasets.load([bpch_file]), output_file)
+    elif backend == 'PNC':
+        bpch_to_netCDF_via_PNC(output_file=output_file, bpch_file=bpch_file)
+    else:
+        err_msg = "backend '{}' not setup for streaming".format(backend)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    return bpch_file, output_file
+
+
+def get_bpch_files_in_netCDF(filename, attr='bpch_files_appended'):
+    """
+    Get the names of bpch files already appended to a NetCDF file
+
+    Parameters
+    ----------
+    filename (str): full path of NetCDF file
+    attr (str): global attribute used to record the appended files
+
+    Returns
+    -------
+    (list)
+    """
+    return [i['file'] for i in get_bpch_manifest_in_netCDF(filename,
+                                                            attr=attr)]
+
+
+def get_bpch_manifest_in_netCDF(filename, attr='bpch_files_appended'):
+    """
+    Get the record (name, size, mtime, time steps) of bpch files in a NetCDF
+
+    Parameters
+    ----------
+    filename (str): full path of NetCDF file
+    attr (str): global attribute used to record the appended files
+
+    Returns
+    -------
+    (list) of dictionaries (keys: file, size, mtime, ntimes)
+
+    Notes
+    -----
+     - The record is stored as a JSON string in a global attribute. ntimes is
+     None for files converted together (not appended one at a time).
+    """
+    import json
+    if not os.path.exists(filename):
+        return []
+    with netCDF4.Dataset(filename, 'r') as rootgrp:
+        try:
+            manifest = getattr(rootgrp, attr)
+        except AttributeError:
+            return []
+    return json.loads(manifest)
+
+
+def _get_bpch_file_record(bpch_file, ntimes=None):
+    """ Get the record (name, size, mtime) to store for a bpch file """
+    record = {'file': os.path.basename(bpch_file), 'size': None,
+              'mtime': None, 'ntimes': ntimes}
+    if os.path.exists(bpch_file):
+        stat = os.stat(bpch_file)
+        record['size'] = stat.st_size
+        record['mtime'] = stat.st_mtime
+    return record
+
+
+def record_bpch_files_in_netCDF(filename, bpch_files,
+                                attr='bpch_files_appended'):
+    """
+    Record the bpch files a NetCDF was made from (to allow later appending)
+
+    Parameters
+    ----------
+    filename (str): full path of NetCDF file
+    bpch_files (list): full paths of the bpch files in the NetCDF
+    attr (str): global attribute used to record the appended files
+
+    Returns
+    -------
+    (None)
+    """
+    import json
+    manifest = [_get_bpch_file_record(i) for i in sorted(bpch_files)]
+    with netCDF4.Dataset(filename, 'a') as rootgrp:
+        rootgrp.setncattr(attr, json.dumps(manifest))
+
+
+def get_bpch_files_not_in_netCDF(filename, bpch_files,
+                                 attr='bpch_files_appended'):
+    """
+    Get the bpch files that have not yet been added to a NetCDF
+
+    Parameters
+    ----------
+    filename (str): full path of NetCDF file
+    bpch_files (list): full paths of bpch files
+    attr (str): global attribute used to record the appended files
+
+    Returns
+    -------
+    (list)
+
+    Notes
+    -----
+     - Files already added, but with a different size or modification time
+     since, are not returned (a warning is logged). Use remake=True in
+     bpch_to_netCDF to re-convert these.
+    """
+    manifest = {i['file']: i for i in get_bpch_manifest_in_netCDF(filename,
+                                                                  attr=attr)}
+    new_files = []
+    for bpch_file in sorted(bpch_files):
+        record = manifest.get(os.path.basename(bpch_file), None)
+        if isinstance(record, type(None)):
+            new_files += [bpch_file]
+            continue
+        current = _get_bpch_file_record(bpch_file)
+        if (record['size'], record['mtime']) != \
+                (current['size'], current['mtime']):
+            logging.warning(("{} has changed since added to {}. " +
+                             "Use remake=True to re-convert").format(
+                bpch_file, filename))
+    return new_files
+
+
+def append_netCDF_along_time(src_file, output_file, source=None,
+                             time_dim='time', attr='bpch_files_appended',
+                             profile=None, complevel=None):
+    """
+    Append a NetCDF file to another NetCDF along the (unlimited) time dimension
+
+    Parameters
+    ----------
+    src_file (str): full path of NetCDF file to append
+    output_file (str): full path of NetCDF to append to (created if not present)
+    source (str): full path of the file appended (e.g. bpch file) to record
+    time_dim (str): name of the time dimension
+    attr (str): global attribute used to record the appended sources
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
+        to create output_file with (not used if output_file exists)
+    complevel (int): zlib compression level to use with profile
+
+    Returns
+    -------
+    (None)
+
+    Notes
+    -----
+     - Variables without a time dimension are only written when the file is
+     created.
+     - With a profile, variables are compressed and chunked as written. Time
+     chunks are made from the number of time steps in the first file appended
+     (the length of the unlimited time dimension is not yet known).
+     - The number of time steps appended for each source is also recorded, so
+     data from a partially completed append (e.g. after a crash) is over-
+     written by the next append.
+     - Times are converted to the units of output_file if these differ.
+     - Appending to a NetCDF that has time steps but no record of the sources
+     in it (e.g. made before sources were recorded) raises a ValueError, as
+     the time steps already in it are unknown. Remake these files instead.
+    """
+    import json
+    manifest = get_bpch_manifest_in_netCDF(output_file, attr=attr)
+    with netCDF4.Dataset(src_file, 'r') as src:
+        src.set_auto_mask(False)
+        if not os.path.exists(output_file):
+            _create_netCDF_like(src, output_file, time_dim=time_dim,
+                                profile=profile, complevel=complevel)
+        with netCDF4.Dataset(output_file, 'a') as out:
+            out.set_auto_mask(False)
+            if (time_dim not in out.dimensions) or \
+                    (not out.dimensions[time_dim].isunlimited()):
+                err_msg = "No unlimited time dimension ('{}') to append "
+                err_msg += "along in {}"
+                err_msg = err_msg.format(time_dim, output_file)
+                logging.error(err_msg)
+                raise ValueError(err_msg)
+            if (len(manifest) == 0) and (len(out.dimensions[time_dim]) > 0):
+                err_msg = '{} has no record of the files in it, so can not '
+                err_msg += 'be appended to (remake it, e.g. remake=True)'
+                err_msg = err_msg.format(output_file)
+                logging.error(err_msg)
+                raise ValueError(err_msg)
+            # Get the number of time steps already (fully) appended
+            ntimes = [i['ntimes'] for i in manifest]
+            if any([isinstance(i, type(None)) for i in ntimes]):
+                t0 = len(out.dimensions[time_dim])
+            else:
+                t0 = sum(ntimes)
+            nt = len(src.dimensions[time_dim])
+            for var in src.variables:
+                if time_dim not in src.variables[var].dimensions:
+                    continue
+                data = src.variables[var][:]
+                if (var == time_dim) and \
+                        (src.variables[var].units != out.variables[var].units):
+                    dates = netCDF4.num2date(data, src.variables[var].units)
+                    data = netCDF4.date2num(dates, out.variables[var].units)
+                slab = [slice(None)] * len(src.variables[var].dimensions)
+                slab[src.variables[var].dimensions.index(time_dim)] = \
+                    slice(t0, t0+nt)
+                out.variables[var][tuple(slab)] = data
+            # Record the source appended (once the data is written)
+            out.sync()
+            manifest += [_get_bpch_file_record(str(source), ntimes=nt)]
+            out.setncattr(attr, json.dumps(manifest))
+    logging.debug("Appended {} ({} time steps) to {}".format(src_file, nt,
+                                                            output_file))
+
+
+def _create_netCDF_like(src, output_file, time_dim='time', profile=None,
+                        complevel=None):
+    """
+    Create a NetCDF with the structure of another (open) NetCDF
+
+    ( variables are compressed and chunked with any write profile given )
+    """
+    with netCDF4.Dataset(output_file, 'w') as out:
+        out.setncatts({i: src.getncattr(i) for i in src.ncattrs()})
+        for name, dim in src.dimensions.items():
+            if name == time_dim:
+                out.createDimension(name, None)
+            else:
+                out.createDimension(name, len(dim))
+        for name, var in src.variables.items():
+            fill_value = None
+            if '_FillValue' in var.ncattrs():
+                fill_value = var.getncattr('_FillValue')
+            kwargs = {}
+            # ( String variables can not be compressed )
+            if (not isinstance(profile, type(None))) and \
+                    (np.dtype(var.dtype).kind not in ('O', 'S', 'U')):
+                kwargs = get_NetCDF_write_kwargs(profile=profile,
+                                                 dims=var.dimensions,
+                                                 shape=var.shape,
+                                                 complevel=complevel)
+            out_var = out.createVariable(name, var.dtype, var.dimensions,
+                                         fill_value=fill_value, **kwargs)
+            out_var.setncatts({i: var.getncattr(i) for i in var.ncattrs()
+                               if i != '_FillValue'})
+            # Write variables that do not change with time now
+            if time_dim not in var.dimensions:
+                out_var[:] = var[:]
+
+
 def get_folder(folder):
     """
     Get name of folder that contains ctm.bpch data from command line
@@ -280,6 +661,150 @@ def get_folder(folder):
     return folder
 
 
+# Write profiles (compression and chunking) for NetCDF files by access pattern
+# ( "map" = whole maps per time step, "timeseries" = all times at a point,
+# "balanced" = compromise between the two ). The chunk rules give the chunk
+# length for the length of a time or horizontal (lon/lat) dimension.
+NetCDF_write_profiles = {
+    'map': {
+        'zlib': True, 'shuffle': True, 'complevel': 4,
+        'time_chunk': lambda size: 1,
+        'horizontal_chunk': lambda size: size,
+    },
+    'timeseries': {
+        'zlib': True, 'shuffle': True, 'complevel': 4,
+        'time_chunk': lambda size: size,
+        'horizontal_chunk': lambda size: 1,
+    },
+    'balanced': {
+        'zlib': True, 'shuffle': True, 'complevel': 4,
+        'time_chunk': lambda size: min(size, 12),
+        'horizontal_chunk': lambda size: -(-size // 4),
+    },
+}
+
+
+def get_NetCDF_write_kwargs(profile='balanced', dims=None, shape=None,
+                            complevel=None):
+    """
+    Get NetCDF variable compression/chunking settings for a write profile
+
+    Parameters
+    ----------
+    profile (str): write profile ("map", "timeseries" or "balanced")
+    dims (tuple): names of the variable's dimensions
+    shape (tuple): lengths of the variable's dimensions
+    complevel (int): zlib compression level (1-9) to use instead of default
+
+    Returns
+    -------
+    (dict) of keyword arguments for netCDF4's createVariable (zlib, shuffle,
+    complevel and chunksizes)
+
+    Notes
+    -----
+     - Time dimensions are found by name (containing "time") and horizontal
+     dimensions by name (starting with "lon" or "lat"). Other dimensions
+     (e.g. levels) are not split into chunks.
+     - Chunk lengths are set by the profile's time_chunk and horizontal_chunk
+     rules (see NetCDF_write_profiles).
+    """
+    if profile not in NetCDF_write_profiles:
+        err_msg = "write profile '{}' not in: {}".format(
+            profile, list(sorted(NetCDF_write_profiles.keys())))
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    kwargs = NetCDF_write_profiles[profile].copy()
+    time_chunk = kwargs.pop('time_chunk')
+    horizontal_chunk = kwargs.pop('horizontal_chunk')
+    if not isinstance(complevel, type(None)):
+        kwargs['complevel'] = complevel
+    # Scalar variables can not be chunked
+    if (isinstance(dims, type(None))) or (len(dims) == 0):
+        return kwargs
+    chunksizes = []
+    for dim, size in zip(dims, shape):
+        size = max(1, size)
+        if 'time' in dim.lower():
+            chunksizes += [time_chunk(size)]
+        elif dim.lower().startswith('lon') or dim.lower().startswith('lat'):
+            chunksizes += [horizontal_chunk(size)]
+        else:
+            chunksizes += [size]
+    kwargs['chunksizes'] = tuple(chunksizes)
+    return kwargs
+
+
+def get_NetCDF_encoding4profile(ds, profile='balanced', complevel=None):
+    """
+    Get xarray encoding to write a dataset with a NetCDF write profile
+
+    Parameters
+    ----------
+    ds (xr.Dataset): dataset to be saved (via ds.to_netcdf)
+    profile (str): write profile ("map", "timeseries" or "balanced")
+    complevel (int): zlib compression level (1-9) to use instead of default
+
+    Returns
+    -------
+    (dict)
+    """
+    encoding = {}
+    for var in ds.variables:
+        # String/object variables can not be compressed
+        if ds[var].dtype.kind in ('O', 'S', 'U'):
+            continue
+        encoding[var] = get_NetCDF_write_kwargs(profile=profile,
+                                                dims=ds[var].dims,
+                                                shape=ds[var].shape,
+                                                complevel=complevel)
+        # Over-ride any contiguous storage of the variable read in
+        if len(ds[var].dims) > 0:
+            encoding[var]['contiguous'] = False
+    return encoding
+
+
+def apply_NetCDF_write_profile(filename, profile='balanced', complevel=None,
+                               output_file=None):
+    """
+    Re-write a NetCDF file with a write profile (compression and chunking)
+
+    Parameters
+    ----------
+    filename (str): full path of NetCDF file
+    profile (str): write profile ("map", "timeseries" or "balanced")
+    complevel (int): zlib compression level (1-9) to use instead of default
+    output_file (str): full path to save to (default: over-write filename)
+
+    Returns
+    -------
+    (None)
+
+    Notes
+    -----
+     - The whole file is read into memory to be re-written. NetCDF files made
+     by bpch_to_netCDF with a profile are compressed and chunked as written.
+    """
+    import xarray as xr
+    if isinstance(output_file, type(None)):
+        output_file = filename
+    TEMP_ncfile = output_file + '.TEMP_{}'.format(profile)
+    # Values are kept as stored (no decoding of times, masking or scaling)
+    with xr.open_dataset(filename, decode_times=False,
+                         mask_and_scale=False) as ds:
+        ds.load()
+        unlimited_dims = [i for i in ds.dims if 'time' in i.lower()]
+        for var in ds.variables:
+            ds[var].encoding = {}
+        ds.to_netcdf(TEMP_ncfile, format='NETCDF4',
+                     unlimited_dims=unlimited_dims,
+                     encoding=get_NetCDF_encoding4profile(ds, profile=profile,
+                                                          complevel=complevel))
+    os.rename(TEMP_ncfile, output_file)
+    logging.info("Saved {} with NetCDF write profile '{}'".format(output_file,
+                                                                  profile))
+
+
 if __name__ == "__main__":
     convert_to_netCDF()
     print("Complete")
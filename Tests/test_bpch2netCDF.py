@@ -79,3 +79,140 @@ def test_get_folder():
     assert os.path.exists(folder), "Cannot find the test folder"
     logging.info("test complete")
     return
+
+
+def test_append_netCDF_along_time():
+    logging.info("beginning test")
+    datafile = os.path.join(test_file_dir, 'ctm.nc')
+    testfile = os.path.join(test_file_dir, 'test_append.nc')
+    if os.path.exists(testfile):
+        os.remove(testfile)
+    # Append the same file twice and check the time dimension doubles
+    append_netCDF_along_time(datafile, testfile, source='a.bpch')
+    append_netCDF_along_time(datafile, testfile, source='b.bpch')
+    with netCDF4.Dataset(datafile, 'r') as d:
+        ntimes = len(d.dimensions['time'])
+    with netCDF4.Dataset(testfile, 'r') as d:
+        assert len(d.dimensions['time']) == ntimes*2
+    assert get_bpch_files_in_netCDF(testfile) == ['a.bpch', 'b.bpch']
+    os.remove(testfile)
+    # Files without a record of their sources are not over-written
+    import shutil
+    shutil.copy(datafile, testfile)
+    with pytest.raises(ValueError):
+        append_netCDF_along_time(datafile, testfile, source='c.bpch')
+    os.remove(testfile)
+    logging.info("test complete")
+    return
+
+
+def test_append_netCDF_along_time_with_profile():
+    logging.info("beginning test")
+    datafile = os.path.join(test_file_dir, 'ctm.nc')
+    testfile = os.path.join(test_file_dir, 'test_append.nc')
+    if os.path.exists(testfile):
+        os.remove(testfile)
+    # New files are compressed and chunked as they are written
+    append_netCDF_along_time(datafile, testfile, source='a.bpch',
+                             profile='map')
+    with netCDF4.Dataset(datafile, 'r') as d, \
+            netCDF4.Dataset(testfile, 'r') as t:
+        var = [i for i in d.variables if d.variables[i].ndim == 4][0]
+        assert t.variables[var].filters()['zlib']
+        assert t.variables[var].chunking()[0] == 1
+        assert (t.variables[var][:] == d.variables[var][:]).all()
+    os.remove(testfile)
+    logging.info("test complete")
+    return
+
+
+def _write_bpch(filename, tau0=0., value=1.):
+    """ Write a tiny bpch2 file (one 4x5 surface O3 datablock) for tests """
+    import struct
+    import numpy as np
+    from ..funcs4bpch import _bpch_model_record, _bpch_data_header
+
+    def write_record(f, data):
+        f.write(struct.pack('>i', len(data)))
+        f.write(data)
+        f.write(struct.pack('>i', len(data)))
+    data = np.full((72, 46, 1), value, dtype='>f4').tobytes(order='F')
+    with open(filename, 'wb') as f:
+        write_record(f, b'CTM bin 02'.ljust(40))
+        write_record(f, b'test'.ljust(80))
+        write_record(f, _bpch_model_record.pack(b'GEOS5_47L'.ljust(20),
+                                                5., 4., 0, 0))
+        write_record(f, _bpch_data_header.pack(
+            b'IJ-AVG-$'.ljust(40), 2, b'ppbv'.ljust(40), tau0, tau0+24.,
+            b''.ljust(40), 72, 46, 1, 1, 1, 1, len(data)+8))
+        write_record(f, data)
+
+
+def test_bpch_to_netCDF_streaming(tmpdir):
+    logging.info("beginning test")
+    import shutil
+    folder = str(tmpdir)
+    for filename in ('diaginfo.dat', 'tracerinfo.dat'):
+        shutil.copy(os.path.join(test_file_dir, filename), folder)
+    bpch_files = [os.path.join(folder, 'ctm.bpch.{}'.format(n))
+                  for n in range(3)]
+    for n, bpch_file in enumerate(bpch_files):
+        _write_bpch(bpch_file, tau0=24.*n, value=n)
+    output_file = os.path.join(folder, 'ctm.nc')
+    # A partial run (stopped while appending the third file)...
+    bpch_to_netCDF_streaming(bpch_files[:2], output_file, n_workers=2)
+    with netCDF4.Dataset(output_file, 'a') as d:
+        d.variables['time'][2] = -999
+    # ... is resumed from the files not yet (fully) appended
+    bpch_to_netCDF_streaming(bpch_files, output_file, n_workers=2)
+    assert get_bpch_files_in_netCDF(output_file) == \
+        [os.path.basename(i) for i in bpch_files]
+    # And files already appended are not appended again
+    bpch_to_netCDF_streaming(bpch_files, output_file, n_workers=2)
+    assert get_bpch_files_in_netCDF(output_file) == \
+        [os.path.basename(i) for i in bpch_files]
+    with netCDF4.Dataset(output_file, 'r') as d:
+        times = d.variables['time'][:]
+    assert len(times) == 3, 'Time steps are missing or duplicated'
+    assert all(times[1:] > times[:-1]), 'Time steps are not in order'
+    logging.info("test complete")
+    return
+
+
+def test_get_bpch_files_not_in_netCDF():
+    logging.info("beginning test")
+    datafile = os.path.join(test_file_dir, 'ctm.nc')
+    testfile = os.path.join(test_file_dir, 'test_append.nc')
+    bpch_file = os.path.join(test_file_dir, 'test.bpch')
+    if os.path.exists(testfile):
+        os.remove(testfile)
+    assert get_bpch_files_not_in_netCDF(testfile, [bpch_file]) == [bpch_file]
+    # Once appended, a file (with the same size/mtime) is not returned
+    append_netCDF_along_time(datafile, testfile, source=bpch_file)
+    assert get_bpch_files_not_in_netCDF(testfile, [bpch_file]) == []
+    manifest = get_bpch_manifest_in_netCDF(testfile)
+    assert manifest[0]['size'] == os.path.getsize(bpch_file)
+    os.remove(testfile)
+    logging.info("test complete")
+    return
+
+
+def test_get_NetCDF_write_kwargs():
+    logging.info("beginning test")
+    dims = ('time', 'lon', 'lat', 'lev')
+    shape = (12, 72, 46, 47)
+    kwargs = get_NetCDF_write_kwargs(profile='map', dims=dims, shape=shape)
+    assert kwargs['chunksizes'] == (1, 72, 46, 47)
+    assert kwargs['zlib'] and kwargs['shuffle']
+    kwargs = get_NetCDF_write_kwargs(profile='timeseries', dims=dims,
+                                     shape=shape, complevel=1)
+    assert kwargs['chunksizes'] == (12, 1, 1, 47)
+    assert kwargs['complevel'] == 1
+    kwargs = get_NetCDF_write_kwargs(profile='balanced', dims=dims,
+                                     shape=shape)
+    assert kwargs['chunksizes'] == (12, 18, 12, 47)
+    with pytest.raises(ValueError):
+        get_NetCDF_write_kwargs(profile='not a profile', dims=dims,
+                                shape=shape)
+    logging.info("test complete")
+    return
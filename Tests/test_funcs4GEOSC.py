@@ -87,3 +87,160 @@ def test_get_HEMCO_output_for_file():
     assert round(arr.sum(), 2) == round(
         2.50E-9, 2), "The HEMOC output seem incorrect"
     return
+
+
+def test_get_GC_output_cache():
+    set_GC_output_cache(use_cache=True, max_bytes=1E9)
+    clear_GC_output_cache(reset_stats=True)
+    arr1 = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'])
+    arr2 = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'])
+    stats = get_GC_output_cache_stats()
+    assert (stats['hits'] == 1) and (stats['misses'] == 1), 'Cache not used'
+    assert np.array_equal(arr1, arr2), 'Cached array differs from original'
+    # Copies are returned by default, so can be changed in place
+    arr2 *= 2
+    arr3 = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], copy=False)
+    assert np.array_equal(arr1, arr3), 'Cached array was changed'
+    assert not arr3.flags.writeable, 'Cached array is not read-only'
+    set_GC_output_cache(use_cache=False)
+    return
+
+
+def test_get_GC_output_lazy():
+    arr = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True)
+    lazy_arr = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True,
+                             lazy=True)
+    assert not isinstance(lazy_arr, np.ndarray), 'Lazy output is a numpy array'
+    assert lazy_arr.shape == arr.shape, 'Lazy output shape is different'
+    assert np.allclose(lazy_arr.compute(), arr), 'Lazy output is different'
+    # Lazy reads share one pooled dataset (rather than opening the file again)
+    ds = get_NetCDF_xr_dataset(os.path.join(wd, 'ctm.nc'), chunks={'time': 1})
+    get_GC_output(wd=wd, vars=['IJ_AVG_S__CO'], lazy=True)
+    assert ds is get_NetCDF_xr_dataset(os.path.join(wd, 'ctm.nc'),
+                                       chunks={'time': 1}), 'Dataset re-opened'
+    close_NetCDF_handles()
+    assert np.allclose(lazy_arr.compute(), arr), 'Lazy output is different'
+    return
+
+
+def test_get_GC_output_subset():
+    arr = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True)
+    # Surface only
+    surface = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], lev_slice=0)
+    assert np.array_equal(surface, arr[:, :, :1, :]), 'Surface subset is wrong'
+    # Troposphere for 1st time step only
+    arr_t0 = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True,
+                           time_slice=0)
+    assert np.array_equal(arr_t0, arr[..., :1]), 'Time subset is wrong'
+    # Longitudes across the dateline (4x5 box centres: 170, 175, -180, -175)
+    arr_dl = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True,
+                           lon_range=(170, -175))
+    arr_ = np.concatenate([arr[-2:, ...], arr[:2, ...]], axis=0)
+    assert np.array_equal(arr_dl, arr_), 'Dateline subset is wrong'
+    return
+
+
+def test_get_GC_output_unknown_dims(tmpdir):
+    # Arrays with unknown dimensions are assumed to have time first
+    from netCDF4 import Dataset
+    with Dataset(os.path.join(str(tmpdir), 'ctm.nc'), 'w') as rootgrp:
+        for dim, size in (('t', 3), ('x', 72), ('y', 46)):
+            rootgrp.createDimension(dim, size)
+        var = rootgrp.createVariable('EMISS', np.float32, ('t', 'x', 'y'))
+        var[:] = np.arange(3*72*46).reshape(3, 72, 46)
+    arr = get_GC_output(wd=str(tmpdir), vars=['EMISS'])
+    assert arr.shape == (72, 46, 3), '3D array not in GC format'
+    assert arr[1, 2, 0] == 48, '3D array values are misplaced'
+    return
+
+
+def test_get_GC_output_n_workers():
+    vars = ['IJ_AVG_S__O3', 'BXHGHT_S__AD', 'TIME_TPS__TIMETROP']
+    arr = get_GC_output(wd=wd, vars=vars, trop_limit=True)
+    arr_pool = get_GC_output(wd=wd, vars=vars, trop_limit=True, n_workers=2)
+    assert arr_pool.shape == arr.shape, 'Pool output shape is different'
+    assert np.array_equal(arr_pool, arr), 'Pool output is different'
+    return
+
+
+def test_calc_surface_area_in_grid():
+    # Global grids (with or without files) cover the surface of the Earth
+    Earth_area = 4 * np.pi * 6.375E6**2
+    for res in ('4x5', '1x1', '0.083x0.083'):
+        arr = calc_surface_area_in_grid(res=res)
+        assert arr.shape == get_dims4res(res, just2D=True), 'Wrong shape'
+        assert np.isclose(arr.sum(), Earth_area), 'Global area is wrong'
+    # A resolution without a file falls back to the calculated area
+    arr = get_surface_area(res='1x1')
+    assert (len(arr.shape) == 3), 'Surface area does not have 3 dimensions.'
+    return
+
+
+def test_RunContext():
+    ctx = RunContext(wd)
+    # Fields are loaded once, then shared (read-only)
+    assert ctx.a_m is ctx.a_m, 'Air mass is not cached'
+    assert not ctx.a_m.flags.writeable, 'Cached air mass is not read-only'
+    # And can be used in place of wd
+    burden = get_O3_burden(wd=wd)
+    assert np.allclose(get_O3_burden(wd=ctx), burden), 'Burden is different'
+    vol = get_volume_np(wd=wd, trop_limit=True)
+    assert np.allclose(get_volume_np(wd=ctx, trop_limit=True), vol), \
+        'Volume is different'
+    # Fields for a different trop_limit are loaded for that trop_limit
+    burden = get_trop_burden(wd=wd, trop_limit=False)
+    assert np.allclose(get_trop_burden(wd=ctx, trop_limit=False), burden), \
+        'Burden is different for trop_limit=False'
+    assert ctx.for_trop_limit(False).a_m is ctx.for_trop_limit(False).a_m, \
+        'Air mass is not cached for trop_limit=False'
+    return
+
+
+def test_get_trop_burdens():
+    burdens = get_trop_burdens(['O3'], wd=wd)
+    burden = get_O3_burden(wd=wd).sum()
+    assert np.isclose(burdens.mean(axis=-1)[0], burden), 'Burden is different'
+    # Reading one time step at a time gives the same burdens
+    chunked = get_trop_burdens(['O3'], wd=wd, time_chunks=1)
+    assert np.allclose(chunked, burdens), 'Chunked burdens are different'
+    return
+
+
+def test_convert_specs_units():
+    arr = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True)
+    arrs = np.stack([arr, arr*2])
+    # Same as converting species one at a time
+    molecs = convert_specs_units(arrs, ['O3', 'O3'], 'molec/cm3', wd=wd)
+    molecs_O3 = convert_v_v_2_molec_cm3(arr, wd=wd)
+    assert np.allclose(molecs[0], molecs_O3), 'molec/cm3 is different'
+    assert np.allclose(molecs[1], molecs_O3*2), 'molec/cm3 is different'
+    # And back again, into a given array
+    out = np.empty(arrs.shape)
+    v_v = convert_specs_units(molecs, ['O3', 'O3'], 'v/v', wd=wd, out=out,
+                              from_units='molec/cm3')
+    assert v_v is out, 'Output array not used'
+    assert np.allclose(v_v, arrs), 'v/v is different'
+    # Float32 arrays (as from get_GC_output) can be converted in place
+    a_m = get_air_mass_np(wd=wd, trop_limit=True)
+    arrs32 = arrs.astype(np.float32)
+    Gg = convert_specs_units(arrs, ['O3', 'CO'], 'Gg', a_m=a_m)
+    Gg32 = convert_specs_units(arrs32, ['O3', 'CO'], 'Gg', a_m=a_m,
+                               out=arrs32)
+    assert Gg32 is arrs32, 'Output array not used'
+    assert np.allclose(Gg32, Gg, rtol=1E-5), 'Gg is different for float32'
+    return
+
+
+def test_get_trop_weighted_avg():
+    arr = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], trop_limit=True)
+    a_m = get_air_mass_np(wd=wd, trop_limit=True)
+    t_ps = get_GC_output(wd=wd, vars=['TIME_TPS__TIMETROP'], trop_limit=True)
+    # Same as masking copies of the arrays
+    for multiply_method in (False, True):
+        arr_, a_m_ = mask4troposphere([arr, a_m], t_ps=t_ps,
+                                      multiply_method=multiply_method)
+        avg = (arr_*a_m_).sum() / a_m_.sum()
+        avg_ = get_trop_weighted_avg(arr, a_m, t_ps=t_ps,
+                                     multiply_method=multiply_method)
+        assert np.isclose(avg, avg_), 'Weighted average is different'
+    return
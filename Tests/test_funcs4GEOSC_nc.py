@@ -0,0 +1,32 @@
+from ..funcs4GEOSC_nc import *
+import logging
+import pytest
+logging.basicConfig(filename='test.log', level=logging.DEBUG)
+logging.info('Starting funcs4GEOSC_nc test.')
+
+
+def test_GetTropBurdensInGg():
+    # Totals by time chunk are the same as summing the whole dataset
+    dims = ('time', 'lev', 'lat', 'lon')
+    shape = (4, 5, 3, 6)
+    np.random.seed(0)
+    ds = xr.Dataset()
+    for spec in ['O3', 'CO']:
+        ds['SpeciesConc_'+spec] = (dims, np.random.random(shape)*1E-7,
+                                   {'units': 'mol mol-1 dry'})
+    StateMet = xr.Dataset({
+        'Met_AD': (dims, np.random.random(shape)*1E12),
+        'Met_PMID': (dims, np.ones(shape)*np.linspace(1000, 10, 5)[:, None, None]),
+        'Met_TropP': (dims[:1]+dims[2:], np.random.random((4, 3, 6))*300+100),
+    })
+    MASK = Create4DMask4TropLevel(StateMet=StateMet)
+    for time_chunk_size in (1, 3):
+        df = GetTropBurdensInGg(ds=ds, StateMet=StateMet,
+                                time_chunk_size=time_chunk_size)
+        for spec in ['O3', 'CO']:
+            SpecVar = 'SpeciesConc_'+spec
+            burden = ds[SpecVar]*StateMet['Met_AD']*1E3/constants('RMM_air')
+            burden = burden.where(MASK).sum().values
+            burden *= float(species_mass(spec)) / 1E9
+            assert np.isclose(df[SpecVar], burden), 'Burden is different'
+    return
@@ -0,0 +1,35 @@
+from ..funcs4bpch import *
+from ..funcs4GEOSC import get_GC_output
+import logging
+import pytest
+
+wd = '../data'
+bpch_file = os.path.join(wd, 'test.bpch')
+
+
+def test_get_bpch_tracerinfo():
+    df = get_bpch_tracerinfo(wd=wd)
+    assert isinstance(df, pd.DataFrame), 'tracerinfo not a DataFrame'
+    assert 'O3' in df['name'].values, 'O3 not in tracerinfo'
+    # Parsed files are cached
+    assert get_bpch_tracerinfo(wd=wd) is df, 'tracerinfo not cached'
+    return
+
+
+def test_get_bpch_index():
+    df = get_bpch_index(bpch_file)
+    assert len(df) > 0, 'No datablocks indexed'
+    assert 'IJ_AVG_S__O3' in df['var'].values, 'O3 not indexed'
+    return
+
+
+def test_read_bpch_var():
+    arr = read_bpch_var(bpch_file, var='IJ_AVG_S__O3', trop_limit=True)
+    assert isinstance(arr, np.ndarray), 'bpch data not a numpy array'
+    assert len(arr.shape) == 4, 'bpch data does not have 4 dimensions'
+    assert arr.shape[2] == 38, 'trop_limit not applied'
+    # Should match the ctm.nc made from the same file
+    arr_bpch = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'], use_NetCDF=False)
+    arr_nc = get_GC_output(wd=wd, vars=['IJ_AVG_S__O3'])
+    assert np.allclose(arr_bpch, arr_nc), 'bpch and NetCDF data differ'
+    return
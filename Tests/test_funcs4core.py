@@ -86,3 +86,97 @@ def test_get_latlonalt4res_default():
     assert len(lat) == 46, 'The default latitude is wrong'
     assert len(lon) == 72, 'The default longitude is wrong'
     assert len(alt) == 47, 'The default altidure is wrong'
+
+
+def test_get_NetCDF_handle():
+    fname = os.path.join(data_dir, 'ctm.nc')
+    # Repeated calls should share the same open handle
+    d1 = get_NetCDF_handle(fname)
+    d2 = get_NetCDF_handle(fname)
+    assert d1 is d2, 'NetCDF handle was not re-used from the pool'
+    assert d1.isopen(), 'Pooled NetCDF handle is not open'
+    # Closing the pool should close the handle and re-open on request
+    close_NetCDF_handles()
+    assert not d1.isopen(), 'NetCDF handle not closed with pool'
+    d3 = get_NetCDF_handle(fname)
+    assert d3.isopen(), 'NetCDF handle not re-opened after close'
+    # Handles dropped from the pool stay open until released
+    set_NetCDF_handle_pool_size(1)
+    try:
+        d4 = get_NetCDF_handle(os.path.join(data_dir, 'LM', 'LANDMAP_LWI_ctm',
+                                           'ctm.nc'))
+        assert d3.isopen(), 'NetCDF handle in use was closed'
+        release_NetCDF_handle(d3)
+        assert not d3.isopen(), 'Released NetCDF handle was not closed'
+        release_NetCDF_handle(d4)
+        assert d4.isopen(), 'Pooled NetCDF handle was closed on release'
+    finally:
+        set_NetCDF_handle_pool_size()
+        close_NetCDF_handles()
+    return
+
+
+def test_get_NetCDF_var():
+    fname = os.path.join(data_dir, 'ctm.nc')
+    lat = get_NetCDF_var(fname, 'latitude')
+    lat_mmap = get_NetCDF_var(fname, 'latitude', engine='mmap')
+    assert np.array_equal(lat, lat_mmap), 'Memory mapped values differ'
+    # Memory mapped arrays are read-only
+    arr = get_NetCDF_mmap_var(fname, 'latitude')
+    if not isinstance(arr, type(None)):
+        assert not arr.flags.writeable, 'Memory mapped array is writeable'
+    return
+
+
+def test_get_grid4res():
+    grid = get_grid4res(res='4x5')
+    assert grid.dims == (72, 46, 47), 'Grid dimensions are wrong for 4x5'
+    assert grid.s_area.shape == (72, 46), 'Surface area shape is wrong'
+    # The grid is only built once and its arrays are read-only
+    assert get_grid4res(res='4x5') is grid, 'Grid not re-used from registry'
+    assert not grid.lat_c.flags.writeable, 'Grid arrays are writeable'
+    lon, lat, alt = get_latlonalt4res(res='4x5')
+    assert np.array_equal(lat, grid.lat_c), 'Latitudes differ from registry'
+    return
+
+
+def test_get_grid4res_missing_file(tmpdir):
+    # Grids that could not be read are not kept in the registry
+    grid = get_grid4res(res='4x5', wd=str(tmpdir))
+    assert isinstance(grid.lon_c, type(None)), 'Grid read from missing file'
+    assert get_grid4res(res='4x5', wd=str(tmpdir)) is not grid, \
+        'Failed grid kept in registry'
+    return
+
+
+def test_get_gridbox_indices():
+    # Dateline, poles and a point in the middle of the 4x5 grid
+    lons = [179., -180., 0., 0.]
+    lats = [0., 90., -90., 1.]
+    i, j = get_gridbox_indices(lons, lats, res='4x5')
+    assert list(i) == [0, 0, 36, 36], 'Longitude indices are wrong'
+    assert list(j) == [23, 45, 0, 23], 'Latitude indices are wrong'
+    # Pressures greater than the surface edge are in the lowest box
+    i, j, k = get_gridbox_indices([0.], [0.], alts=[1050.], res='4x5')
+    assert k[0] == 0, 'Surface pressure index is wrong'
+    # Points outside of a (regional) grid are given an index of -1
+    i, j = get_gridbox_indices([50.], [0.], lon_e=np.arange(-10, 11),
+                               lat_e=np.arange(-10, 11))
+    assert (i[0] == -1) and (j[0] == 10), 'Regional grid indices are wrong'
+    return
+
+
+def test_query_spatial_index():
+    # Points either side of the dateline are neighbours
+    index = get_spatial_index([179.5, 0., -90.], [0., 0., 45.])
+    inds, dists = query_spatial_index(index, [-179.5, 1.], [0., 0.])
+    assert list(inds) == [0, 1], 'Nearest points are wrong'
+    assert np.allclose(dists, 6375. * np.radians(1.)), 'Distances are wrong'
+    # Points further than max_distance are given an index of -1
+    inds, dists = query_spatial_index(index, [100.], [0.], max_distance=1000.)
+    assert (inds[0] == -1) and np.isinf(dists[0]), 'Missing point not flagged'
+    # The index is cached
+    assert get_spatial_index([179.5, 0., -90.], [0., 0., 45.]) is index
+    i, j = get_nearest_gridbox([179.], [1.], res='4x5')
+    assert (i[0] == 0) and (j[0] == 23), 'Nearest grid box is wrong'
+    return
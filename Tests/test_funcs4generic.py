@@ -1,4 +1,6 @@
 from ..bpch2netCDF import *
+from ..funcs4generic import *
+import numpy as np
 import logging
 import pytest
 logging.basicConfig(filename='test.log', level=logging.DEBUG)
@@ -9,4 +11,105 @@ def test_get_folder():
     return
 
 
+def test_get_region_mask():
+    # Masks of regions are cached and combined
+    tropics = get_region_mask('Tropics')
+    ocean = get_region_mask('Ocean')
+    ocean_tropics = get_region_mask('Ocean & Tropics')
+    assert tropics.shape == (72, 46, 47), 'Tropics mask shape is wrong'
+    assert np.array_equal(ocean_tropics, tropics & ocean), 'Ocean & Tropics'
+    assert np.array_equal(get_region_mask('~(Ocean | Tropics)'),
+                          ~ocean & ~tropics), '~(Ocean | Tropics) is wrong'
+    # Which match the masks from mask_all_but
+    mask = mask_all_but('Ocean Tropics', mask3D=True, trop_limit=False,
+                        use_multiply_method=False)
+    assert np.array_equal(mask, ~ocean_tropics), 'Mask is different'
+    # And the masks previously combined from the region functions
+    mask = np.ma.mask_or(ocean_unmasked(), tropics_unmasked())
+    assert np.array_equal(~ocean_tropics, mask), 'Ocean Tropics is different'
+    mask = np.ma.mask_or(surface_unmasked(), land_unmasked())
+    assert np.array_equal(~get_region_mask('Land Sur.'), mask), \
+        'Land Sur. is different'
+    assert np.array_equal(~get_region_mask('NH'), NH_unmasked()), \
+        'NH is different'
+    return
+
+
+def test_get_regional_stats():
+    # Regional stats for several species are calculated at once
+    arrs = [np.arange(72*46*12, dtype=float).reshape(72, 46, 12) * (i+1)
+            for i in range(2)]
+    tropics = get_region_mask('Tropics', res='4x5')[..., 0]
+    df = get_regional_stats(arrs, ['Tropics'], specs=['A', 'B'],
+                            stats=('mean', 'sum', 'p50'))
+    df = df.set_index(['species', 'time', 'stat'])['value']
+    for n, spec in enumerate(['A', 'B']):
+        vals = arrs[n][tropics, 0]
+        assert np.isclose(df[(spec, 0, 'mean')], vals.mean()), 'Mean wrong'
+        assert np.isclose(df[(spec, 0, 'sum')], vals.sum()), 'Sum wrong'
+        assert np.isclose(df[(spec, 0, 'p50')], np.median(vals)), 'p50 wrong'
+    return
+
+
+def test_get_region_labels():
+    # Overlapping regions are labelled once, then looked up or aggregated
+    regions = ['Tropics', 'Ocean', 'Ocean Tropics']
+    labels = get_region_labels(regions, res='4x5')
+    assert labels.labels.shape == (72, 46), 'Labels shape is wrong'
+    assert labels.labels.dtype == np.uint8, 'Labels dtype is wrong'
+    for region in regions:
+        mask = get_region_mask(region, res='4x5')[..., 0]
+        member = get_region_membership(labels, region)
+        assert np.array_equal(member.astype(bool), mask), region
+    arr = np.arange(72*46*2, dtype=float).reshape(72, 46, 2)
+    sums = get_regional_values4labels(arr, labels, stat='sum')
+    df = get_regional_stats(arr, regions, stats=['sum'])
+    assert np.allclose(sums.ravel(), df['value'].values), 'Sums different'
+    return
+
+
+def test_get_solar_cube4year(tmpdir):
+    # Solar values are cached on disk and looked up for dates
+    from ..funcs4time import get_daytime_mask4dates
+    cube = get_solar_cube4year(2005, res='4x5', freq='D',
+                               cache_dir=str(tmpdir))
+    assert cube.daytime.shape == (72, 46, 365), 'Cache shape is wrong'
+    assert isinstance(cube.cos_sza, np.memmap), 'Cache is not memory mapped'
+    assert cube.cos_sza.dtype == np.int16, 'Cache dtype is wrong'
+    dates = cube.dates[[0, 100, 200]]
+    daytime = get_solar_values4dates(dates, res='4x5', freq='D',
+                                     cache_dir=str(tmpdir))
+    mask = get_daytime_mask4dates(dates, cube.lon, cube.lat)
+    assert np.array_equal(daytime, ~mask), 'Cached daytime is different'
+    return
+
+
+def test_get_xy():
+    lon_edges, lat_edges = np.arange(-180, 181, 5.), np.arange(-90, 91, 4.)
+    # Points in the first grid box are not treated as outside the grid
+    assert get_xy(-178, -89, lon_edges, lat_edges) == (0, 0)
+    assert get_xy(2, 3, lon_edges, lat_edges) == (36, 23)
+    assert get_xy(500, 3, lon_edges, lat_edges) == (-1, -1)
+    return
+
+
+def test_get_shortest_in():
+    haystack = np.array([[0., 0.], [0., 10.], [0., 20.]])
+    # A pre-built index gives the same result as the haystack
+    index = get_spatial_index(haystack[:, 1], haystack[:, 0])
+    assert get_shortest_in((0., 9.), haystack) == 1
+    assert get_shortest_in((0., 9.), index=index) == 1
+    inds = get_shortest_in(np.array([[0., 1.], [1., 19.]]), index=index)
+    assert list(inds) == [0, 2]
+    return
+
+
+def test_location_unmasked():
+    # The box containing the location is unmasked (not the nearest centre)
+    mask = location_unmasked(lat=47.986, lon=-177.69, mask2D=True)
+    assert (~mask).sum() == 1, 'More than one box unmasked'
+    assert not mask[0, 34], 'Box containing location is masked'
+    return
+
+
 logging.info('funcs4GEOSC test complete')
@@ -1,4 +1,7 @@
 from ..bpch2netCDF import *
+from ..funcs4time import *
+import datetime
+import numpy as np
 import logging
 import pytest
 logging.basicConfig(filename='test.log', level=logging.DEBUG)
@@ -13,4 +16,33 @@ def test_get_folder():
     return
 
 
+def test_get_solartime4dates():
+    # Vectorised solar time and daytime mask agree with ephem
+    ephem = pytest.importorskip('ephem')
+    dates = [datetime.datetime(2005, 1, 1), datetime.datetime(2005, 6, 21, 13)]
+    lons, lats = np.array([-120., 0., 95.]), np.array([-45., 0., 51.5])
+    s_time = get_solartime4dates(dates, lons, lats)
+    elev = get_solar_elevation4dates(dates, lons, lats)
+    mask = get_daytime_mask4dates(dates, lons, lats)
+    assert s_time.shape == mask.shape == (3, 3, 2), 'Shape is wrong'
+    for i, lon in enumerate(lons):
+        for j, lat in enumerate(lats):
+            for k, date in enumerate(dates):
+                o = ephem.Observer()
+                o.lat, o.long, o.date = str(lat), str(lon), date
+                # ( geometric elevation, without refraction )
+                o.pressure = 0
+                sun = ephem.Sun()
+                sun.compute(o)
+                hour_angle = o.sidereal_time() - sun.ra
+                ref = ephem.hours(hour_angle + ephem.hours('12:00')).norm
+                diff = (s_time[i, j, k] - ref*12./np.pi + 12.) % 24. - 12.
+                assert abs(diff) < 10./60./60., 'Solar time is different'
+                # ( 0.01 degrees is at most a few seconds of sun rise/set )
+                assert np.isclose(elev[i, j, k], np.degrees(sun.alt),
+                                  atol=0.01), 'Elevation is different'
+                assert mask[i, j, k] == (elev[i, j, k] < -0.8333), 'Mask'
+    return
+
+
 logging.info('funcs4GEOSC test complete')
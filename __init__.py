@@ -8,6 +8,7 @@ from . funcs4generic import *
 from . funcs4core import *
 from . funcs4GEOSC import *
 from . funcs4GEOSC_nc import *
+from . funcs4bpch import *
 import numpy as np
 """
 AC_tools is a module of functions started by Tomas, and contributed to by others in the Evans' group, and hopefully maintained by the Group.
@@ -32,6 +32,8 @@ except ImportError:
 import pandas as pd
 import xarray as xr
 import re
+import threading
+from collections import OrderedDict
 from netCDF4 import Dataset
 try:
     import iris
@@ -77,6 +79,9 @@ def get_surface_area(res=None, wd=None, debug=False):
     -----
      - this function accesses previsouly run GEOS-Chem
         1day files with just DXYP / DXYP diagnostic ouptuted
+     - If there is no file for the resolution (or the file can't be read),
+     the surface area is calculated from the grid edges instead (see
+     get_surface_area4edges).
     """
     # Log call of function to module log file
     logging.info("Getting the surface area for res={}".format(res))
@@ -98,12 +103,17 @@ def get_surface_area(res=None, wd=None, debug=False):
         dwd = path+'/data/LM/'
         logging.debug("dwd = " + str(dwd))
         # Choose the correct directory for a given resolution
-        dir = {
-            '4x5': 'LANDMAP_LWI_ctm',
-            '2x2.5': 'LANDMAP_LWI_ctm_2x25',
-            '0.5x0.666': 'LANDMAP_LWI_ctm_05x0666',
-            '0.25x0.3125': 'LANDMAP_LWI_ctm_025x03125',
-        }[res]
+        try:
+            dir = {
+                '4x5': 'LANDMAP_LWI_ctm',
+                '2x2.5': 'LANDMAP_LWI_ctm_2x25',
+                '0.5x0.666': 'LANDMAP_LWI_ctm_05x0666',
+                '0.25x0.3125': 'LANDMAP_LWI_ctm_025x03125',
+            }[res]
+        except KeyError:
+            logging.info("No file for res={}, calculating surface area"
+                         .format(res))
+            return _calc_surface_area4res(res=res)
         fd = dwd + dir
 
         logging.debug("resolution = {res}, lookup directory = {fd}".format(
@@ -114,12 +124,24 @@ def get_surface_area(res=None, wd=None, debug=False):
     try:
         s_area = get_GC_output(wd, vars=['DXYP__DXYP'])
     except:
-        logging.error("Could not get the surface area!")
-        raise ValueError("Could not find the surface area")
+        logging.warning("Could not get the surface area from {}, calculating"
+                        " it instead".format(wd))
+        s_area = _calc_surface_area4res(res=res, wd=wd)
 
     return s_area
 
 
+def _calc_surface_area4res(res=None, wd=None):
+    """ Calculate surface area (m2) of grid boxes as (lon, lat, 1) """
+    grid = get_grid4res(res=res, wd=wd)
+    if isinstance(grid.s_area, type(None)) and (not isinstance(wd, type(None))):
+        grid = get_grid4res(res=res)
+    if isinstance(grid.s_area, type(None)):
+        logging.error("Could not get the surface area!")
+        raise ValueError("Could not find the surface area")
+    return grid.s_area[..., None]
+
+
 def list_variables(wd=None):
     """
     Show a list of variables in a wd that we can get at.
@@ -181,7 +203,8 @@ def list_variables(wd=None):
     return
 
 
-def get_land_map(res='4x5', date=None, wd=None, debug=False):
+def get_land_map(res='4x5', date=None, wd=None, engine='netCDF4',
+                 debug=False):
     """
     Return land, water, and ice indices (LWI ) from GEOS-Chem with integers
     for Land (1) and Water (0). Ice fraction is given as fractional values.
@@ -190,6 +213,7 @@ def get_land_map(res='4x5', date=None, wd=None, debug=False):
     -------
     res (str): resolution of model to get land map for
     wd (str): directory contain file with LWI
+    engine (str): 'netCDF4' or 'mmap' (read-only memory map, if uncompressed)
 
     Returns
     -------
@@ -241,7 +265,8 @@ def get_land_map(res='4x5', date=None, wd=None, debug=False):
             landmap = ds['LWI']
 
     else:
-        landmap = get_GC_output(wd=land_dir, vars=['LANDMAP__LWI'])
+        landmap = get_GC_output(wd=land_dir, vars=['LANDMAP__LWI'],
+                                engine=engine)
         # Just use NetCDF4 instead of AC_tools function
 #            landmap = Dataset(land_dir+'ctm.nc', 'r')['LANDMAP__LWI'][:]
 
@@ -249,7 +274,7 @@ def get_land_map(res='4x5', date=None, wd=None, debug=False):
 
 
 def get_air_mass_np(wd=None, times=None, trop_limit=True, AirMassVar='BXHGHT_S__AD', 
-                    debug=False):
+                    lazy=False, debug=False):
     """
     Get array of air mass (4D) in kg
 
@@ -258,6 +283,7 @@ def get_air_mass_np(wd=None, times=None, trop_limit=True, AirMassVar='BXHGHT_S__
     wd (str): Specify the wd to get the results from a run.
     trop_limit (boolean): limit 4D arrays to troposphere
     times (list): list of times to extract model for - vestigial
+    lazy (boolean): return a lazily evaluated (dask) array
     debug (boolean): legacy debug option, replaced by python logging
 
     Returns
@@ -266,7 +292,7 @@ def get_air_mass_np(wd=None, times=None, trop_limit=True, AirMassVar='BXHGHT_S__
     """
     logging.info('get air mass called')
     # Get air mass in kg
-    arr = get_GC_output(wd=wd, vars=[AirMassVar],
+    arr = get_GC_output(wd=wd, vars=[AirMassVar], lazy=lazy,
                         trop_limit=trop_limit, dtype=np.float64)
     # Save details on extracted data to debug log
     logging.debug('arr type={}, shape={}'.format(type(arr), arr.shape))
@@ -536,10 +562,157 @@ def get_HEMCO_output(wd=None, files=None, filename=None, vars=None,
     return arr
 
 
+# --- Cache of extracted arrays for get_GC_output (off by default)
+# ( arrays held from least to most recently used, keyed by file, variable,
+# processing options and file modification time )
+_GC_output_cache = {
+    'use_cache': False, 'max_bytes': 2E9, 'nbytes': 0, 'hits': 0, 'misses': 0,
+    'arrays': OrderedDict(),
+}
+_GC_output_cache_lock = threading.RLock()
+
+
+def set_GC_output_cache(use_cache=True, max_bytes=2E9):
+    """
+    Turn on/off the cache of arrays extracted by get_GC_output
+
+    Parameters
+    ----------
+    use_cache (boolean): cache (and re-use) arrays extracted by get_GC_output
+    max_bytes (float): memory budget of the cache in bytes
+
+    Returns
+    -------
+    (None)
+
+    Notes
+    -----
+     - Arrays are keyed by file, variable, trop_limit, dtype,
+     restore_zero_scaling and file modification time. The least recently used
+     arrays are dropped once the cache exceeds max_bytes.
+     - get_GC_output returns copies of cached arrays, unless copy=False is
+     given (then read-only views are returned).
+    """
+    with _GC_output_cache_lock:
+        _GC_output_cache['use_cache'] = use_cache
+        _GC_output_cache['max_bytes'] = max_bytes
+        if not use_cache:
+            clear_GC_output_cache()
+        else:
+            _trim_GC_output_cache()
+
+
+def get_GC_output_cache_stats():
+    """
+    Get the hit/miss counters and memory use of the get_GC_output array cache
+
+    Returns
+    -------
+    (dict)
+    """
+    with _GC_output_cache_lock:
+        stats = {
+            'use_cache': _GC_output_cache['use_cache'],
+            'hits': _GC_output_cache['hits'],
+            'misses': _GC_output_cache['misses'],
+            'nbytes': _GC_output_cache['nbytes'],
+            'max_bytes': _GC_output_cache['max_bytes'],
+            'n_arrays': len(_GC_output_cache['arrays']),
+        }
+    return stats
+
+
+def clear_GC_output_cache(reset_stats=False):
+    """
+    Remove all arrays from the get_GC_output array cache
+
+    Parameters
+    ----------
+    reset_stats (boolean): also reset the hit/miss counters
+
+    Returns
+    -------
+    (None)
+    """
+    with _GC_output_cache_lock:
+        _GC_output_cache['arrays'].clear()
+        _GC_output_cache['nbytes'] = 0
+        if reset_stats:
+            _GC_output_cache['hits'] = 0
+            _GC_output_cache['misses'] = 0
+
+
+def _get_GC_output_from_cache(key):
+    """ Return read-only view of cached array for key (None if not cached) """
+    with _GC_output_cache_lock:
+        try:
+            arr = _GC_output_cache['arrays'].pop(key)
+        except KeyError:
+            _GC_output_cache['misses'] += 1
+            return None
+        # (Re)insert as the most recently used array
+        _GC_output_cache['arrays'][key] = arr
+        _GC_output_cache['hits'] += 1
+    return arr.view()
+
+
+def _add_GC_output_to_cache(key, arr):
+    """ Add an array to the cache and return a read-only view of it """
+    with _GC_output_cache_lock:
+        # Don't hold arrays larger than the whole memory budget
+        if arr.nbytes > _GC_output_cache['max_bytes']:
+            return arr
+        arr.setflags(write=False)
+        if isinstance(arr, np.ma.MaskedArray) and \
+                (arr.mask is not np.ma.nomask):
+            arr.mask.setflags(write=False)
+        try:
+            _GC_output_cache['nbytes'] -= _GC_output_cache['arrays'].pop(
+                key).nbytes
+        except KeyError:
+            pass
+        _GC_output_cache['arrays'][key] = arr
+        _GC_output_cache['nbytes'] += arr.nbytes
+        _trim_GC_output_cache()
+    return arr.view()
+
+
+def _trim_GC_output_cache():
+    """ Drop least recently used arrays until the cache is within budget """
+    with _GC_output_cache_lock:
+        while _GC_output_cache['nbytes'] > _GC_output_cache['max_bytes']:
+            NIU, arr = _GC_output_cache['arrays'].popitem(last=False)
+            _GC_output_cache['nbytes'] -= arr.nbytes
+
+
+def _update_ctm_nc(wd, fname):
+    """ Append any ctm.bpch files in wd not yet in ctm.nc (fname) """
+    from .bpch2netCDF import convert_to_netCDF, get_bpch_manifest_in_netCDF
+    from .bpch2netCDF import get_bpch_files_not_in_netCDF
+    from .funcs4bpch import get_bpch_files
+    # Files without a record of the ctm.bpch files in them can't be appended to
+    if len(get_bpch_manifest_in_netCDF(fname)) == 0:
+        logging.debug('No record of ctm.bpch files in {}'.format(fname))
+        return
+    try:
+        bpch_files = get_bpch_files(wd)
+    except IOError:
+        return
+    if len(get_bpch_files_not_in_netCDF(fname, bpch_files)) == 0:
+        return
+    try:
+        convert_to_netCDF(wd, append=True, verbose=False)
+    except Exception as e:
+        logging.warning('Could not append new ctm.bpch files to {} ({}), '
+                        'so using existing file'.format(fname, repr(e)))
+
 
 def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
                   r_res=False, restore_zero_scaling=True, r_list=False, trop_limit=False,
-                  dtype=np.float32, use_NetCDF=True, verbose=False, debug=False):
+                  dtype=np.float32, use_NetCDF=True, use_cache=None, lazy=False,
+                  time_slice=None, lev_slice=None, lon_range=None, lat_range=None,
+                  n_workers=1, update_NetCDF=False, engine='netCDF4',
+                  copy=True, verbose=False, debug=False):
     """
     Return data from a directory containing NetCDF/ctm.bpch files via PyGChem (>= 0.3.0 )
 
@@ -555,7 +728,23 @@ def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
     restore_zero_scaling(Boolean): restores scale to ctm.bpch standard (e.g. v/v not pptv)
     trop_limit(boolean): limit to "chemical troposphere" (level 38 of model)
     dtype (type): type of variable to be returned
-    use_NetCDF(boolean): set==True to use NetCDF rather than iris cube of output
+    use_NetCDF(boolean): set==True to use NetCDF, or False to read ctm.bpch
+        files directly
+    use_cache (boolean): re-use arrays from the extracted array cache (if None,
+        then the setting from set_GC_output_cache is used)
+    lazy (boolean): return a lazily evaluated dask array (chunked by time)
+        instead of reading the data into memory
+    time_slice (slice or int): subset of time indices to read (e.g. slice(0, 6))
+    lev_slice (slice or int): subset of model levels to read (e.g. 0 for surface)
+    lon_range (tuple): min. and max. longitude (degrees East) of boxes to read
+        (a min. greater than the max., e.g. (170, -170), crosses the dateline)
+    lat_range (tuple): min. and max. latitude (degrees North) of boxes to read
+    n_workers (int): number of processes to read multiple variables with
+    update_NetCDF (boolean): append any new ctm.bpch files in wd to ctm.nc
+    engine (str): 'netCDF4' to read ctm.nc, or 'mmap' to use (read-only)
+        memory maps of uncompressed variables where possible
+    copy (boolean): return copies of arrays from the array cache (if False,
+        read-only views of the cached arrays are returned)
     verbose (boolean): legacy debug option, replaced by python logging
     debug (boolean): legacy debug option, replaced by python logging
 
@@ -578,6 +767,31 @@ def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
       print full dataset extracted to screen to see active diagnostics.
      - Species and category variables are maintained ( and translated ) to allow for
       backwards compatibility with functions written for pygchem version 0.2.0
+     - Arrays from the cache (use_cache=True) are returned as copies, so they
+      can be changed in place. With copy=False, read-only views of the cached
+      arrays are returned instead (avoiding a copy).
+     - With lazy=True, axis re-ordering, trop_limit and unit scaling are applied
+      lazily, so reductions (e.g. .sum().compute()) stream through the file
+      chunk by chunk. The array cache is not used for lazy arrays.
+     - Subsets (time_slice, lev_slice, lon_range, lat_range) and trop_limit are
+      read directly from the NetCDF as a hyperslab. Dimensions are kept even if
+      an integer index is given (e.g. lev_slice=0 gives shape (lon, lat, 1, time)).
+     - Multiple variables are written directly into a single preallocated
+      array. With n_workers > 1, variables are read and decompressed by a pool
+      of processes that write into a shared memory (/dev/shm) backed array.
+      Variables read by the pool are not added to the array cache.
+     - With use_NetCDF=False, only the requested variables are read from the
+      ctm.bpch files (see funcs4bpch). These are always returned with 4 dims
+      (lon, lat, alt, time), and need diaginfo.dat and tracerinfo.dat in wd.
+     - With update_NetCDF=True, ctm.bpch files in wd not yet in ctm.nc (e.g.
+      new months from a run in progress) are converted and appended first.
+      If these can not be appended (e.g. no conversion backend is available),
+      a warning is logged and the existing ctm.nc is read.
+     - With engine='mmap', a single variable that needs no unit scaling (or
+      type conversion) is returned as a read-only view of the file's memory
+      map (see get_NetCDF_mmap_var). So processes reading the same file (e.g.
+      LANDMAP__LWI or DXYP__DXYP) share the operating system's page cache
+      rather than each holding a copy.
     """
 # bjn
 # This function is not completly clear to me, and could do with a re-write
@@ -621,28 +835,61 @@ def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
         # If not found, create NetCDF file from ctm.bpch files
         import os.path
         fname = os.path.join(wd, 'ctm.nc')
+        from .bpch2netCDF import convert_to_netCDF
         if not os.path.isfile(fname):
-            from .bpch2netCDF import convert_to_netCDF
             convert_to_netCDF(wd)
+        elif update_NetCDF:
+            _update_ctm_nc(wd, fname)
 
         logging.debug("Opening netCDF file {fname}".format(fname=fname))
-        # "open" NetCDF + extract requested variables as numpy arr.
-        netCDF_data = Dataset(fname, 'r')
-        arr = []
-        for var in vars:
-            try:
-                logging.debug("opening variable {var}".format(var=var))
-                var_data = netCDF_data.variables[var]
-            except:
-                logging.warning("Variable {var} not found in netCDF"
-                                .format(var=var))
-                logging.warning("Will attempt renaming")
+        # "open" NetCDF (via shared handle pool) + extract requested variables
+        netCDF_data = get_NetCDF_handle(fname)
+        try:
+            if isinstance(use_cache, type(None)):
+                use_cache = _GC_output_cache['use_cache']
+            # Open via xarray to provide dask arrays if lazy output requested
+            if lazy:
+                use_cache = False
+                chunks = 'auto'
+                if 'time' in netCDF_data.dimensions:
+                    chunks = {'time': 1}
+                ds_lazy = get_NetCDF_xr_dataset(fname, chunks=chunks)
+            # Multiple variables are written straight into a preallocated array
+            # of shape (var, lon, lat, alt, time), rather than concatenated
+            preallocate = (len(vars) > 1) and (not lazy)
+            # Variables left to read with a pool of processes (if n_workers > 1)
+            pool_jobs = []
+            arr = []
+            for n_var, var in enumerate(vars):
+                # Re-use previously extracted (and processed) array if cached
+                if use_cache:
+                    cache_key = (os.path.abspath(fname), var, trop_limit,
+                                 np.dtype(dtype).str, restore_zero_scaling,
+                                 os.path.getmtime(fname),
+                                 repr((time_slice, lev_slice, lon_range, lat_range)))
+                    cached_arr = _get_GC_output_from_cache(cache_key)
+                    if not isinstance(cached_arr, type(None)):
+                        # ( the preallocated output is already a copy )
+                        if copy and (not preallocate):
+                            cached_arr = cached_arr.copy()
+                        arr = _add_var2GC_output(arr, cached_arr, n_var=n_var,
+                                                 n_vars=len(vars),
+                                                 preallocate=preallocate,
+                                                 shared=(n_workers > 1))
+                        continue
                 try:
-                    abrv_var = get_ctm_nc_var(var)
-                    var_data = netCDF_data.variables[abrv_var]
-                except KeyError:
-                    logging.error("Renamed variable {var} not found in netCDF"
-                                  .format(var=var))
+                    logging.debug("opening variable {var}".format(var=var))
+                    var_data = netCDF_data.variables[var]
+                except:
+                    logging.warning("Variable {var} not found in netCDF"
+                                    .format(var=var))
+                    logging.warning("Will attempt renaming")
+                    try:
+                        abrv_var = get_ctm_nc_var(var)
+                        var_data = netCDF_data.variables[abrv_var]
+                    except KeyError:
+                        logging.error("Renamed variable {var} not found in netCDF"
+                                      .format(var=var))
 
 
 ####################################################################################
@@ -684,17 +931,69 @@ def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
 #                # files are stored in NetCDF at GC scaling.
 #                # ( This is different to ctm.bpch, rm for back compatibility. )
 
-############################################################################
-#    # This is not in a working state currently - needs work
-            if restore_zero_scaling:
+                # Get subset (hyperslab) of variable to read from file and the
+                # order of its axes in GC format (lon, lat, alt, time)
+                NIU, axes = _get_ctm_nc_var_axes(netCDF_data, var_data)
+                slab, trop_limit_ = _get_GC_output_hyperslab(netCDF_data,
+                                                             var_data,
+                                                             trop_limit=trop_limit,
+                                                             time_slice=time_slice,
+                                                             lev_slice=lev_slice,
+                                                             lon_range=lon_range,
+                                                             lat_range=lat_range)
+
+                # Just setup lazy (dask) array for the variable if requested
+                if lazy:
+                    var_arr = _get_hyperslab(ds_lazy[var_data.name].data,
+                                             slab)
+                    if restore_zero_scaling:
+                        try:
+                            var_arr = var_arr / \
+                                get_unit_scaling(var_data.ctm_units)
+                        except:
+                            logging.warning(
+                                "Scaling not adjusted to previous approach")
+                    arr.append(_process_GC_output_var(var_arr, var=var,
+                                                      trop_limit=trop_limit_,
+                                                      axes=axes, dtype=dtype))
+                    continue
+
+                # Leave variables for the process pool once the output is setup
+                if (n_workers > 1) and preallocate and (len(arr) > 0):
+                    pool_jobs += [(fname, var_data.name, var, slab, axes,
+                                   trop_limit_, restore_zero_scaling,
+                                   np.dtype(dtype).str, n_var)]
+                    continue
+
+                # Read, scale and process to GC standard format (lon, lat, alt, time)
+                var_arr = _read_GC_output_var(var_data, var=var, slab=slab,
+                                              axes=axes, trop_limit=trop_limit_,
+                                              restore_zero_scaling=restore_zero_scaling,
+                                              dtype=dtype, engine=engine,
+                                              fname=fname)
+                if use_cache:
+                    var_arr = _add_GC_output_to_cache(cache_key, var_arr)
+                    # ( arrays too large to cache are returned as read )
+                    if copy and (not preallocate) and \
+                            (not var_arr.flags.writeable):
+                        var_arr = var_arr.copy()
+                arr = _add_var2GC_output(arr, var_arr, n_var=n_var,
+                                         n_vars=len(vars), preallocate=preallocate,
+                                         shared=(n_workers > 1))
+
+            # Read remaining variables in parallel into the (shared) output array
+            if isinstance(arr, np.memmap):
                 try:
-                    var_data = np.divide(
-                        var_data, get_unit_scaling(var_data.ctm_units))
-                except:
-                    logging.warning(
-                        "Scaling not adjusted to previous approach")
-
-            arr.append(var_data[:])
+                    if len(pool_jobs) > 0:
+                        _read_GC_output_vars_with_pool(arr, pool_jobs,
+                                                       n_workers=n_workers)
+                finally:
+                    # The data stays mapped in memory after the file is removed
+                    os.remove(arr.filename)
+            if preallocate:
+                arr = arr.view(np.ndarray)
+        finally:
+            release_NetCDF_handle(netCDF_data)
 
 ####--- The above re-write does not work so still using old version ---###
 
@@ -712,128 +1011,42 @@ def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
 #                            ' PREVIOUS APPROACH'
 #############################################################################
 
-    # Use Iris cubes via PyGChem to extract ctm.bpch files
+    # Read ctm.bpch files directly (with the NumPy bpch reader in funcs4bpch)
     else:
+        from .funcs4bpch import get_bpch_files, read_bpch_var
+        if any([not isinstance(i, type(None)) for i in (lon_range, lat_range)]):
+            err_msg = 'lon_range/lat_range not setup for use_NetCDF=False'
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        if lazy:
+            logging.warning('lazy=True not setup for use_NetCDF=False')
+        bpch_files = get_bpch_files(wd)
+        arr = []
+        for var in vars:
+            var_arr, units = read_bpch_var(bpch_files, var=var,
+                                           time_slice=time_slice,
+                                           lev_slice=lev_slice,
+                                           trop_limit=trop_limit, r_units=True)
+            # Restore to zero scaling (e.g. v/v not pptv), as for ctm.nc
+            if restore_zero_scaling:
+                try:
+                    var_arr /= get_unit_scaling(units)
+                except:
+                    logging.warning("Scaling not adjusted to previous approach")
+            arr += [var_arr.astype(dtype, copy=False)]
+        if len(vars) > 1:
+            arr = np.stack(arr)
 
-        # Get files in dir ( more than one? )
-        #        fns = sorted( glob.glob( wd+ '/*ctm*' ) )
-        #        if len(fns) == 0:
-        #            fns = glob.glob(wd + '*trac_avg*')
-        #            print 'using *trac_avg* bpch name convention: ', fns
-
-        #        if debug:
-        #            print fns
-
-        # Load files into Iris Cube
-        #        print 'WARNING - with ctm.bpch files, all variables are loaded.'+\
-        #            'Convert to NetCDF or HDF for speed up or use use_NetCDF=True)'
-        #        cubes = datasets.load( fns, vars )
-
-        # If no data extracted, print our variables
-        #        try:
-        #            [ i[0].data for i in cubes ]
-        #        except:
-        #            print datasets.load( fns[0] )
-        #            print 'WARNING: no vars found for >{}<'.format( ','.join(vars) )
-        #            sys.exit( 0 )
-
-        # Temporary fix for back compatibility:
-        # Just extract as numpy
-
-        #        if not r_cubes:
-
-            # Extract data
-        #            try:
-        #                arr = [ cubes[i].data for i in range( len(vars) ) ]
-        #            except:
-        #                print 'WARNING: length of extracted data array < vars'
-        #                print 'vars: >{}<'.format( ','.join(vars) )
-        #                sys.exit( 0 )
-
-            #  restore to zero scaling (v/v instead of pptv etc ) - only for GC tracers
-        #            if restore_zero_scaling:
-        #                if (category == 'IJ_AVG_S') or ('IJ_AVG_S' in vars[0] ):
-        #                    print [ cubes[i].attributes['ctm_units'] for i in range( len(vars) ) ]
-        #                    arr = [ arr[n]/get_unit_scaling( cubes[n].attributes['ctm_units'])
-        #                             for n, var in enumerate( vars ) ]
-        #            del cubes
-        logging.error(
-            'WARNING this approach has been removed due to time cost')
-        sys.exit(0)
-
-    # Process extracted data to gamap GC format and return as numpy
+    # Return extracted data as numpy (processed to GC format above)
     if not r_cubes:
 
-        # Limit to GEOS-Chem "chemical troposphere'
-        if trop_limit:
-            arr = [i[..., :38] for i in arr]
-
-        # Convert to GC standard 4D fmt. - lon, lat, alt, time
-        if len((arr[0].shape)) == 4:
-            logging.info('prior to roll axis: {}'.format(
-                *[i.shape for i in arr]))
-            arr = [np.rollaxis(i, 0, 4) for i in arr]
-            logging.info('post roll axis: {}'.format(*[i.shape for i in arr]))
-
-        # Convert to GC standard 3D fmt. - lon, lat, time
-        # two reasons why 3D (  missing time dim  or  missing alt dim )
-        # <= update, there must be a better gotcha than this...
-        if ((len((arr[0].shape)) == 3) \
-            # -- '4x5'
-            and ((72, 46, 47) != arr[0].shape) \
-            and ((72, 46, 38) != arr[0].shape) \
-            # also consider for vertical levels=72 (full_vertical_grid=True)
-            and ((72, 46, 72) != arr[0].shape) \
-            # and the prod/loss reduced grid
-            and ((72, 46, 59) != arr[0].shape) \
-            # -- '2x2.5'
-            and ((144, 91, 47) != arr[0].shape) \
-            and ((144, 91, 38) != arr[0].shape) \
-            # -- '0.25x0.3125':
-            and ((177, 115, 47) != arr[0].shape) \
-            and ((177, 115, 38) != arr[0].shape) \
-            # -- '0.25x0.3125_CH':
-            and ((225, 161, 47) != arr[0].shape) \
-            and ((225, 161, 38) != arr[0].shape) \
-            # -- '0.25x0.3125_WA':
-            and ((145, 89, 47) != arr[0].shape) \
-            and ((145, 89, 38) != arr[0].shape) \
-            # -- '0.25x0.3125_WA':
-            and ((145, 133, 47) != arr[0].shape) \
-            and ((145, 133, 38) != arr[0].shape) \
-            # -- '0.5x0.625' - SA grid
-            and ((121, 81, 47) != arr[0].shape) \
-                and ((121, 81, 38) != arr[0].shape)):
-
-            logging.info('prior roll axis: {}'.format(*[str(i.shape)
-                                                        for i in arr]))
-            arr = [np.rollaxis(i, 0, 3) for i in arr]
-            logging.info('post roll axis: {}'.format(*[str(i.shape)
-                                                       for i in arr]))
-
-        # --- loop variables post processing and force inclusions of time dim if applicable
-        need_time = ['IJ_AVG', 'GMAO', 'BXHGHT', 'TIME_TPS_', 'PORL_L_S_']
-        for n, var in enumerate(vars):
-
-            # Add altitude dimension to 2D (lon, lat)
-            # a bug might occur for emission etc ( where lon, lat, time are dims )
-            if len((arr[n].shape)) == 2:
-                arr[n] = arr[n][..., None]
-
-            # ensure output for categories in need_time list have 4 dims
-            if any([(i in var) for i in need_time]) and (len(arr[n].shape) == 3):
-                arr[n] = np.expand_dims(arr[n], -1)
-
-            # Convert type if dtype not float32
-            # ( needed for some arrays e.g. air mass )
-            if dtype != np.float32:
-                arr[n] = arr[n].astype(dtype)
-
         # --- concatenate
         # For multiple vars, concatenate to var, lon, lat, lat, time
-        if len(vars) > 1:
-            arr = np.concatenate([i[None, ...] for i in arr], axis=0)
-        else:
+        # ( already done for arrays in memory, via a preallocated array )
+        if (len(vars) > 1) and lazy:
+            import dask.array as da
+            arr = da.stack(arr, axis=0)
+        elif len(vars) == 1:
             arr = arr[0]
 
     # Get res by comparing 1st 2 dims. against dict of GC dims.
@@ -867,6 +1080,375 @@ def get_GC_output(wd, vars=None, species=None, category=None, r_cubes=False,
         return output
 
 
+def _get_ctm_nc_dim_type(dim):
+    """ Get type of a ctm.nc dimension (lon, lat, lev or time) from its name """
+    dim = dim.lower()
+    if 'time' in dim:
+        return 'time'
+    elif dim.startswith('lon'):
+        return 'lon'
+    elif dim.startswith('lat'):
+        return 'lat'
+    elif any([(i in dim) for i in ('lev', 'alt', 'height')]):
+        return 'lev'
+    else:
+        return None
+
+
+def _get_range_subset(inds, subset=None):
+    """ Subset a range of indices by a slice, (start, stop) tuple or index """
+    if isinstance(subset, type(None)):
+        return inds
+    elif isinstance(subset, slice):
+        return inds[subset]
+    elif isinstance(subset, (tuple, list)):
+        return inds[slice(*subset)]
+    else:
+        ind = inds[subset]
+        return range(ind, ind+1)
+
+
+# Cache of GC format axes order for variables in ctm.nc files
+# ( {(file, variable): (dimensions, dimension types, axes)} )
+_ctm_nc_var_axes_cache = {}
+
+# Shapes of (lon, lat, alt) arrays of GC output (e.g. 4x5, 2x2.5 and nested)
+# ( 3D arrays of other shapes with unknown dimensions are (time, lon, lat) )
+_GC_lon_lat_alt_shapes = [(72, 46, 72), (72, 46, 59)] + \
+    [i + (lev,) for i in ((72, 46), (144, 91), (177, 115), (225, 161),
+                          (145, 89), (145, 133), (121, 81)) for lev in (47, 38)]
+
+
+def _get_ctm_nc_var_axes(rootgrp, var_data):
+    """
+    Get dimension types and axes order (for GC format) of a ctm.nc variable
+
+    Parameters
+    ----------
+    rootgrp (netCDF4.Dataset): open NetCDF containing variable
+    var_data (netCDF4.Variable): variable to get axes order for
+
+    Returns
+    -------
+    (list, tuple) type of each dimension (lon, lat, lev, time or None) and the
+    order of the file axes in GC format (None if dimensions not recognised)
+
+    Notes
+    -----
+     - GC format is (lon, lat, alt, time), with any missing dimensions dropped
+     - The resolved order is cached for each file and variable, and checked
+     against the variable's current dimensions before re-use.
+    """
+    key = (rootgrp.filepath(), var_data.name)
+    dims = tuple(var_data.dimensions)
+    try:
+        cached_dims, dim_types, axes = _ctm_nc_var_axes_cache[key]
+        if cached_dims == dims:
+            return dim_types, axes
+    except KeyError:
+        pass
+    dim_types = [_get_ctm_nc_dim_type(i) for i in dims]
+    if any([isinstance(i, type(None)) for i in dim_types]) or \
+            (len(set(dim_types)) != len(dim_types)):
+        logging.warning('Dimensions ({}) of {} not recognised'.format(
+            ', '.join(dims), var_data.name))
+        axes = None
+    else:
+        GC_order = [i for i in ('lon', 'lat', 'lev', 'time') if i in dim_types]
+        axes = tuple([dim_types.index(i) for i in GC_order])
+    _ctm_nc_var_axes_cache[key] = (dims, dim_types, axes)
+    return dim_types, axes
+
+
+def _get_GC_output_hyperslab(rootgrp, var_data, trop_limit=False,
+                             time_slice=None, lev_slice=None, lon_range=None,
+                             lat_range=None):
+    """
+    Get the hyperslab (tuple of slices) to read for a variable in a ctm.nc
+
+    Parameters
+    ----------
+    rootgrp (netCDF4.Dataset): open NetCDF containing variable
+    var_data (netCDF4.Variable): variable to get hyperslab for
+    trop_limit(boolean): limit to "chemical troposphere" (level 38 of model)
+    time_slice (slice or int): subset of time indices to read
+    lev_slice (slice or int): subset of model levels to read
+    lon_range (tuple): min. and max. longitude (degrees East) of boxes to read
+    lat_range (tuple): min. and max. latitude (degrees North) of boxes to read
+
+    Returns
+    -------
+    (tuple, boolean) slices in file dimension order and whether trop_limit
+    still needs to be applied (i.e. if the dimensions were not recognised)
+
+    Notes
+    -----
+     - A lon_range across the dateline (min. > max., e.g. (170, -170)) gives
+     a tuple of two slices for longitude (east of min., then west of max.),
+     which _get_hyperslab reads and joins.
+    """
+    dims = var_data.dimensions
+    dim_types, axes = _get_ctm_nc_var_axes(rootgrp, var_data)
+    subsets = (time_slice, lev_slice, lon_range, lat_range)
+    # Just read everything if the dimensions are not recognised
+    if isinstance(axes, type(None)):
+        err_msg = 'Dimensions ({}) of {} not recognised, so cannot subset'
+        err_msg = err_msg.format(', '.join(dims), var_data.name)
+        if not all([isinstance(i, type(None)) for i in subsets]):
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        logging.debug(err_msg)
+        return tuple([slice(None)]*len(dims)), trop_limit
+    # Get indices to read for each dimension
+    slab = []
+    for n, dim in enumerate(dims):
+        inds = range(var_data.shape[n])
+        if dim_types[n] == 'time':
+            inds = _get_range_subset(inds, time_slice)
+        elif dim_types[n] == 'lev':
+            if trop_limit:
+                inds = inds[:38]
+            inds = _get_range_subset(inds, lev_slice)
+        else:
+            coord_range = {'lon': lon_range, 'lat': lat_range}[dim_types[n]]
+            if not isinstance(coord_range, type(None)):
+                coords = np.asarray(rootgrp.variables[dim][:])
+                min_, max_ = coord_range
+                # Read boxes either side of the dateline, if range crosses it
+                if (dim_types[n] == 'lon') and (min_ > max_):
+                    inds = [_get_coord_range_inds(coords, min_, np.inf),
+                            _get_coord_range_inds(coords, -np.inf, max_)]
+                    if all([len(i) > 0 for i in inds]):
+                        slab += [tuple([slice(i.start, i.stop) for i in inds])]
+                        continue
+                    inds = range(0)
+                else:
+                    inds = _get_coord_range_inds(coords, min_, max_)
+        if (len(inds) == 0) or (inds.step < 0):
+            err_msg = 'Subset of {} for {} is empty or reversed'
+            err_msg = err_msg.format(dim, var_data.name)
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        slab += [slice(inds.start, inds.stop, inds.step)]
+    return tuple(slab), False
+
+
+def _get_coord_range_inds(coords, min_, max_):
+    """ Get range of indices of coordinates between min_ and max_ """
+    coord_inds = np.where((coords >= min_) & (coords <= max_))[0]
+    if len(coord_inds) == 0:
+        return range(0)
+    return range(coord_inds[0], coord_inds[-1]+1)
+
+
+def _get_hyperslab(arr, slab):
+    """
+    Index an array (or NetCDF variable) with a hyperslab, joining any dimension
+    given as a tuple of slices (e.g. longitudes across the dateline)
+    """
+    for n, inds in enumerate(slab):
+        if isinstance(inds, tuple):
+            parts = [_get_hyperslab(arr, slab[:n]+(i,)+slab[n+1:])
+                     for i in inds]
+            if isinstance(parts[0], np.ma.MaskedArray):
+                return np.ma.concatenate(parts, axis=n)
+            elif isinstance(parts[0], np.ndarray):
+                return np.concatenate(parts, axis=n)
+            else:
+                import dask.array as da
+                return da.concatenate(parts, axis=n)
+    return arr[slab]
+
+
+def _read_GC_output_var(var_data, var=None, slab=Ellipsis, axes=None,
+                        trop_limit=False, restore_zero_scaling=True,
+                        dtype=np.float32, engine='netCDF4', fname=None):
+    """
+    Read (a hyperslab of) a ctm.nc variable and process to GC standard format
+
+    Parameters
+    ----------
+    var_data (netCDF4.Variable): variable to read
+    var (str): NetCDF variable name requested (e.g. 'IJ_AVG_S__O3')
+    slab (tuple): hyperslab to read (see _get_GC_output_hyperslab)
+    axes (tuple): order of file axes in GC format (see _get_ctm_nc_var_axes)
+    trop_limit(boolean): limit to "chemical troposphere" (level 38 of model)
+    restore_zero_scaling(Boolean): restores scale to ctm.bpch standard
+    dtype (type): type of variable to be returned
+    engine (str): 'netCDF4' or 'mmap' (see get_NetCDF_mmap_var)
+    fname (str): full path of NetCDF file (needed if engine='mmap')
+
+    Returns
+    -------
+    (np.array)
+    """
+    var_arr = None
+    if engine == 'mmap':
+        var_arr = get_NetCDF_mmap_var(fname, var_data.name)
+    if isinstance(var_arr, type(None)):
+        var_arr = _get_hyperslab(var_data, slab)
+    else:
+        var_arr = _get_hyperslab(var_arr, slab)
+    # files are stored in NetCDF at GC scaling.
+    # ( This is different to ctm.bpch, rm for back compatibility. )
+    if restore_zero_scaling:
+        try:
+            scaling = get_unit_scaling(var_data.ctm_units)
+            # ( keep memory mapped arrays as views if no scaling is needed )
+            if (engine != 'mmap') or (scaling != 1) or \
+                    (np.asarray(var_arr).dtype.kind != 'f'):
+                var_arr = np.divide(np.asarray(var_arr), scaling)
+        except:
+            logging.warning("Scaling not adjusted to previous approach")
+    return _process_GC_output_var(var_arr, var=var, trop_limit=trop_limit,
+                                  axes=axes, dtype=dtype)
+
+
+def _add_var2GC_output(arr, var_arr, n_var=0, n_vars=1, preallocate=False,
+                       shared=False):
+    """
+    Add a variable's array to get_GC_output's output (list or array)
+
+    Parameters
+    ----------
+    arr (list or np.array): output so far (an empty list for the 1st variable)
+    var_arr (np.array): array for variable
+    n_var (int): index of the variable in the requested variables
+    n_vars (int): number of requested variables
+    preallocate (boolean): write into an array of shape (var, lon, lat, alt, time)
+    shared (boolean): use a shared memory backed array (for a process pool)
+
+    Returns
+    -------
+    (list or np.array)
+    """
+    if not preallocate:
+        return arr + [var_arr]
+    # Setup output array using the shape and type of the 1st variable read
+    if isinstance(arr, list):
+        shape = tuple([n_vars]+list(var_arr.shape))
+        if shared:
+            arr = _get_shared_array(shape, dtype=var_arr.dtype)
+        else:
+            arr = np.empty(shape, dtype=var_arr.dtype)
+    arr[n_var, ...] = np.ma.getdata(var_arr)
+    return arr
+
+
+def _get_shared_array(shape, dtype=np.float32):
+    """
+    Get an array backed by a shared memory file that processes can write into
+
+    Notes
+    -----
+     - The file is in /dev/shm (where available) and is removed by
+     get_GC_output once the pool has finished writing to it.
+    """
+    import tempfile
+    tmp_dir = None
+    if os.path.isdir('/dev/shm'):
+        tmp_dir = '/dev/shm'
+    fd, filename = tempfile.mkstemp(prefix='AC_tools_GC_output_',
+                                    suffix='.dat', dir=tmp_dir)
+    os.close(fd)
+    return np.memmap(filename, dtype=dtype, mode='w+', shape=shape)
+
+
+def _read_GC_output_vars_with_pool(arr, jobs, n_workers=4):
+    """
+    Read variables with a pool of processes into a shared memory backed array
+
+    Parameters
+    ----------
+    arr (np.memmap): shared output array (see _get_shared_array)
+    jobs (list): tuples of arguments for _read_GC_output_var2shared_array
+    n_workers (int): number of processes to use
+
+    Returns
+    -------
+    (None)
+    """
+    import multiprocessing
+    jobs = [i + (arr.filename, arr.shape, arr.dtype.str) for i in jobs]
+    pool = multiprocessing.Pool(min(n_workers, len(jobs)))
+    try:
+        pool.map(_read_GC_output_var2shared_array, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _read_GC_output_var2shared_array(args):
+    """ Read a ctm.nc variable and write it into a shared memory array """
+    fname, var_name, var, slab, axes, trop_limit, restore_zero_scaling, \
+        dtype, n_var, filename, shape, out_dtype = args
+    # Open a new handle, rather than using one inherited from the parent
+    with Dataset(fname, 'r') as rootgrp:
+        var_arr = _read_GC_output_var(rootgrp.variables[var_name], var=var,
+                                      slab=slab, axes=axes,
+                                      trop_limit=trop_limit,
+                                      restore_zero_scaling=restore_zero_scaling,
+                                      dtype=np.dtype(dtype))
+    arr = np.memmap(filename, dtype=out_dtype, mode='r+', shape=shape)
+    arr[n_var, ...] = np.ma.getdata(var_arr)
+    arr.flush()
+    del arr
+
+
+def _process_GC_output_var(arr, var=None, trop_limit=False, axes=None,
+                           dtype=np.float32):
+    """
+    Process an array extracted from a ctm.nc file to GC standard format
+
+    Parameters
+    ----------
+    arr (np.array): array as extracted from NetCDF (or lazy dask array)
+    var (str): NetCDF variable name of array (e.g. 'IJ_AVG_S__O3')
+    trop_limit(boolean): limit to "chemical troposphere" (level 38 of model)
+    axes (tuple): order of file axes in GC format (see _get_ctm_nc_var_axes)
+    dtype (type): type of variable to be returned
+
+    Returns
+    -------
+    (np.array)
+    """
+    # Limit to GEOS-Chem "chemical troposphere'
+    # ( only if not already applied when reading the hyperslab )
+    if trop_limit:
+        arr = arr[..., :38]
+
+    # Convert to GC standard fmt. - lon, lat, (alt), (time) - in one transpose
+    # ( assume a leading time dimension if the dimensions are not known )
+    if isinstance(axes, type(None)):
+        if len(arr.shape) == 4:
+            axes = (1, 2, 3, 0)
+        elif (len(arr.shape) == 3) and \
+                (tuple(arr.shape) not in _GC_lon_lat_alt_shapes):
+            axes = (1, 2, 0)
+    if not isinstance(axes, type(None)) and (tuple(axes) != tuple(range(len(axes)))):
+        logging.info('prior to transpose: {}'.format(arr.shape))
+        arr = arr.transpose(axes)
+        logging.info('post transpose: {}'.format(arr.shape))
+
+    # --- post processing and force inclusions of time dim if applicable
+    need_time = ['IJ_AVG', 'GMAO', 'BXHGHT', 'TIME_TPS_', 'PORL_L_S_']
+
+    # Add altitude dimension to 2D (lon, lat)
+    # a bug might occur for emission etc ( where lon, lat, time are dims )
+    if len((arr.shape)) == 2:
+        arr = arr[..., None]
+
+    # ensure output for categories in need_time list have 4 dims
+    if any([(i in var) for i in need_time]) and (len(arr.shape) == 3):
+        arr = arr[..., None]
+
+    # Convert type if dtype not float32 ( needed for some arrays e.g. air mass )
+    # ( copy=False, so no copy is made if already of the requested type )
+    if dtype != np.float32:
+        arr = arr.astype(dtype, copy=False)
+    return arr
+
+
 def get_gc_res(wd, filename='ctm.nc'):
     """
     Extract spatial model resolution of a GEOS-Chem NetCDF file
@@ -886,12 +1468,15 @@ def get_gc_res(wd, filename='ctm.nc'):
         from .bpch2netCDF import convert_to_netCDF
         convert_to_netCDF(wd, filename=filename)
 
-    # "open" NetCDF + extract time
-    with Dataset(fname, 'r') as rootgrp:
+    # "open" NetCDF (via shared handle pool) + extract lon and lat
+    rootgrp = get_NetCDF_handle(fname)
+    try:
         lon = rootgrp['longitude']
         lat = rootgrp['latitude']
-#            lvls = rootgrp['model_level_number']
+#        lvls = rootgrp['model_level_number']
         lat, lon = [np.array(i) for i in (lat, lon)]
+    finally:
+        release_NetCDF_handle(rootgrp)
 
     # compare with dictionary to get resoslution
     dims = (len(lon), len(lat))
@@ -919,10 +1504,11 @@ def calc_surface_area_in_grid(res='1x1', lon_e=None, lat_e=None,
 
     Returns
     -------
-    (array)
+    (array) surface area of grid boxes (m2) with dimensions (lon, lat)
 
     Notes
     -----
+     - This is a read-only (broadcast) view, see get_surface_area4edges
      - Adapted for python from Fortrain in GEOS-Chem's grid_mod.F
         Credit: Bob Yantosca
         Original docs from ( grid_mod ):
@@ -999,32 +1585,24 @@ def calc_surface_area_in_grid(res='1x1', lon_e=None, lat_e=None,
     """
     logging.info('called calc surface area in grid')
     # Get latitudes and longitudes in grid
-    if any([isinstance(i, type(None)) for i in (lon_e, lat_e,)]):
-        lon_e, lat_e, NIU = get_latlonalt4res(res=res, centre=False)
-    if any([isinstance(i, type(None)) for i in (lon_c, lat_c,)]):
-        lon_c, lat_c, NIU = get_latlonalt4res(res=res, centre=True)
-    # Set variables values
-    PI_180 = np.pi / 180.0
-    Re = np.float64(6.375E6)  # Radius of Earth [m]
-#    lon_dim = get_dims4res(res=res)[0]
-    lon_dim = len(lon_c)
-    lon_degrees = float(lon_dim)
-    # Loop lats and calculate area
-    AREA = []
-    for n, lat_ in enumerate(lat_e[:-1]):
-        # Lat at S and N edges of 1x1 box [radians]
-        S = PI_180 * lat_e[n]
-        N = PI_180 * lat_e[n+1]
-        # S to N extent of grid box [unitless]
-        RLAT = np.sin(N) - np.sin(S)
-        # grid surface area [m2] (see [GEOS-Chem] "grid_mod.f" for algorithm)
-        AREA += [2.0 * np.pi * Re * Re / lon_degrees * RLAT]
-    AREA = np.array(AREA)
+    if any([isinstance(i, type(None)) for i in (lon_e, lat_e, lon_c, lat_c)]):
+        grid = get_grid4res(res=res)
+        if any([isinstance(i, type(None)) for i in (lon_e, lat_e,)]):
+            lon_e, lat_e = grid.lon_e, grid.lat_e
+        if any([isinstance(i, type(None)) for i in (lon_c, lat_c,)]):
+            lon_c, lat_c = grid.lon_c, grid.lat_c
+    if any([isinstance(i, type(None)) for i in (lon_c, lat_e)]):
+        err_msg = "Could not get grid to calculate surface area for {}"
+        logging.error(err_msg.format(res))
+        raise ValueError(err_msg.format(res))
+    # Only use the longitude edges if they are consistent with the centres
+    if len(lon_e) != (len(lon_c)+1):
+        lon_e = None
+    # Calculate area [m2] (see [GEOS-Chem] "grid_mod.f" for algorithm)
+    AREA = get_surface_area4edges(lat_e, lon_e=lon_e, lon_dim=len(lon_c))
     if debug:
         print(AREA)
         print([(i.shape, i.min(), i.max()) for i in [AREA]])
-    # Convert to 2D array / apply to all longitudes
-    AREA = np.array([list(AREA)] * int(lon_dim))
     return AREA
 
 
@@ -1360,34 +1938,37 @@ def get_gc_datetime(wd=None, spec='O3', cat='IJ-AVG-$',
     if not os.path.isfile(fname):
         from .bpch2netCDF import convert_to_netCDF
         convert_to_netCDF(wd)
-    # "open" NetCDF + extract time
-    with Dataset(fname, 'r') as rootgrp:
+    # "open" NetCDF (via shared handle pool) + extract time
+    rootgrp = get_NetCDF_handle(fname)
+    try:
         dates = rootgrp['time']
         unit_str = str(dates.units)
         if verbose:
             print((dates, dates.units, unit_str))
-        # Get units from cube, default is 'hours since 1985-01-01 00:00:00'
-        if 'hours since' in unit_str:
-            if isinstance(date_str, type(None)):
-                date_str = 'hours since %Y-%m-%d %H:%M:%S'
-            time_unit = 'hours'
-        elif 'minutes since' in unit_str:
-            if isinstance(date_str, type(None)):
-                date_str = 'minutes since %Y-%m-%d %H:%M:%S'
-            time_unit = 'minutes'
-        elif 'days since' in unit_str:
-            if isinstance(date_str, type(None)):
-                date_str = 'days since %Y-%m-%d %H:%M:%S'
-            time_unit = 'days'
-        else:
-            err_str = 'WARNING: time unit not setup: {}'.format(unit_str)
-            print(err_str)
-            logging.info(err_str)
-            sys.exit()
-        # calculate start time
-        starttime = time.strptime(unit_str, date_str)
-        starttime = time2datetime([starttime])[0]
         dates = np.array(dates)
+    finally:
+        release_NetCDF_handle(rootgrp)
+    # Get units from cube, default is 'hours since 1985-01-01 00:00:00'
+    if 'hours since' in unit_str:
+        if isinstance(date_str, type(None)):
+            date_str = 'hours since %Y-%m-%d %H:%M:%S'
+        time_unit = 'hours'
+    elif 'minutes since' in unit_str:
+        if isinstance(date_str, type(None)):
+            date_str = 'minutes since %Y-%m-%d %H:%M:%S'
+        time_unit = 'minutes'
+    elif 'days since' in unit_str:
+        if isinstance(date_str, type(None)):
+            date_str = 'days since %Y-%m-%d %H:%M:%S'
+        time_unit = 'days'
+    else:
+        err_str = 'WARNING: time unit not setup: {}'.format(unit_str)
+        print(err_str)
+        logging.info(err_str)
+        sys.exit()
+    # calculate start time
+    starttime = time.strptime(unit_str, date_str)
+    starttime = time2datetime([starttime])[0]
     logging.info('file start date: {}'.format(starttime))
     # allow for single date output <= is there a better gotcha than this?
     if len(dates.shape) == 0:
@@ -1569,7 +2150,7 @@ def get_CH4_lifetime(wd=None, res='4x5',
     Parameters
     -------
     trop_limit (boolean): limit 4D arrays to troposphere
-    wd (str): the directory to search for file CTM output file in
+    wd (str or RunContext): the directory to search for file CTM output file in
     vol (array): volumne contained in each grid box (cm^-3)
     years, months (list): list of years and months in model output file
     res (str): GEOS-Chem output configuration resolution ( '4x5' etc... )
@@ -1614,6 +2195,13 @@ def get_CH4_lifetime(wd=None, res='4x5',
     if debug:
         print(('get_CH4_lifetime called ( using time in trop diag?={})'.format(
             use_time_in_trop)))
+    # --- Use fields of a RunContext (if given in place of wd)
+    if isinstance(wd, RunContext):
+        vol, a_m, t_ps = wd.get_fields(trop_limit=trop_limit, vol=vol,
+                                       a_m=a_m, t_ps=t_ps)
+        if not use_time_in_trop:
+            n_air, = wd.get_fields(trop_limit=trop_limit, n_air=n_air)
+        wd = wd.wd
     # --- Get shared variables that are not provided
     if not isinstance(vol, np.ndarray):  # cm^3
         vol = get_volume_np(wd=wd, trop_limit=trop_limit)
@@ -1824,8 +2412,30 @@ def species_v_v_to_Gg(arr, spec, a_m=None, Iodine=True, All=False,
 # ----
 def get_volume_np(box_height=None, s_area=None, res='4x5',
                   wd=None, trop_limit=False, debug=False):
-    """ Get grid box volumes for CTM output in cm3 """
+    """
+    Get grid box volumes for CTM output in cm3
+
+    Parameters
+    ----------
+    box_height (np.array): height of grid boxes (m)
+    s_area (np.array): surface area of grid boxes (m^2)
+    res (str): the resolution if wd not given (e.g. '4x5' )
+    wd (str or RunContext): Specify the wd to get the results from a run.
+    trop_limit (boolean): limit 4D arrays to troposphere
+    debug (boolean): legacy debug option, replaced by python logging
+
+    Returns
+    -------
+    (np.array)
+    """
     logging.info('get_volume_np called for res={}'.format(res))
+    # Use fields of a RunContext (if given in place of wd)
+    if isinstance(wd, RunContext):
+        if not any([isinstance(i, np.ndarray) for i in (box_height, s_area)]):
+            return wd.for_trop_limit(trop_limit).vol
+        if not isinstance(s_area, np.ndarray):
+            s_area = wd.s_area[..., None]
+        res, wd = wd.res, wd.wd
     if not isinstance(box_height, np.ndarray):
         try:
             box_height = get_GC_output(wd=wd, vars=['BXHGHT_S__BXHEIGHT'],
@@ -1862,19 +2472,10 @@ def loc_is_water_grid_box(lat, lon, res='4x5'):
     # Load masked array, where all ocean is non-masked
     # ( Just look over oceans (use masked array) )
     o_mask = np.ma.equal(get_land_map(res=res)[..., 0], 0)
-    # Loop Lat and Lon
-    for n, l in enumerate(lat):
-        glat, glon = get_gc_lat(l), get_gc_lon(lon[n])
-        # check aagainst mask and store as boolean
-        if o_mask[glon, glat]:
-            bool = 'F'
-        else:
-            bool = 'T'
-        try:
-            booll.append(bool)
-        except:
-            booll = [bool]
-    return booll
+    # Get the grid boxes containing all locations at once
+    glon, glat = get_gridbox_indices(lon, lat, res=res)
+    # check against mask and store as boolean
+    return ['F' if i else 'T' for i in np.ma.filled(o_mask[glon, glat], False)]
 
 
 def spec_dep(wd=None, spec='O3', s_area=None, months=None,
@@ -2205,6 +2806,7 @@ def molec_weighted_avg(arr, wd=None, vol=None, t_p=None,
     Parameters
     -------
     weight_lat, weight_lon (boolean): weight over latitude or longitude
+    wd (str or RunContext): Specify the wd to get the results from a run.
     annual_mean (boolean): average the time axis?
     n_air (array): number desnity of air
     molecs (array): number of molecules in air
@@ -2234,23 +2836,39 @@ def molec_weighted_avg(arr, wd=None, vol=None, t_p=None,
     """
     logging.info(
         'molec_weighted_avg called for arr.shape={}'.format(arr.shape))
+    # Use fields of a RunContext (if given in place of wd)
+    ctx = None
+    if isinstance(wd, RunContext):
+        ctx, wd = wd.for_trop_limit(trop_limit), wd.wd
     if isinstance(molecs, type(None)):
-        if not isinstance(n_air, np.ndarray):  # [molec air/m3]
-            n_air = get_number_density_variable(wd=wd, trop_limit=trop_limit)
-        if not isinstance(vol, np.ndarray):
-            vol = get_volume_np(wd=wd, res=res,
-                                trop_limit=trop_limit)
-            vol = vol / 1E6  # [cm^3 ]
-        # Calculate molecules per grid box
-        molecs = n_air * vol  # [molec air]
+        if not isinstance(ctx, type(None)) and \
+                not any([isinstance(i, np.ndarray) for i in (n_air, vol)]):
+            molecs = ctx.molecs  # [molec air]
+        else:
+            if not isinstance(n_air, np.ndarray):  # [molec air/m3]
+                n_air = get_number_density_variable(wd=wd,
+                                                    trop_limit=trop_limit)
+            if not isinstance(vol, np.ndarray):
+                vol = get_volume_np(wd=wd, res=res,
+                                    trop_limit=trop_limit)
+                vol = vol / 1E6  # [cm^3 ]
+            # Calculate molecules per grid box
+            molecs = n_air * vol  # [molec air]
         if annual_mean:
             molecs = molecs.mean(axis=-1)
     # Limit for troposphere?
     if trop_limit:
         # Get species time Tropopause diagnostic
         if isinstance(t_p, type(None)) and rm_strat:
-            t_p = get_GC_output(wd=wd, vars=['TIME_TPS__TIMETROP'],
-                                trop_limit=trop_limit)
+            if isinstance(ctx, type(None)):
+                t_p = get_GC_output(wd=wd, vars=['TIME_TPS__TIMETROP'],
+                                    trop_limit=trop_limit)
+            else:
+                t_p = ctx.t_ps
+            # Weight whole array to give single number (without masked copies)
+            if not (weight_lon or weight_lat):
+                return get_trop_weighted_avg(arr, molecs, t_ps=t_p,
+                                             multiply_method=multiply_method)
             # Mask for troposphere
             arr, molecs = mask4troposphere([arr, molecs], t_ps=t_p, res=res,
                                            use_time_in_trop=True,
@@ -2274,6 +2892,114 @@ def molec_weighted_avg(arr, wd=None, vol=None, t_p=None,
         return (arr * molecs).sum()/molecs.sum()
 
 
+def get_trop_weighted_avg(arr, weights, t_ps=None, t_lvl=None,
+                          use_time_in_trop=True, multiply_method=False,
+                          masks4stratosphere=False, rtn_sums=False):
+    """
+    Get weighted average of an array in the troposphere, one time step at a
+    time (without masked copies of arrays)
+
+    Parameters
+    ----------
+    arr (array): array of values (lon, lat, alt, time) or (lon, lat, alt). np.ma
+        masked values are ignored.
+    weights (array): weights (e.g. molecules or air mass) with shape of arr
+    t_ps (array): fraction of time grid boxes were in the troposphere (lon,
+        lat, alt, time). If t_ps and t_lvl are None, all boxes are used.
+    t_lvl (array): tropopause level (lon, lat, time) (used if
+        use_time_in_trop=False)
+    use_time_in_trop (boolean): use t_ps to define the troposphere, rather
+        than the tropopause level (t_lvl)
+    multiply_method (boolean): multiply by the time in the troposphere,
+        rather than only using boxes that are always tropospheric
+    masks4stratosphere (boolean): average over the stratosphere instead
+    rtn_sums (boolean): return the weighted sum and the sum of weights
+
+    Returns
+    -------
+    (float) or (tuple) of (float, float) if rtn_sums=True
+
+    Notes
+    -----
+     - Gives the same values as masking arr and weights with mask4troposphere
+     then (arr*weights).sum()/weights.sum() (as in molec_weighted_avg). For
+     arrays without a time dimension, t_ps is averaged over time
+     (multiply_method=True) or boxes that are ever tropospheric are used.
+     - Only arrays for one time step are made, and sums are in float64.
+     - With multiply_method=True, both arr and weights are multiplied by t_ps
+     (as in mask4troposphere), so the sum of arr is weighted by t_ps**2.
+    """
+    has_time = (np.ndim(arr) == 4)
+    data, amask = np.ma.getdata(arr), np.ma.getmask(arr)
+    weights = np.ma.getdata(weights)
+    if (not use_time_in_trop) and isinstance(t_lvl, type(None)):
+        err_msg = 't_lvl needed to use tropopause level'
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    if (not use_time_in_trop) and (not has_time):
+        err_msg = 'Arrays need a time dimension to use tropopause level'
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    if not isinstance(t_ps, type(None)):
+        t_ps = np.ma.getdata(t_ps)
+
+    def _get_trop(t):
+        """ Get weights (for values and for weights) of troposphere """
+        if multiply_method:
+            if masks4stratosphere:
+                t = 1 - t
+            return t*t, t
+        if masks4stratosphere:
+            trop = (t == 0)
+        else:
+            trop = (t == 1)
+        return trop, trop
+    # Without time, use the time averaged (or ever) tropospheric boxes
+    if use_time_in_trop and (not has_time) and \
+            (not isinstance(t_ps, type(None))) and (t_ps.ndim == 4):
+        if multiply_method:
+            t_mean = np.zeros(t_ps.shape[:-1])
+            for n in range(t_ps.shape[-1]):
+                t_mean += t_ps[..., n]
+            t_ps = t_mean / t_ps.shape[-1]
+        else:
+            ever = np.zeros(t_ps.shape[:-1], dtype=bool)
+            for n in range(t_ps.shape[-1]):
+                ever |= _get_trop(t_ps[..., n])[0]
+            # ( 1 = always tropospheric, 0 = always stratospheric )
+            t_ps = ever.astype(np.float64)
+            if masks4stratosphere:
+                t_ps = 1 - t_ps
+    # Sum each time step (or whole array if no time dimension)
+    slices = [Ellipsis]
+    if has_time:
+        slices = [(Ellipsis, n) for n in range(data.shape[-1])]
+    levels = np.arange(1, data.shape[-2]+1)[None, None, :]
+    wsum, sum_w = 0., 0.
+    for ind in slices:
+        w = weights[ind]
+        if use_time_in_trop and isinstance(t_ps, type(None)):
+            g_arr = g_w = np.ones(w.shape)
+        elif use_time_in_trop:
+            g_arr, g_w = _get_trop(t_ps[ind])
+        else:
+            if masks4stratosphere:
+                trop = levels >= t_lvl[ind][:, :, None]
+            else:
+                trop = levels <= t_lvl[ind][:, :, None]
+            g_arr = g_w = np.broadcast_to(trop, w.shape)
+        if amask is not np.ma.nomask:
+            g_arr = g_arr * ~amask[ind]
+            g_w = g_w * ~amask[ind]
+        wsum += np.einsum('ijk,ijk,ijk->', data[ind], w,
+                          np.asarray(g_arr, dtype=np.float64))
+        sum_w += np.einsum('ijk,ijk->', w,
+                           np.asarray(g_w, dtype=np.float64))
+    if rtn_sums:
+        return wsum, sum_w
+    return wsum / sum_w
+
+
 def get_number_density_variable(wd=None, trop_limit=True):
     """ Get number density variable from GEOS-Chem output NetCDF """
     try:
@@ -2490,6 +3216,19 @@ def prt_seaonal_values(arr=None, res='4x5', area_weight=True, zonal=False,
         if debug:
             print(([i.shape for i in ars], s_area.shape,
                    [type(i) for i in (ars, ars[0],  s_area)]))
+        # --- Get values for all seasons at once (see get_regional_stats)
+        stats = ['min', 'max', 'p5', 'p95', 'mean', 'median']
+        mask = np.ones(ars[0].shape, dtype=bool)
+        df = get_regional_stats(ars, [mask], specs=seasons, regions=[region],
+                                stats=stats, time_axis=None)
+        df = df.pivot(index='species', columns='stat', values='value')
+        # Also get area weighted mean ( for surface values )
+        df["wtg'd Mean"] = np.nan
+        if not zonal:
+            wdf = get_regional_stats(ars, [mask], specs=seasons,
+                                     regions=[region], weights=s_area,
+                                     stats=['mean'], time_axis=None)
+            df["wtg'd Mean"] = wdf.set_index('species')['value']
         # --- Print out
         header = [
             'Season./Month', 'Min', 'Max', '5th', '95th', 'Mean', 'Median',
@@ -2500,15 +3239,7 @@ def prt_seaonal_values(arr=None, res='4x5', area_weight=True, zonal=False,
         print((pstr.format(*header)))
         for n, s in enumerate(seasons):
             # Get vars for printing
-            vars = [
-                (float(i.min()), float(i.max()),
-                 float(np.percentile(i.compressed(), 5)),
-                 float(np.percentile(i.compressed(), 95)),
-                 float(i.mean()),
-                 float(np.median(i.compressed())),
-                 float((i*s_area).sum()/s_area.sum()))
-                for i in [ars[n]]
-            ][0]
+            vars = [float(i) for i in df.loc[s, stats+["wtg'd Mean"]]]
             # Print vars
             print((npstr.format(s,  *vars)))
 
@@ -3284,10 +4015,17 @@ def get_LOC_df_from_NetCDF(site=None, spec='O3', wd=None, res=None,
             sys.exit()
     # Find index for grid box.
     if any([isinstance(i, type(None)) for i in (LON_ind, LAT_ind)]):
-        LON_ind = get_gc_lon(LON, res=res, wd=wd, filename=filename)
-        LAT_ind = get_gc_lat(LAT, res=res, wd=wd, filename=filename)
-    # Extract data for location
-    with Dataset(wd+'/'+filename, 'r') as rootgrp:
+        LON_ind, LAT_ind = get_gridbox_indices(LON, LAT, res=res, wd=wd,
+                                               filename=filename)
+        LON_ind, LAT_ind = LON_ind[0], LAT_ind[0]
+        if (LON_ind < 0) or (LAT_ind < 0):
+            err_msg = 'Location ({}, {}) not in grid of {}'.format(LON, LAT,
+                                                                 filename)
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+    # Extract data for location (via shared handle pool)
+    rootgrp = get_NetCDF_handle(wd+'/'+filename)
+    try:
         data = rootgrp['IJ_AVG_S__'+spec]
         if verbose:
             print(('Extracted data:', data))
@@ -3308,6 +4046,8 @@ def get_LOC_df_from_NetCDF(site=None, spec='O3', wd=None, res=None,
             units = rootgrp['IJ_AVG_S__'+spec].cf_units
         except:
             units = 'UNITS NOT IN FILE'
+    finally:
+        release_NetCDF_handle(rootgrp)
 
     # Extract dates in NetCDF
     dates = get_gc_datetime(filename=filename, wd=wd)
@@ -3330,6 +4070,7 @@ def convert_v_v_2_molec_cm3(arr=None, wd=None, vol=None, a_m=None,
     Parameters
     ----------
     arr (array): arrray input
+    wd (str or RunContext): Specify the wd to get the results from a run.
     a_m (array): array of air mass
     mols (array): array of molecule number density
     trop_limit (boolean): limit output to "chemical troposphere" (level 38 )
@@ -3345,6 +4086,12 @@ def convert_v_v_2_molec_cm3(arr=None, wd=None, vol=None, a_m=None,
     arguements or are extracted online (from provided wd )
     """
     logging.info('convert_v_v_2_molec_cm3 called for res={}'.format(res))
+    # Use fields of a RunContext (if given in place of wd)
+    if isinstance(wd, RunContext) and explicitly_caculate:
+        vol, = wd.get_fields(trop_limit=trop_limit, vol=vol)
+        if not isinstance(mols, np.ndarray):
+            a_m, = wd.get_fields(trop_limit=trop_limit, a_m=a_m)
+        wd = wd.wd
     if explicitly_caculate:
         # Get volume ( cm^3  )
         if not isinstance(vol, np.ndarray):
@@ -3437,6 +4184,156 @@ def convert_molec_cm3_2_v_v(arr=None, wd=None, vol=None, a_m=None,
     return arr
 
 
+# Units that convert_specs_units can convert from v/v to, with the variable
+# of air that is needed (if any), the scaling and if species mass is used
+_v_v_2_units = {
+    'v/v': (None, 1., False),
+    'ppbv': (None, 1E9, False),
+    'pptv': (None, 1E12, False),
+    'molec/cm3': ('n_air', 1., False),
+    'ng/m3': ('n_air', 1E15, True),  # (mol/cm3 => g/m3 => ng/m3)
+    'ug/m3': ('n_air', 1E12, True),  # (mol/cm3 => g/m3 => ug/m3)
+    'Gg': ('mols', 1E-9, True),
+}
+# Molar masses of lists of species (see _get_species_masses)
+_species_masses_cache = {}
+
+
+def convert_specs_units(arrs, specs, units='molec/cm3', from_units='v/v',
+                        wd=None, a_m=None, vol=None, press=None, T=None,
+                        Iodine=False, trop_limit=True, explicitly_caculate=True,
+                        out=None):
+    """
+    Convert units of a stacked array of species in one pass
+
+    Parameters
+    ----------
+    arrs (array): array of species (spec, lon, lat, alt, time) or any array
+        with species as the first dimension
+    specs (list): species/tracer/variable names of the first dimension
+    units (str): units to convert to ('v/v', 'ppbv', 'pptv', 'molec/cm3',
+        'ng/m3', 'ug/m3' or 'Gg' (mass in each grid box))
+    from_units (str): units of arrs ('v/v' or 'molec/cm3')
+    wd (str or RunContext): Specify the wd to get the results from a run.
+    a_m (array): array of air mass (kg)
+    vol (array): volume contained in each grid box (cm^3)
+    press (array): pressure (hPa) to calculate air density with T
+    T (array): temperature (K) to calculate air density with press
+    Iodine (boolean): give mass units as mass of iodine
+    trop_limit (boolean): limit output to "chemical troposphere" (level 38 )
+    explicitly_caculate (boolean): get air density from air mass and volume
+        (if False, and press and T are not given, use a standard air density)
+    out (array): array to write the output into (can be arrs, to convert in
+        place)
+
+    Returns
+    -------
+    (array)
+
+    Notes
+    -----
+     - The conversion is split into a factor for each grid box (e.g. number
+     density of air) and one for each species (e.g. molar mass), which are
+     applied together to the stacked array with a single np.einsum. So only
+     one pass is made over the array, however many species there are.
+     - Air mass and volume are only extracted (from wd) if needed.
+    """
+    logging.info('convert_specs_units called for {} to {}'.format(
+        from_units, units))
+    for unit in (units, from_units):
+        if unit not in _v_v_2_units:
+            err_msg = 'Units not recognised: {} (use {})'.format(
+                unit, sorted(_v_v_2_units))
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+    if from_units not in ('v/v', 'molec/cm3'):
+        err_msg = 'Conversion from {} not setup'.format(from_units)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    # Use fields of a RunContext (if given in place of wd)
+    if isinstance(wd, RunContext):
+        ctx, wd = wd.for_trop_limit(trop_limit), wd.wd
+    else:
+        ctx = None
+
+    def _get_air(var):
+        """ Get air variable (number density or moles) for each grid box """
+        a_m_, vol_ = a_m, vol
+        if not isinstance(ctx, type(None)):
+            a_m_, = ctx.get_fields(a_m=a_m_)
+        if not isinstance(a_m_, np.ndarray) and \
+                (explicitly_caculate or (var == 'mols')):
+            a_m_ = get_air_mass_np(wd=wd, trop_limit=trop_limit)
+        # Moles of air in grid box
+        if var == 'mols':
+            return a_m_*1E3 / constants('RMM_air')
+        # Number density of air (molec/cm3)
+        if not isinstance(press, type(None)) and \
+                not isinstance(T, type(None)):
+            # Use the ideal gas law to calculate air density (g/cm3)
+            AIRDEN = (press*100) / (constants('Rdry')*1000 * T)
+            return AIRDEN / constants('RMM_air') * constants('AVG')
+        elif explicitly_caculate:
+            if not isinstance(ctx, type(None)):
+                vol_, = ctx.get_fields(vol=vol_)
+            if not isinstance(vol_, np.ndarray):
+                vol_ = get_volume_np(wd=wd, trop_limit=trop_limit)
+            return a_m_*1E3 / constants('RMM_air') * constants('AVG') / vol_
+        else:
+            # Assume standard air density (g/cm3, see convert_v_v_2_molec_cm3)
+            AIRDEN = 0.001225
+            return AIRDEN / constants('RMM_air') * constants('AVG')
+    # Factors for each grid box and each species (from_units => v/v => units)
+    air_var, scale, use_mass = _v_v_2_units[units]
+    box = 1.
+    if not isinstance(air_var, type(None)):
+        box = _get_air(air_var)
+        if use_mass and (air_var == 'n_air'):
+            # molec/cm3 => mol/cm3
+            scale = scale / constants('AVG')
+    if from_units == 'molec/cm3':
+        box = box / _get_air('n_air')
+    spec_factors = np.full(len(specs), scale, dtype=np.float64)
+    if use_mass:
+        spec_factors *= _get_species_masses(specs, Iodine=Iodine)
+    # Apply factors to array
+    arrs = np.asanyarray(arrs)
+    spec_factors = spec_factors.reshape((-1,) + (1,)*(arrs.ndim-1))
+    box = np.asanyarray(box)
+    if box.ndim == 0:
+        return np.multiply(arrs, spec_factors*box, out=out)
+    if isinstance(arrs, np.ma.MaskedArray) or \
+            isinstance(box, np.ma.MaskedArray):
+        # ( np.einsum does not keep masks )
+        out = np.multiply(arrs, spec_factors, out=out)
+        return np.multiply(out, box, out=out)
+    subs = 'abcdefghijklmnopqrstuvwxyz'[:arrs.ndim-1]
+    subs = 'S{0},{1},S->S{0}'.format(subs, subs[len(subs)-box.ndim:])
+    box = np.broadcast_to(box, arrs.shape[arrs.ndim-box.ndim:])
+    # ( 'same_kind' allows out to be a float32 array, as for np.multiply )
+    return np.einsum(subs, arrs, box, spec_factors.ravel(), out=out,
+                     casting='same_kind')
+
+
+def _get_species_masses(specs, Iodine=False):
+    """
+    Get (cached) array of molar masses (g/mol) for species (or of iodine)
+    """
+    key = (tuple(specs), Iodine)
+    try:
+        return _species_masses_cache[key]
+    except KeyError:
+        pass
+    if Iodine:
+        masses = [float(species_mass('I')) * spec_stoich(i) for i in specs]
+    else:
+        masses = [float(species_mass(i)) for i in specs]
+    masses = np.array(masses, dtype=np.float64)
+    masses.setflags(write=False)
+    _species_masses_cache[key] = masses
+    return masses
+
+
 def mask4troposphere(ars=[], wd=None, t_ps=None, trop_limit=False,
                      t_lvl=None, masks4stratosphere=False, use_time_in_trop=True,
                      multiply_method=True, res='4x5', debug=False):
@@ -3662,6 +4559,12 @@ def prt_2D_vals_by_region(specs=None, res='4x5', arrs=None, prt_pcent=False,
                           debug=False):
     """
     Print values of a 2D (lon, lat) arry masked for regions
+
+    Notes
+    -----
+     - With summate=False, regional values are the regional sums divided by
+     the number of grid boxes in the whole array (i.e. averages over the whole
+     grid with other regions set to zero), not averages over just the region.
     """
     # Which regions?
     m_titles = ['Tropics', 'Mid lats', 'Extratropics', 'Oceanic', 'NH', 'SH']
@@ -3681,13 +4584,18 @@ def prt_2D_vals_by_region(specs=None, res='4x5', arrs=None, prt_pcent=False,
     arrsn = ['Species', 'Total'] + m_titles
     print((m_titles, arrsn))
     print((pstr.format(*arrsn)))
+    # Get values for all species and regions at once (see get_regional_stats)
+    df = get_regional_stats(arrs, masks, specs=list(range(len(specs))),
+                            regions=m_titles, stats=['sum'], time_axis=None)
+    df = df.pivot(index='species', columns='region', values='value')
     for n, s in enumerate(specs):
         if summate:
             vars = [s, np.ma.sum(arrs[n])]
-            vars += [np.ma.sum(arrs[n]*m) for m in masks]
+            vars += list(df.loc[n, m_titles].values)
         else:
+            # ( regional sums averaged over the whole grid, as np.ma.mean(arr*m) )
             vars = [s, np.ma.mean(arrs[n])]
-            vars += [np.ma.mean(arrs[n]*m) for m in masks]
+            vars += list(df.loc[n, m_titles].values / np.ma.count(arrs[n]))
         print((pstrn.format(*vars)))
     # --- Print out percent values
     if prt_pcent:
@@ -3703,12 +4611,16 @@ def prt_2D_vals_by_region(specs=None, res='4x5', arrs=None, prt_pcent=False,
         pstr = '{:<25}'+'{:<15}'*(len(arrsn)-1)
         pstrn = '{:<25}' + '{:<15,.3f}'*(len(arrsn)-1)
         print((pstr.format(*arrsn)))
-        # loop maskes and print
+        # Get regional totals, then loop maskes and print
+        df = get_regional_stats(s_arrs, masks, specs=list(range(len(specs))),
+                                regions=m_titles, stats=['sum'],
+                                time_axis=None)
+        df = df.pivot(index='species', columns='region', values='value')
         vars_l = []
         for n, s in enumerate(specs):
             vars = [s, np.ma.sum(arrs[n]), np.ma.sum(s_arrs[n])]
-            vars += [np.ma.sum(s_arrs[n]*m)/np.ma.sum(s_arrs[n])*100
-                     for m in masks]
+            vars += list(df.loc[n, m_titles].values /
+                         np.ma.sum(s_arrs[n])*100)
             vars_l += [vars]
             print((pstrn.format(*vars)))
         # --- Convert to DataFrame, then save to csv
@@ -3764,8 +4676,8 @@ def get_avg_surface_conc_of_X(spec='O3', wd=None, s_area=None, res='4x5'):
     -------
     (float)
     """
-    # Get species concentration in v/v
-    arr = get_GC_output(vars=['IJ_AVG_S__'+spec], wd=wd)[:, :, 0]
+    # Get species concentration in v/v (just reading the surface level)
+    arr = get_GC_output(vars=['IJ_AVG_S__'+spec], wd=wd, lev_slice=0)[:, :, 0]
     # Average over time
     arr = arr.mean(axis=-1)
     # Get surface area if not provided
@@ -3787,13 +4699,15 @@ def get_avg_trop_conc_of_X(spec='O3', wd=None, s_area=None, res='4x5',
     ----------
     s_area (array): array of areas of grid boxes (could be any variable)
     spec (str): species/tracer/variable name
+    wd (str or RunContext): Specify the wd to get the results from a run.
 
     Returns
     -------
     (float)
     """
     # Get species concentration in v/v
-    arr = get_GC_output(vars=['IJ_AVG_S__'+spec], wd=wd, trop_limit=trop_limit)
+    arr = get_GC_output(vars=['IJ_AVG_S__'+spec], trop_limit=trop_limit,
+                        wd=getattr(wd, 'wd', wd))
     # convert units if 'units' argument != 'v/v'
     if units == 'v/v':
         pass
@@ -3873,6 +4787,161 @@ def get_default_variable_dict(wd=None,
     return Var_rc
 
 
+class RunContext(object):
+    """
+    Common fields of a GEOS-Chem run directory, each loaded once when first used
+
+    Parameters
+    ----------
+    wd (str): Specify the wd to get the results from a run.
+    filename (str): name of the NetCDF file in wd (e.g. 'ctm.nc')
+    trop_limit (boolean): limit 4D arrays to troposphere
+    res (str): the resolution (default: taken from the NetCDF file)
+
+    Attributes
+    ----------
+    res (str): resolution of the model output (e.g. '4x5')
+    datetimes (list): dates of the model output
+    a_m (np.array): air mass (kg)
+    t_ps (np.array): fraction of time grid boxes were in the troposphere
+    s_area (np.array): surface area of grid boxes (m^2)
+    vol (np.array): volume of grid boxes (cm^3)
+    n_air (np.array): number density of air (molec air/m^3)
+    molecs (np.array): molecules of air in grid boxes (molec air)
+
+    Notes
+    -----
+     - Pass a RunContext in place of wd to functions that use these fields
+     (e.g. get_trop_burden, get_O3_burden, molec_weighted_avg,
+     get_CH4_lifetime, convert_v_v_2_molec_cm3, get_volume_np and
+     get_avg_trop_conc_of_X), so they are not re-read from disk on each call.
+     Arrays given to these functions are still used instead.
+     - Fields are extracted with the trop_limit of the RunContext. Functions
+     called with a different trop_limit use fields for that trop_limit (see
+     for_trop_limit), which are loaded and cached separately.
+     - Arrays of fields are read-only (copy before changing in place).
+     - Fields that depend on other fields (e.g. vol on s_area) use the
+     RunContext's (cached) fields.
+    """
+
+    def __init__(self, wd, filename='ctm.nc', trop_limit=True, res=None):
+        self.wd = wd
+        self.filename = filename
+        self.trop_limit = trop_limit
+        self._fields = {}
+        # RunContexts of the same run for other values of trop_limit
+        self._contexts = {}
+        if not isinstance(res, type(None)):
+            self._fields['res'] = res
+
+    def __repr__(self):
+        return 'RunContext(wd={!r}, trop_limit={}, loaded={})'.format(
+            self.wd, self.trop_limit, sorted(self._fields))
+
+    def _get_field(self, name, func):
+        """ Get a field, calculating and caching it if not already loaded """
+        if name not in self._fields:
+            logging.info('RunContext loading {} for {}'.format(name, self.wd))
+            field = func()
+            # Fields are shared, so make arrays read-only
+            if isinstance(field, np.ndarray):
+                field.setflags(write=False)
+            self._fields[name] = field
+        return self._fields[name]
+
+    def for_trop_limit(self, trop_limit):
+        """
+        Get the RunContext of the run for a given trop_limit
+
+        Parameters
+        ----------
+        trop_limit (boolean): limit 4D arrays to troposphere
+
+        Returns
+        -------
+        (RunContext) this RunContext if trop_limit is the same, otherwise one
+        that is kept (and so loads its fields once) for that trop_limit
+        """
+        if trop_limit == self.trop_limit:
+            return self
+        if trop_limit not in self._contexts:
+            self._contexts[trop_limit] = RunContext(
+                self.wd, filename=self.filename, trop_limit=trop_limit,
+                res=self._fields.get('res', None))
+        return self._contexts[trop_limit]
+
+    def get_fields(self, trop_limit=None, **fields):
+        """
+        Get fields of the run for arguments that were not provided
+
+        Parameters
+        ----------
+        trop_limit (boolean): trop_limit of the function the fields are for
+            (by default, that of the RunContext)
+        fields: names of fields (e.g. a_m=a_m), with the values given to a
+            function (used instead of the field if they are arrays)
+
+        Returns
+        -------
+        (list) values of fields, in the order given
+        """
+        ctx = self
+        if not isinstance(trop_limit, type(None)):
+            ctx = self.for_trop_limit(trop_limit)
+        return [i if isinstance(i, np.ndarray) else getattr(ctx, name)
+                for name, i in fields.items()]
+
+    def clear(self):
+        """ Drop the loaded fields """
+        res = self._fields.get('res', None)
+        self._fields = {}
+        self._contexts = {}
+        if not isinstance(res, type(None)):
+            self._fields['res'] = res
+
+    @property
+    def res(self):
+        return self._get_field('res', lambda: get_gc_res(
+            wd=self.wd, filename=self.filename))
+
+    @property
+    def datetimes(self):
+        return self._get_field('datetimes', lambda: get_gc_datetime(
+            wd=self.wd, filename=self.filename))
+
+    @property
+    def a_m(self):
+        return self._get_field('a_m', lambda: get_air_mass_np(
+            wd=self.wd, trop_limit=self.trop_limit))
+
+    @property
+    def t_ps(self):
+        return self._get_field('t_ps', lambda: get_GC_output(
+            self.wd, vars=['TIME_TPS__TIMETROP'], trop_limit=self.trop_limit))
+
+    @property
+    def s_area(self):
+        return self._get_field('s_area', lambda: get_surface_area(
+            res=self.res))
+
+    @property
+    def vol(self):
+        return self._get_field('vol', lambda: get_volume_np(
+            wd=self.wd, s_area=self.s_area[..., None], res=self.res,
+            trop_limit=self.trop_limit))
+
+    @property
+    def n_air(self):
+        # ( restrict length of array to the main output )
+        return self._get_field('n_air', lambda: get_number_density_variable(
+            wd=self.wd, trop_limit=self.trop_limit)[..., :self.vol.shape[-1]])
+
+    @property
+    def molecs(self):
+        # ( vol is converted from cm^3 to m^3 )
+        return self._get_field('molecs', lambda: self.n_air*self.vol/1E6)
+
+
 def get_shared_data_as_dict(Var_rc=None, var_list=[],
                             full_vertical_grid=False, Data_rc={}):
     """
@@ -3889,6 +4958,11 @@ def get_shared_data_as_dict(Var_rc=None, var_list=[],
     Returns
     ----
     (dict)
+
+    Notes
+    -----
+     - RunContext gives the shared arrays (e.g. a_m, t_ps, vol, n_air, molecs
+     and s_area) as lazily loaded fields, that functions accept in place of wd
     """
     # Use default variable dictionary if non given
     if isinstance(Var_rc, type(None)):
@@ -4138,7 +5212,7 @@ def process_bpch_files_in_dir2NetCDF(bpch_file_type="*tra*avg*",
                                      split_by_month=False, mk_single_NetCDF_file=True,
                                      mk_monthly_NetCDF_files=False,
                                      mk_weekly_NetCDF_files=False,
-                                     verbose=True):
+                                     profile=None, verbose=True):
     """
     Wrapper function to process ctm bpch files in folder to NetCDF file(s)
 
@@ -4153,6 +5227,7 @@ def process_bpch_files_in_dir2NetCDF(bpch_file_type="*tra*avg*",
     split_by_month (boolean): split new NetCDF file by month? (post making file)
     mk_monthly_NetCDF_files (boolean): make a NetCDF per month of files
     mk_weekly_NetCDF_files (boolean): make a NetCDF per week of files
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
 
     Returns
     -------
@@ -4221,7 +5296,8 @@ def process_bpch_files_in_dir2NetCDF(bpch_file_type="*tra*avg*",
                     # Convert to NetCDF all files to a single NetCDF
                     convert_to_netCDF(folder=folder, filename=filename4month,
                                       bpch_file_list=bpch_file_list,
-                                      bpch_file_type=bpch_file_type)
+                                      bpch_file_type=bpch_file_type,
+                                      profile=profile)
         # Make files by week of year?
         elif mk_weekly_NetCDF_files:
             for year in list(sorted(set(df.index.year))):
@@ -4239,7 +5315,8 @@ def process_bpch_files_in_dir2NetCDF(bpch_file_type="*tra*avg*",
                     # Convert to NetCDF all files to a single NetCDF
                     convert_to_netCDF(folder=folder, filename=filename4month,
                                       bpch_file_list=bpch_file_list,
-                                      bpch_file_type=bpch_file_type)
+                                      bpch_file_type=bpch_file_type,
+                                      profile=profile)
         # Re-combine the split files into one file
         if mk_single_NetCDF_file:
             ncfiles = glob.glob(folder+'ts_ctm_*.nc')
@@ -4248,7 +5325,11 @@ def process_bpch_files_in_dir2NetCDF(bpch_file_type="*tra*avg*",
             # make sure the time dimension is unlimitetd
             ds = xr.concat(ds_l, dim='time')
             # now save the combined file
-            ds.to_netcdf(folder+filename,
+            encoding = None
+            if not isinstance(profile, type(None)):
+                from .bpch2netCDF import get_NetCDF_encoding4profile
+                encoding = get_NetCDF_encoding4profile(ds, profile=profile)
+            ds.to_netcdf(folder+filename, encoding=encoding,
                          unlimited_dims={'time_counter': True})
             # TODO: Now delete monthly files?
     # Convert files on bulk
@@ -4256,14 +5337,16 @@ def process_bpch_files_in_dir2NetCDF(bpch_file_type="*tra*avg*",
         print('WARNING - all files being convert to single NetCDF in one go!')
         # Convert to NetCDF all files to a single NetCDF
         convert_to_netCDF(folder=folder, filename=filename,
-                          bpch_file_list=filenames, bpch_file_type=bpch_file_type)
+                          bpch_file_list=filenames, bpch_file_type=bpch_file_type,
+                          profile=profile)
     else:
         print('Please specify whether to make a sinlge or multiple .nc files')
     # If split by month
     if split_by_month:
         print(('Splitting NetCDF file by month - {}'.format(folder+filename)))
         split_NetCDF_by_month(folder=folder, filename=filename,
-                              ext_str=ext_str, file_prefix=file_prefix)
+                              ext_str=ext_str, file_prefix=file_prefix,
+                              profile=profile)
         print(('Split NetCDF file by month - {}'.format(folder+filename)))
 
 
@@ -4574,25 +5657,28 @@ def get_general_stats4run_dict_as_df(run_dict=None, extra_str='', REF1=None,
     # ---- Now build analysis in pd.DataFrame
 
     # ---- Tropospheric burdens?
+    # Get tropospheric burdens for runs (for all species at once)
+    burden_specs = ['O3', 'NO2', 'NO', 'NIT', 'NITs', 'N2O5']
+    burdens = [get_trop_burdens(burden_specs, wd=i, t_p=t_p).mean(axis=-1)
+               for i in wds]
+    burdens = pd.DataFrame(burdens, columns=burden_specs, index=run_names)
     # Get tropospheric burden for run
     varname = 'O3 burden ({})'.format(mass_unit)
-    ars = [get_O3_burden(i, t_p=t_p).sum() for i in wds]
+    ars = burdens['O3'].values
     df = pd.DataFrame(ars, columns=[varname], index=run_names)
 
     # Get NO2 burden
     NO2_varname = 'NO2 burden ({})'.format(mass_unit)
-    ars = [get_trop_burden(spec='NO2', t_p=t_p, wd=i, all_data=False).sum()
-           for i in wds]
+    ars = burdens['NO2'].values
     # convert to N equivalent
-    ars = [i/species_mass('NO2')*species_mass('N') for i in ars]
+    ars = ars/species_mass('NO2')*species_mass('N')
     df[NO2_varname] = ars
 
     # Get NO burden
     NO_varname = 'NO burden ({})'.format(mass_unit)
-    ars = [get_trop_burden(spec='NO', t_p=t_p, wd=i, all_data=False).sum()
-           for i in wds]
+    ars = burdens['NO'].values
     # convert to N equivalent
-    ars = [i/species_mass('NO')*species_mass('N') for i in ars]
+    ars = ars/species_mass('NO')*species_mass('N')
     df[NO_varname] = ars
 
     # Combine NO and NO2 to get NOx burden
@@ -4601,18 +5687,16 @@ def get_general_stats4run_dict_as_df(run_dict=None, extra_str='', REF1=None,
 
     # Get NIT burden
     NIT_varname = 'NIT burden ({})'.format(mass_unit)
-    ars = [get_trop_burden(spec='NIT', t_p=t_p, wd=i, all_data=False).sum()
-           for i in wds]
+    ars = burdens['NIT'].values
     # convert to N equivalent
-    ars = [i/species_mass('NIT')*species_mass('N') for i in ars]
+    ars = ars/species_mass('NIT')*species_mass('N')
     df[NIT_varname] = ars
 
     # Get NITs burden
     NITs_varname = 'NITs burden ({})'.format(mass_unit)
-    ars = [get_trop_burden(spec='NITs', t_p=t_p, wd=i, all_data=False).sum()
-           for i in wds]
+    ars = burdens['NITs'].values
     # convert to N equivalent
-    ars = [i/species_mass('NITs')*species_mass('N') for i in ars]
+    ars = ars/species_mass('NITs')*species_mass('N')
     df[NITs_varname] = ars
 
     # sum NIT+NITs
@@ -4621,10 +5705,9 @@ def get_general_stats4run_dict_as_df(run_dict=None, extra_str='', REF1=None,
 
     # Get N2O5 burden
     NITs_varname = 'N2O5 burden ({})'.format(mass_unit)
-    ars = [get_trop_burden(spec='N2O5', t_p=t_p, wd=i,  all_data=False).sum()
-           for i in wds]
+    ars = burdens['N2O5'].values
     # convert to N equivalent
-    ars = [i/species_mass('N2O5')*species_mass('N') for i in ars]
+    ars = ars/species_mass('N2O5')*species_mass('N')
     df[NITs_varname] = ars
 
     # Scale units
@@ -4712,7 +5795,7 @@ def get_general_stats4run_dict_as_df(run_dict=None, extra_str='', REF1=None,
 def get_trop_burden(spec='O3', wd=None, a_m=None, t_p=None,
                     Iodine=False, all_data=True, total_atmos=False, res='4x5',
                     trop_limit=True, arr=None, 
-                    TimeInTropVar='TIME_TPS__TIMETROP',
+                    TimeInTropVar='TIME_TPS__TIMETROP', lazy=False,
                     debug=False):
     """
     Get Tropospheric burden for species ("spec")
@@ -4727,21 +5810,35 @@ def get_trop_burden(spec='O3', wd=None, a_m=None, t_p=None,
     trop_limit (boolean): limit 4D arrays to troposphere
     total_atmos (boolean): return whole atmosphere or just troposphere?
     spec (str): species/tracer/variable name
-    wd (str): Specify the wd to get the results from a run.
+    wd (str or RunContext): Specify the wd to get the results from a run.
     arr (np.array): array of v/v for species
+    lazy (boolean): extract variables not provided as lazily evaluated (dask)
+        arrays, so the returned burden is evaluated chunk by chunk
 
     Returns
     -------
-    (np.array) species burden in Gg
+    (np.array) species burden in Gg (a dask array if lazy=True)
+
+    Notes
+    -----
+     - With lazy=True, the burden returned is not yet computed, so reduce it
+     and then call .compute() (e.g. arr.sum().compute()).
     """
     logging.info('get_trop_burden called for {}'.format(spec))
+    # Use fields of a RunContext (if given in place of wd)
+    if isinstance(wd, RunContext):
+        a_m, t_p = wd.get_fields(trop_limit=trop_limit, a_m=a_m, t_ps=t_p)
+        wd = wd.wd
     # Get variables online if not provided
     if not isinstance(a_m, np.ndarray):
-        a_m = get_air_mass_np(wd=wd, trop_limit=trop_limit, debug=debug)
+        a_m = get_air_mass_np(wd=wd, trop_limit=trop_limit, lazy=lazy,
+                              debug=debug)
     if not isinstance(t_p, np.ndarray):
-        t_p = get_GC_output(wd, vars=[TimeInTropVar], trop_limit=trop_limit)
+        t_p = get_GC_output(wd, vars=[TimeInTropVar], trop_limit=trop_limit,
+                            lazy=lazy)
     if isinstance(arr, type(None)):
-        arr = get_GC_output(wd, vars=['IJ_AVG_S__' + spec], trop_limit=trop_limit)
+        arr = get_GC_output(wd, vars=['IJ_AVG_S__' + spec], trop_limit=trop_limit,
+                            lazy=lazy)
     logging.debug('Shape of arrays: ar={}, t_p={}, a_m={}'.format(
         *[i.shape for i in (arr, t_p, a_m)]))
     # v/v * (mass total of air (kg)/ 1E3 (converted kg to g)) = moles of tracer
@@ -4782,6 +5879,105 @@ def get_O3_burden(wd=None, spec='O3', a_m=None, t_p=None, O3_arr=None,
                            trop_limit=trop_limit, spec=spec, a_m=a_m, t_p=t_p, arr=O3_arr,
                            debug=debug)
 
+
+def get_trop_burdens(specs=['O3'], wd=None, a_m=None, t_p=None, arrs=None,
+                     Iodine=False, total_atmos=False, trop_limit=True,
+                     time_chunks=None, AirMassVar='BXHGHT_S__AD',
+                     TimeInTropVar='TIME_TPS__TIMETROP', debug=False):
+    """
+    Get Tropospheric burdens for many species ("specs") at once
+
+    Parameters
+    ----------
+    specs (list): species/tracer/variable names
+    wd (str or RunContext): Specify the wd to get the results from a run.
+    a_m (np.array): 4D array of air mass
+    t_p (np.array): fractional time a grid box has spent in tropospehre
+    arrs (np.array): 5D array of v/v for species (spec, lon, lat, alt, time)
+    Iodine (boolean): return burdens as mass of iodine
+    total_atmos (boolean): return whole atmosphere or just troposphere?
+    trop_limit (boolean): limit 4D arrays to troposphere
+    time_chunks (int): number of time steps to read and reduce at once (by
+        default all are read at once)
+    AirMassVar (str): variable name in NetCDF file for air mass
+    TimeInTropVar (str): variable name in NetCDF file for time in troposphere
+    debug (boolean): legacy debug option, replaced by python logging
+
+    Returns
+    -------
+    (np.array) species burdens in Gg with dimensions (spec, time)
+
+    Notes
+    -----
+     - Species are read as one stacked array and the weight of each grid box
+     (moles of air * time in troposphere) is calculated once for all species.
+     Burdens are then a single np.einsum of the mixing ratios and weights,
+     scaled by the molar mass of each species.
+     - With time_chunks set, arrays not provided are read that many time steps
+     at a time, so (e.g. 72 level) output larger than memory can be used.
+     - burdens.mean(axis=-1) is the same as
+     get_trop_burden(all_data=False).sum() for each species.
+    """
+    logging.info('get_trop_burdens called for {}'.format(specs))
+    # Use fields of a RunContext (if given in place of wd)
+    if isinstance(wd, RunContext):
+        if isinstance(time_chunks, type(None)):
+            a_m, = wd.get_fields(trop_limit=trop_limit, a_m=a_m)
+            if not total_atmos:
+                t_p, = wd.get_fields(trop_limit=trop_limit, t_ps=t_p)
+        wd = wd.wd
+    # Molar mass of each species (or of iodine in each species)
+    masses = _get_species_masses(specs, Iodine=Iodine)
+    # Read the arrays not provided (for a subset of times) and get burdens
+    def _get_burdens(time_slice=None):
+        tslice = slice(None)
+        if not isinstance(time_slice, type(None)):
+            tslice = time_slice
+        if isinstance(a_m, np.ndarray):
+            a_m_ = a_m[..., tslice]
+        else:
+            a_m_ = get_GC_output(wd, vars=[AirMassVar], trop_limit=trop_limit,
+                                 dtype=np.float64, time_slice=time_slice)
+        # Weight of grid boxes (moles of air in the troposphere)
+        weights = np.ma.filled(a_m_, 0) * (1E3 / constants('RMM_air'))
+        if not total_atmos:
+            if isinstance(t_p, np.ndarray):
+                t_p_ = t_p[..., tslice]
+            else:
+                t_p_ = get_GC_output(wd, vars=[TimeInTropVar],
+                                     trop_limit=trop_limit,
+                                     time_slice=time_slice)
+            weights = weights * np.ma.filled(t_p_, 0)
+        if isinstance(arrs, np.ndarray):
+            arrs_ = arrs[..., tslice]
+        else:
+            arrs_ = get_GC_output(wd, vars=['IJ_AVG_S__'+i for i in specs],
+                                  trop_limit=trop_limit,
+                                  time_slice=time_slice)
+            if len(specs) == 1:
+                arrs_ = arrs_[None, ...]
+        logging.debug('Shape of arrays: arrs={}, weights={}'.format(
+            arrs_.shape, weights.shape))
+        # v/v * moles of air * RMM = mass of species, then convert g to Gg
+        return np.einsum('sijkt,ijkt,s->st', np.ma.filled(arrs_, 0), weights,
+                         masses) / 1E9
+    if isinstance(time_chunks, type(None)):
+        burdens = _get_burdens()
+    else:
+        # Get number of time steps from provided arrays or the NetCDF
+        ntime = [i.shape[-1] for i in (arrs, a_m, t_p)
+                 if isinstance(i, np.ndarray)]
+        if len(ntime) == 0:
+            ntime = [len(get_gc_datetime(wd=wd))]
+        burdens = [_get_burdens(slice(i, i+time_chunks))
+                   for i in range(0, ntime[0], time_chunks)]
+        burdens = np.concatenate(burdens, axis=-1)
+    if total_atmos:
+        logging.info(
+            'get_trop_burdens returning whole atmosphere (not troposphere)')
+    return burdens
+
+
 # -------------- Smvgear input/output file Processing
 
 
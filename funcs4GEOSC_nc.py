@@ -74,6 +74,7 @@ def GetTropBurdenInGg( ds=None, spec=None, SpecVar=None, StateMet=None, wd=None,
         TropLevelVar='Met_TropLev', AirMassVar='Met_AD', AvgOverTime=False,
         SumSpatially=True, RmTroposphere=True, use_time_in_trop=False,
         TropMask=None, SpeciesConcPrefix='SpeciesConc_', TimeInTropVar='N/A',
+        time_chunk_size=1, n_workers=1,
         ):
     """
     Get Tropospheric burden for a/all species in dataset
@@ -86,6 +87,8 @@ def GetTropBurdenInGg( ds=None, spec=None, SpecVar=None, StateMet=None, wd=None,
     spec (str): Name of the species (optional)
     SpecVar (str):  Name of the species inc. Diagnostic prefix (optional)
     SpeciesConcPrefix (str): the diagnostic prefix for concentration
+    time_chunk_size (int): number of time steps to process at once
+    n_workers (int): number of processes to use for the time chunks
 
     Returns
     -------
@@ -95,10 +98,25 @@ def GetTropBurdenInGg( ds=None, spec=None, SpecVar=None, StateMet=None, wd=None,
     -----
      - A pandas dataframe is returned if values are requested to be summed spatially
      (e.g. SumSpatially=True), otherwise a dataset xr.dataset is returned.
+     - Totals (SumSpatially=True and AvgOverTime=False) are calculated by
+     GetTropBurdensInGg, which reads each time chunk once for all species.
     """
     # Only setup to take xarray datasets etc currently...
     assert type(StateMet) != None, 'Func. just setup to take StateMet currently'
     assert type(ds) == xr.Dataset, 'Func. just setup to take a xr.dataset currently'
+    # Sum all species for each time chunk in one pass
+    if SumSpatially and not AvgOverTime:
+        if not isinstance(spec, type(None) ) and isinstance(SpecVar, type(None) ):
+            SpecVar = SpeciesConcPrefix+spec
+        SpecVars = None
+        if not isinstance(SpecVar, type(None) ):
+            SpecVars = [SpecVar]
+        return GetTropBurdensInGg(ds=ds, StateMet=StateMet, SpecVars=SpecVars,
+                                  TropMask=TropMask, AirMassVar=AirMassVar,
+                                  RmTroposphere=RmTroposphere,
+                                  SpeciesConcPrefix=SpeciesConcPrefix,
+                                  time_chunk_size=time_chunk_size,
+                                  n_workers=n_workers)
     # Setup a dataset to process and return
     dsL = ds.copy()
     # Extract local variables
@@ -166,6 +184,135 @@ def GetTropBurdenInGg( ds=None, spec=None, SpecVar=None, StateMet=None, wd=None,
         return dsL
 
 
+def GetTropBurdensInGg( ds=None, StateMet=None, SpecVars=None, TropMask=None,
+                        AirMassVar='Met_AD', RmTroposphere=True,
+                        SpeciesConcPrefix='SpeciesConc_', time_chunk_size=1,
+                        n_workers=1, debug=False ):
+    """
+    Get total (tropospheric) burdens in Gg for all species, one time chunk at a time
+
+    Parameters
+    ----------
+    ds (dataset): Dataset object containing species concentrations (v/v)
+    StateMet (dataset): Dataset object containing air mass and pressures
+    SpecVars (list): species variables inc. diagnostic prefix (default: all)
+    TropMask (xr.DataArray): boolean array where stratosphere is False
+    AirMassVar (str): name of the air mass (kg) variable in StateMet
+    RmTroposphere (boolean): only include values where TropMask is True
+    SpeciesConcPrefix (str): the diagnostic prefix for concentration
+    time_chunk_size (int): number of time steps to process at once
+    n_workers (int): number of processes to use for the time chunks
+    debug (boolean): legacy debug option, replaced by python logging
+
+    Returns
+    -------
+    (pd.Series)
+
+    Notes
+    -----
+     - Air mass and the mask are read once per time chunk and applied to all
+     species in one vectorized step, so peak memory is bounded by a chunk of
+     all species (not a lazy graph per species).
+     - Sums are in float64 and NaNs are skipped (like xr.Dataset.sum).
+     - If TropMask is not provided, it is made for each time chunk by
+     Create4DMask4TropLevel.
+     - With n_workers > 1 the time chunks are summed by a pool of processes,
+     which inherit ds and StateMet (file backed datasets are read per process)
+    """
+    import multiprocessing
+    # Only setup to take xarray datasets etc currently...
+    assert type(ds) == xr.Dataset, 'Func. just setup to take a xr.dataset currently'
+    # only allow "SpeciesConc" species
+    if isinstance(SpecVars, type(None) ):
+        SpecVars = [i for i in ds.data_vars if 'SpeciesConc' in i]
+    MXUnits = 'mol mol-1 dry'
+    for SpecVar in SpecVars:
+        SpecUnits = ds[SpecVar].units
+        MixingRatioUnits = MXUnits == SpecUnits
+        assert_str = "Units must be in '{}' terms! (They are: '{}')"
+        assert MixingRatioUnits, assert_str.format(MXUnits, SpecUnits)
+    # Time chunks to sum over
+    if 'time' in ds[SpecVars[0]].dims:
+        time_slices = [slice(i, i+time_chunk_size)
+                       for i in range(0, ds.sizes['time'], time_chunk_size)]
+    else:
+        time_slices = [None]
+    logging.info('Summing {} species over {} time chunk(s)'.format(
+        len(SpecVars), len(time_slices)))
+    data = {
+        'ds': ds, 'StateMet': StateMet, 'SpecVars': SpecVars,
+        'TropMask': TropMask, 'AirMassVar': AirMassVar,
+        'RmTroposphere': RmTroposphere,
+    }
+    if (n_workers > 1) and (len(time_slices) > 1):
+        pool = multiprocessing.Pool(min(n_workers, len(time_slices)),
+                                    initializer=_set_trop_burden_worker_data,
+                                    initargs=(data,))
+        try:
+            sums = pool.map(_sum_trop_burden4time_chunk, time_slices)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        sums = [_sum_trop_burden4time_chunk(i, data=data) for i in time_slices]
+    # v/v * (mass total of air (kg)*1E3 (converted kg to g)) = moles of tracer
+    # then convert moles to mass (* RMM) , then to Gg
+    RMMs = [float(species_mass(i.replace(SpeciesConcPrefix, '')))
+            for i in SpecVars]
+    burdens = np.sum(sums, axis=0) * 1E3 / constants('RMM_air')
+    burdens *= np.array(RMMs) / 1E9
+    return pd.Series(burdens, index=pd.Index(SpecVars, name='variable'))
+
+
+# Datasets etc for the pool of processes in GetTropBurdensInGg
+_trop_burden_worker_data = {}
+
+
+def _set_trop_burden_worker_data(data):
+    """ Store the datasets to sum over in a GetTropBurdensInGg worker """
+    _trop_burden_worker_data.update(data)
+
+
+def _sum_trop_burden4time_chunk(time_slice, data=None):
+    """
+    Sum species mixing ratios (v/v) weighted by air mass (kg) for a time chunk
+
+    Parameters
+    ----------
+    time_slice (slice): time steps to sum over (None for all)
+    data (dict): datasets and settings (see GetTropBurdensInGg)
+
+    Returns
+    -------
+    (np.array)
+    """
+    if isinstance(data, type(None) ):
+        data = _trop_burden_worker_data
+    ds, StateMet = data['ds'], data['StateMet']
+    TropMask = data['TropMask']
+    if not isinstance(time_slice, type(None) ):
+        ds = ds.isel(time=time_slice)
+        StateMet = StateMet.isel(time=time_slice)
+        if isinstance(TropMask, xr.DataArray) and ('time' in TropMask.dims):
+            TropMask = TropMask.isel(time=time_slice)
+    # Read all species for the chunk at once: (species, ...)
+    specs = ds[data['SpecVars']].to_array()
+    dims = specs.dims[1:]
+    # Weight by air mass and (optionally) remove the stratosphere
+    weights = StateMet[data['AirMassVar']].astype(np.float64)
+    if data['RmTroposphere']:
+        if isinstance(TropMask, type(None) ):
+            TropMask = Create4DMask4TropLevel( StateMet=StateMet )
+        weights = weights.where(TropMask, 0)
+    weights = weights.broadcast_like(specs[0]).transpose(*dims).values
+    specs = specs.transpose('variable', *dims).values
+    n_specs = specs.shape[0]
+    # Skip NaNs (e.g. missing values)
+    specs = np.nan_to_num(specs.reshape(n_specs, -1), copy=False)
+    weights = np.nan_to_num(weights.ravel())
+    return np.dot(specs.astype(np.float64, copy=False), weights)
+
+
 def Create4DMask4TropLevel( StateMet=None,
                             TropLevelVar='Met_TropLev',
                             DynTropPressVar='Met_TropP',
@@ -0,0 +1,319 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Functions for reading GEOS-Chem binary punch (bpch2) files with NumPy.
+
+Use help(<name of function>) to get details on a particular function.
+
+Notes
+-----
+ - This reads bpch2 files directly (without PyGChem, iris or PseudoNetCDF).
+ The headers of the datablocks in a file are indexed in a single pass, then
+ only the blocks requested are read (via a memory map of the file).
+ - bpch2 files are big-endian Fortran unformatted files. Each record is
+ wrapped by 4 byte record length markers. The file starts with a 40 character
+ file type ("CTM bin 02") and an 80 character title. Each datablock then has
+ three records: the model record (36 bytes), the data header (168 bytes) and
+ the data (float32, in Fortran order).
+"""
+# - Required modules:
+# I/O / Low level
+import os
+import glob
+import struct
+import logging
+# Math/Analysis
+import numpy as np
+import pandas as pd
+# Time
+import datetime as datetime
+
+# Cache of parsed diaginfo.dat/tracerinfo.dat files and bpch file indexes
+# ( keyed by absolute filename and modification time )
+_bpch_info_cache = {}
+_bpch_index_cache = {}
+
+# Datablock record formats (big-endian)
+_bpch_model_record = struct.Struct('>20sffii')
+_bpch_data_header = struct.Struct('>40si40sdd40s7i')
+
+
+def get_bpch_diaginfo(wd=None, filename='diaginfo.dat'):
+    """
+    Get the diagnostic categories listed in a GEOS-Chem diaginfo.dat file
+
+    Parameters
+    ----------
+    wd (str): the directory containing the file
+    filename (str): name of the diaginfo file
+
+    Returns
+    -------
+    (pd.DataFrame) with columns offset, category and description
+
+    Notes
+    -----
+     - The file is parsed once and cached (until it is modified).
+     - Lines are of the fortran format (I8,1X,A40,1X,A100).
+    """
+    fname = os.path.abspath(os.path.join(wd, filename))
+    key = ('diaginfo', fname, os.path.getmtime(fname))
+    if key not in _bpch_info_cache:
+        rows = []
+        with open(fname, 'r') as f:
+            for line in f:
+                if line.startswith('#') or (line.strip() == ''):
+                    continue
+                rows += [(int(line[:8]), line[9:49].strip(),
+                          line[50:150].strip())]
+        df = pd.DataFrame(rows, columns=['offset', 'category',
+                                         'description'])
+        _bpch_info_cache[key] = df
+    return _bpch_info_cache[key]
+
+
+def get_bpch_tracerinfo(wd=None, filename='tracerinfo.dat'):
+    """
+    Get the tracers listed in a GEOS-Chem tracerinfo.dat file
+
+    Parameters
+    ----------
+    wd (str): the directory containing the file
+    filename (str): name of the tracerinfo file
+
+    Returns
+    -------
+    (pd.DataFrame) with columns name, full_name, molwt, C, tracer, scale and
+    unit
+
+    Notes
+    -----
+     - The file is parsed once and cached (until it is modified).
+     - Lines are of the fortran format (A8,1X,A30,E10.0,I3,I9,E10.3,1X,A40).
+    """
+    fname = os.path.abspath(os.path.join(wd, filename))
+    key = ('tracerinfo', fname, os.path.getmtime(fname))
+    if key not in _bpch_info_cache:
+        rows = []
+        with open(fname, 'r') as f:
+            for line in f:
+                if line.startswith('#') or (line.strip() == ''):
+                    continue
+                rows += [(line[:8].strip(), line[9:39].strip(),
+                          float(line[39:49]), int(line[49:52]),
+                          int(line[52:61]), float(line[61:71]),
+                          line[72:112].strip())]
+        df = pd.DataFrame(rows, columns=['name', 'full_name', 'molwt', 'C',
+                                         'tracer', 'scale', 'unit'])
+        _bpch_info_cache[key] = df
+    return _bpch_info_cache[key]
+
+
+def get_bpch_var_name(category, ntracer, diaginfo=None, tracerinfo=None):
+    """
+    Get NetCDF (ctm.nc) variable name for a bpch category and tracer number
+
+    Parameters
+    ----------
+    category (str): diagnostic category (e.g. 'IJ-AVG-$')
+    ntracer (int): tracer number within category (as in datablock header)
+    diaginfo (pd.DataFrame): output of get_bpch_diaginfo
+    tracerinfo (pd.DataFrame): output of get_bpch_tracerinfo
+
+    Returns
+    -------
+    (str) e.g. 'IJ_AVG_S__O3'
+
+    Notes
+    -----
+     - Names follow the PyGChem convention used for ctm.nc files.
+    """
+    offset = diaginfo.loc[diaginfo['category'] == category, 'offset']
+    offset = 0 if (len(offset) == 0) else offset.values[0]
+    name = tracerinfo.loc[tracerinfo['tracer'] == (ntracer + offset), 'name']
+    name = str(ntracer) if (len(name) == 0) else name.values[0]
+    category = category.replace('-', '_').replace('$', 'S')
+    return '{}__{}'.format(category, name)
+
+
+def get_bpch_index(filename, wd=None):
+    """
+    Index the datablocks in a bpch2 file (from their headers)
+
+    Parameters
+    ----------
+    filename (str): full path of bpch file
+    wd (str): directory containing diaginfo.dat and tracerinfo.dat
+        (default: directory of filename)
+
+    Returns
+    -------
+    (pd.DataFrame) with a row per datablock (columns: var, category, ntracer,
+    unit, tau0, tau1, ni, nj, nl, ifirst, jfirst, lfirst, lonres, latres,
+    modelname and offset - the byte offset of the data in the file)
+
+    Notes
+    -----
+     - The file is read in a single pass, skipping over the data of each
+     block. The index is cached (until the file is modified).
+     - tau0 and tau1 are hours since 1985-01-01.
+    """
+    fname = os.path.abspath(filename)
+    if isinstance(wd, type(None)):
+        wd = os.path.dirname(fname)
+    key = (fname, os.path.getmtime(fname), os.path.getsize(fname))
+    if key in _bpch_index_cache:
+        return _bpch_index_cache[key]
+    diaginfo = get_bpch_diaginfo(wd)
+    tracerinfo = get_bpch_tracerinfo(wd)
+    rows = []
+    with open(fname, 'rb') as f:
+        # Check file type and skip title
+        ftype = _read_bpch_record(f)
+        if not ftype.startswith(b'CTM bin 02'):
+            err_msg = '{} is not a bpch2 file ({})'.format(fname, ftype)
+            logging.error(err_msg)
+            raise IOError(err_msg)
+        _read_bpch_record(f)
+        while True:
+            record = _read_bpch_record(f)
+            if isinstance(record, type(None)):
+                break
+            modelname, lonres, latres, NIU, NIU = \
+                _bpch_model_record.unpack(record)
+            header = _bpch_data_header.unpack(_read_bpch_record(f))
+            category, ntracer, unit, tau0, tau1, NIU, ni, nj, nl, ifirst, \
+                jfirst, lfirst, NIU = header
+            category = category.decode().strip()
+            # Skip over the data record (noting its offset)
+            nbytes = struct.unpack('>i', f.read(4))[0]
+            offset = f.tell()
+            f.seek(nbytes + 4, 1)
+            rows += [(get_bpch_var_name(category, ntracer, diaginfo,
+                                        tracerinfo),
+                      category, ntracer, unit.decode().strip(), tau0, tau1,
+                      ni, nj, nl, ifirst, jfirst, lfirst, lonres, latres,
+                      modelname.decode().strip(), offset)]
+    columns = ['var', 'category', 'ntracer', 'unit', 'tau0', 'tau1', 'ni',
+               'nj', 'nl', 'ifirst', 'jfirst', 'lfirst', 'lonres', 'latres',
+               'modelname', 'offset']
+    df = pd.DataFrame(rows, columns=columns)
+    df['filename'] = fname
+    _bpch_index_cache[key] = df
+    return df
+
+
+def _read_bpch_record(f):
+    """ Read a (big-endian, fortran unformatted) record from an open file """
+    marker = f.read(4)
+    if len(marker) < 4:
+        return None
+    nbytes = struct.unpack('>i', marker)[0]
+    record = f.read(nbytes)
+    f.read(4)
+    return record
+
+
+def get_bpch_files(wd=None, filetype='*ctm.bpch*',
+                   check4_trac_avg_if_no_ctm_bpch=True):
+    """
+    Get the (sorted) bpch files in a directory
+
+    Parameters
+    ----------
+    wd (str): the directory to search for files in
+    filetype (str): string with wildcards to match filenames
+    check4_trac_avg_if_no_ctm_bpch (boolean): look for *trac_avg* files if
+        no files match filetype
+
+    Returns
+    -------
+    (list)
+    """
+    bpch_files = glob.glob(os.path.join(wd, filetype))
+    if (len(bpch_files) == 0) and check4_trac_avg_if_no_ctm_bpch:
+        bpch_files = glob.glob(os.path.join(wd, '*trac_avg*'))
+    if len(bpch_files) == 0:
+        err_msg = "No bpch files ({}) found in {}".format(filetype, wd)
+        logging.error(err_msg)
+        raise IOError(err_msg)
+    return sorted(bpch_files)
+
+
+def read_bpch_var(bpch_files, var='IJ_AVG_S__O3', wd=None, time_slice=None,
+                  lev_slice=None, trop_limit=False, r_units=False,
+                  r_times=False):
+    """
+    Read a variable from bpch file(s) in GC format (lon, lat, alt, time)
+
+    Parameters
+    ----------
+    bpch_files (list): full paths of bpch files (or a single filename)
+    var (str): NetCDF (ctm.nc) style name of variable (e.g. 'IJ_AVG_S__O3')
+    wd (str): directory containing diaginfo.dat and tracerinfo.dat
+        (default: directory of each bpch file)
+    time_slice (slice or int): subset of time indices to read
+    lev_slice (slice or int): subset of model levels to read
+    trop_limit(boolean): limit to "chemical troposphere" (level 38 of model)
+    r_units (boolean): return the units of the variable (as in the file)
+    r_times (boolean): return the times (datetime.datetime) of each block
+
+    Returns
+    -------
+    (np.array) as float32, with dimensions (lon, lat, alt, time)
+
+    Notes
+    -----
+     - Only the datablocks for var (within time_slice) are read, directly
+     from a memory map of each file. Datablocks are ordered by tau0.
+     - Two dimensional fields are returned with an alt dimension of length 1.
+     - Values are as stored in the file (e.g. ppbv), see get_unit_scaling.
+    """
+    if isinstance(bpch_files, str):
+        bpch_files = [bpch_files]
+    df = pd.concat([get_bpch_index(i, wd=wd) for i in bpch_files])
+    df = df.loc[df['var'] == var, :]
+    if len(df) == 0:
+        err_msg = "Variable '{}' not found in bpch files: {}".format(
+            var, bpch_files)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    df = df.sort_values('tau0', kind='mergesort')
+    # Select times and levels to read
+    if not isinstance(time_slice, type(None)):
+        if isinstance(time_slice, int):
+            time_slice = slice(time_slice, time_slice+1)
+        df = df.iloc[time_slice]
+    if (len(df) == 0):
+        err_msg = "No times selected for '{}' with time_slice={}".format(
+            var, time_slice)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    ni, nj, nl = df[['ni', 'nj', 'nl']].values[0]
+    levs = np.arange(nl)
+    if trop_limit:
+        levs = levs[:38]
+    if not isinstance(lev_slice, type(None)):
+        if isinstance(lev_slice, int):
+            lev_slice = slice(lev_slice, lev_slice+1)
+        levs = levs[lev_slice]
+    # Read each block (as a view of the file) into a single array
+    arr = np.empty((ni, nj, len(levs), len(df)), dtype=np.float32)
+    mmaps = {}
+    for n, (fname, offset) in enumerate(df[['filename', 'offset']].values):
+        if fname not in mmaps:
+            mmaps[fname] = np.memmap(fname, dtype='>f4', mode='r')
+        start = int(offset) // 4
+        block = mmaps[fname][start:start+(ni*nj*nl)].reshape((ni, nj, nl),
+                                                            order='F')
+        arr[..., n] = block[:, :, levs]
+    del mmaps
+    output = [arr]
+    if r_units:
+        output += [df['unit'].values[0]]
+    if r_times:
+        output += [[datetime.datetime(1985, 1, 1) +
+                    datetime.timedelta(hours=i) for i in df['tau0'].values]]
+    if len(output) == 1:
+        return arr
+    return output
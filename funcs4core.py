@@ -15,6 +15,9 @@ import platform
 import sys
 import logging
 import os
+import atexit
+import threading
+from collections import OrderedDict, namedtuple
 from math import log10, floor
 import math
 
@@ -119,8 +122,7 @@ def get_gc_lat(lat, res='4x5', wd=None, filename='ctm.nc', debug=False):
     -------
     (float)
     """
-    NIU, lat_c, NIU = get_latlonalt4res(res=res, wd=wd, filename=filename)
-    del NIU
+    lat_c = get_grid4res(res=res, wd=wd, filename=filename).lat_c
     return find_nearest_value(lat_c, lat)
 
 
@@ -140,8 +142,7 @@ def get_gc_lon(lon, res='4x5', wd=None, filename='ctm.nc', debug=False):
     -------
     (float)
     """
-    lon_c, NIU, NIU = get_latlonalt4res(res=res, wd=wd, filename=filename)
-    del NIU
+    lon_c = get_grid4res(res=res, wd=wd, filename=filename).lon_c
     return find_nearest_value(lon_c, lon)
 
 
@@ -228,7 +229,7 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
                       lat_bounds='latitude_bnds', lon_bounds='longitude_bnds',
                       lon_var='longitude', lat_var='latitude', \
                       #        lon_var=u'lon', lat_var=u'lat',
-                      verbose=True, debug=False):
+                      engine='netCDF4', verbose=True, debug=False):
     """
     Get lon, lat, and alt for a given model resolution.
 
@@ -244,6 +245,8 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
     nest (str): manual override for retruned variables - vestigle?
     hPa (boolean): return altitudes in units of hPa, instead of km
     full_vertical_grid (boolean): use full vertical grid or reduced (47 vs. 72)
+    engine (str): 'netCDF4' or 'mmap' (read-only memory maps of lon/lat, if
+        the file is uncompressed - see get_NetCDF_mmap_var)
 
     Returns
     -------
@@ -256,11 +259,534 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
      - The update to using ctm.nc files has cause an bug linked to the lat
      and lon variabe retrival. Just update to passing a wd with output at the
      correct resolution to fix this.
+     - Values are taken from the grid registry (see get_grid4res), so files
+     are only read on the first call for a given resolution (or file).
     """
     logging.info("Calling get_latlonalt4res for res={}".format(res))
+    if isinstance(res, type(None)):
+        logging.warning("No resolution specified. Assuming 4x5!")
+        res = '4x5'
+    grid_kwargs = {'res': res, 'wd': wd, 'filename': filename,
+                   'full_vertical_grid': full_vertical_grid,
+                   'lat_bounds': lat_bounds, 'lon_bounds': lon_bounds,
+                   'lon_var': lon_var, 'lat_var': lat_var, 'engine': engine,
+                   'verbose': verbose}
+    grid = get_grid4res(**grid_kwargs)
+    if centre:
+        lon, lat = grid.lon_c, grid.lat_c
+    else:
+        lon, lat = grid.lon_e, grid.lat_e
+    # Re-read the file to raise the original error if lon/lat not available
+    if any([isinstance(i, type(None)) for i in (lon, lat)]):
+        del grid_kwargs['full_vertical_grid']
+        _get_lonlat4res(centre=centre, **grid_kwargs)
+    # Get altitudes (from Gerrit's GEOS-Chem dimensions list)
+    # ( now only doing this for alt, as alt values not in model output? )
+    if hPa:
+        alt = grid.alt_hPa
+    else:
+        alt = grid.alt_km
+
+    # Also provide high resolution grid if requested from this function all
+    if nest == 'high res global':
+        lon, lat = np.arange(-180, 180, 0.25), np.arange(-90, 90, 0.25)
+        return lon, lat, np.array(alt)
+
+    if debug:
+        print((lon, lat, alt))
+    # Return copies, as the arrays held in the registry are read-only
+    rtn_list = [np.array(i) for i in (lon, lat, alt)]
+    if not isinstance(dtype, type(None)):
+        return [i.astype(dtype) for i in rtn_list]
+    else:
+        return rtn_list
+
+
+# --- Registry of model grid geometry (built once per resolution/file)
+grid_geometry = namedtuple('grid_geometry', ['res', 'lon_c', 'lat_c', 'lon_e',
+                                             'lat_e', 'alt_km', 'alt_hPa',
+                                             'alt_e_km', 'alt_e_hPa', 'dims',
+                                             's_area'])
+_grid_registry = {}
+
+
+def get_grid4res(res='4x5', wd=None, filename='ctm.nc',
+                 full_vertical_grid=False, lat_bounds='latitude_bnds',
+                 lon_bounds='longitude_bnds', lon_var='longitude',
+                 lat_var='latitude', engine='netCDF4', verbose=True):
+    """
+    Get the (shared, read-only) grid geometry for a model resolution
+
+    Parameters
+    ----------
+    res (str): the resolution if wd not given (e.g. '4x5' )
+    wd (str): Specify the wd to get the grid of a run's output from.
+    filename (str): name of NetCDF to use
+    full_vertical_grid (boolean): use full vertical grid or reduced (47 vs. 72)
+    lon_var, lat_var (str): variables names for lon and lat in the NetCDF
+    lon_bounds, lat_bounds (str): variables names for lon and lat bounds in the NetCDF
+    engine (str): 'netCDF4' or 'mmap' (see get_NetCDF_var)
+    verbose (boolean): print (minor) logging to screen
+
+    Returns
+    -------
+    (grid_geometry) named tuple of res, lon_c, lat_c (centres), lon_e, lat_e
+    (edges), alt_km, alt_hPa, alt_e_km, alt_e_hPa (altitude edges, only for the
+    reduced vertical grid), dims (lon, lat, alt) and s_area (surface area of
+    grid boxes in m2, as (lon, lat))
+
+    Notes
+    -----
+     - The geometry is built on the first call for a resolution (or file), then
+     shared. Arrays are read-only, so copy them before making changes.
+     - If the reference file for a resolution (wd not given) can not be read,
+     the grid is calculated for a regular (global) grid, with a warning.
+     - If the centres or edges can not be extracted for a resolution, these
+     (and s_area) are None. These grids are not kept in the registry, so
+     extraction is tried again on the next call.
+     - Surface areas follow the GEOS-Chem approach (see
+     calc_surface_area_in_grid).
+    """
     if isinstance(res, type(None)):
         logging.warning("No resolution specified. Assuming 4x5!")
         res = '4x5'
+    if isinstance(wd, type(None)):
+        key = (res, None, filename)
+    else:
+        fname = os.path.abspath(os.path.join(wd, filename))
+        mtime = None
+        if os.path.exists(fname):
+            mtime = os.path.getmtime(fname)
+        key = (res, fname, mtime)
+    key += (full_vertical_grid, lat_bounds, lon_bounds, lon_var, lat_var)
+    try:
+        return _grid_registry[key]
+    except KeyError:
+        pass
+    logging.info("Adding {} grid to registry: {}".format(res, key))
+    lonlat_kwargs = {'res': res, 'wd': wd, 'filename': filename,
+                     'lat_bounds': lat_bounds, 'lon_bounds': lon_bounds,
+                     'lon_var': lon_var, 'lat_var': lat_var, 'engine': engine,
+                     'verbose': verbose}
+    lonlat = []
+    for centre in (True, False):
+        try:
+            lonlat += list(_get_lonlat4res(centre=centre, **lonlat_kwargs))
+        except Exception as err:
+            logging.warning("Could not get lon/lat (centre={}) for {}: {}"
+                            .format(centre, res, err))
+            lonlat += [None, None]
+    # Calculate lon and lat for regular (global) grids if not available
+    if any([isinstance(i, type(None)) for i in lonlat]) and \
+            isinstance(wd, type(None)):
+        try:
+            lonlat = _get_regular_lonlat4res(res)
+            logging.warning(("Reference lon/lat for {} not found, using a " +
+                             "calculated regular grid instead").format(res))
+        except ValueError as err:
+            logging.warning(err)
+    lon_c, lat_c, lon_e, lat_e = [_get_read_only_array(i) for i in lonlat]
+    # Get altitudes from Gerrit's GEOS-Chem dimensions list
+    d = gchemgrid(rtn_dict=True)
+    alt_km, alt_hPa = 'c_km_geos5', 'c_hPa_geos5'
+    if not full_vertical_grid:
+        alt_km, alt_hPa = alt_km+'_r', alt_hPa+'_r'
+    alt_km, alt_hPa = [_get_read_only_array(d[i]) for i in (alt_km, alt_hPa)]
+    alt_e_km, alt_e_hPa = None, None
+    if not full_vertical_grid:
+        alt_e_km, alt_e_hPa = [_get_read_only_array(d[i]) for i in
+                               ('e_km_geos5_r', 'e_hPa_geos5_r')]
+    # Get surface areas (broadcast over longitudes)
+    s_area = None
+    if not any([isinstance(i, type(None)) for i in (lon_c, lat_e)]):
+        s_area = get_surface_area4edges(lat_e, lon_e=lon_e,
+                                        lon_dim=len(lon_c))
+    dims = None
+    if not any([isinstance(i, type(None)) for i in (lon_c, lat_c)]):
+        dims = (len(lon_c), len(lat_c), len(alt_km))
+    grid = grid_geometry(res=res, lon_c=lon_c, lat_c=lat_c, lon_e=lon_e,
+                         lat_e=lat_e, alt_km=alt_km, alt_hPa=alt_hPa,
+                         alt_e_km=alt_e_km, alt_e_hPa=alt_e_hPa, dims=dims,
+                         s_area=s_area)
+    # Only keep grids in the registry if the lon/lat were found
+    if not any([isinstance(i, type(None)) for i in lonlat]):
+        _grid_registry[key] = grid
+    return grid
+
+
+# Surface areas of grid boxes ( keyed by edges, number of lons and radius )
+_surface_area_cache = {}
+
+
+def get_surface_area4edges(lat_e, lon_e=None, lon_dim=None, Re=6.375E6):
+    """
+    Get the (shared, read-only) surface area of grid boxes from their edges
+
+    Parameters
+    ----------
+    lat_e (array): edges of latitude boxes
+    lon_e (array): edges of longitude boxes (only needed for regional grids)
+    lon_dim (int): number of longitudes (if lon_e not given, a global grid)
+    Re (float): radius of Earth (m)
+
+    Returns
+    -------
+    (np.array) surface area of grid boxes (m2) with dimensions (lon, lat)
+
+    Notes
+    -----
+     - Follows the GEOS-Chem approach (see calc_surface_area_in_grid), with
+     box widths taken from lon_e for regional (e.g. nested) grids.
+     - Areas of a regular grid only vary with latitude, so a (lon, lat)
+     broadcast view of a 1D array of areas is returned, rather than a copy for
+     each longitude. Copy it (e.g. with np.array) before making changes.
+     - Areas are calculated once for each set of edges, then shared.
+    """
+    lat_e = np.asarray(np.ma.getdata(lat_e), dtype=np.float64)
+    if not isinstance(lon_e, type(None)):
+        lon_e = np.asarray(np.ma.getdata(lon_e), dtype=np.float64)
+        lon_dim = len(lon_e) - 1
+        lon_key = lon_e.tobytes()
+    else:
+        lon_key = None
+    key = (lat_e.tobytes(), lon_key, int(lon_dim), Re)
+    try:
+        return _surface_area_cache[key]
+    except KeyError:
+        pass
+    # S to N extent of grid boxes [unitless]
+    RLAT = np.diff(np.sin(np.radians(lat_e)))
+    if isinstance(lon_e, type(None)) or np.isclose(lon_e[-1]-lon_e[0], 360.):
+        s_area = 2.0 * np.pi * Re * Re / float(lon_dim) * RLAT
+    else:
+        DLON = np.radians(np.diff(lon_e))
+        if np.allclose(DLON, DLON[0]):
+            s_area = Re * Re * DLON[0] * RLAT
+        else:
+            s_area = Re * Re * np.outer(DLON, RLAT)
+    s_area = _get_read_only_array(s_area)
+    if s_area.ndim == 1:
+        s_area = np.broadcast_to(s_area, (int(lon_dim), len(s_area)))
+    _surface_area_cache[key] = s_area
+    return s_area
+
+
+def _get_regular_lonlat4res(res='4x5'):
+    """
+    Calculate lon and lat (centres and edges) of a regular global grid
+
+    Parameters
+    ----------
+    res (str): the resolution (e.g. '4x5', as latitude x longitude)
+
+    Returns
+    -------
+    (tuple) of np.arrays of lon_c, lat_c, lon_e, lat_e
+
+    Notes
+    -----
+     - Grids follow the GEOS-Chem convention (half-size polar boxes), unless
+     get_dims4res lists a latitude dimension of 180/(latitude resolution).
+     - Regional (e.g. nested) grids can not be calculated and raise a
+     ValueError.
+    """
+    try:
+        dlat, dlon = [float(i) for i in res.split('x')]
+    except (ValueError, AttributeError):
+        raise ValueError("Can not calculate grid for res={}".format(res))
+    nlon, nlat = int(round(360. / dlon)), int(round(180. / dlat))
+    half_polar_boxes = True
+    dims = get_dims4res(r_dims=True, invert=False, just2D=True).get(res)
+    if not isinstance(dims, type(None)):
+        nlon = dims[0]
+        half_polar_boxes = abs((dims[1]-1)*dlat - 180.) < \
+            abs(dims[1]*dlat - 180.)
+        nlat = dims[1] - int(half_polar_boxes)
+    # Use the exact resolution for the number of boxes (e.g. 1/12 for 0.083)
+    if not (np.isclose(nlon*dlon, 360., rtol=1E-2) and
+            np.isclose(nlat*dlat, 180., rtol=1E-2)):
+        raise ValueError("res={} is not a regular global grid".format(res))
+    dlon, dlat = 360. / nlon, 180. / nlat
+    if half_polar_boxes:
+        lon_c = -180. + dlon * np.arange(nlon)
+        lat_c = -90. + dlat * np.arange(nlat+1)
+        lat_c[0], lat_c[-1] = -90.+(dlat/4.), 90.-(dlat/4.)
+        lat_e = -90. - (dlat/2.) + dlat * np.arange(nlat+2)
+        lat_e[0], lat_e[-1] = -90., 90.
+    else:
+        lon_c = -180. + (dlon/2.) + dlon * np.arange(nlon)
+        lat_e = -90. + dlat * np.arange(nlat+1)
+        lat_c = lat_e[:-1] + (dlat/2.)
+    lon_e = np.append(lon_c - (dlon/2.), lon_c[-1] + (dlon/2.))
+    return lon_c, lat_c, lon_e, lat_e
+
+
+def get_gridbox_indices(lons, lats, alts=None, res='4x5', wd=None,
+                        filename='ctm.nc', alt_unit='hPa', lon_e=None,
+                        lat_e=None, alt_e=None):
+    """
+    Get the indices of the model grid boxes containing points (e.g. a flight track)
+
+    Parameters
+    ----------
+    lons (array): longitudes of points (degrees East)
+    lats (array): latitudes of points (degrees North)
+    alts (array): (optional) altitudes of points (in units of alt_unit)
+    res (str): the resolution if wd not given (e.g. '4x5' )
+    wd (str): Specify the wd to get the grid of a run's output from.
+    filename (str): name of NetCDF to use
+    alt_unit (str): units of alts ('hPa' or 'km')
+    lon_e, lat_e, alt_e (array): edges of grid boxes to use instead of those
+        of the model grid for res (or wd)
+
+    Returns
+    -------
+    (tuple) of np.arrays of lon (i) and lat (j) indices (and alt (k) indices if
+    alts are given). Points outside of the grid have an index of -1.
+
+    Notes
+    -----
+     - Indices for all points are found in one pass with np.searchsorted on
+     the box edges. Points on an edge are in the box to the North/East/above.
+     - If the grid is global in longitude, longitudes are wrapped (e.g. for a
+     box that spans the dateline). Latitudes of +/-90 are in the polar boxes.
+     - Pressures greater than the surface edge are in the lowest box, and
+     altitudes below the surface edge (in km) are in the lowest box too.
+    """
+    lons, lats = [np.atleast_1d(np.asarray(i, dtype=np.float64))
+                  for i in (lons, lats)]
+    if any([isinstance(i, type(None)) for i in (lon_e, lat_e)]) or \
+            ((not isinstance(alts, type(None))) and isinstance(alt_e, type(None))):
+        grid = get_grid4res(res=res, wd=wd, filename=filename)
+        if isinstance(lon_e, type(None)):
+            lon_e = _get_edges4centres(grid.lon_c, grid.lon_e)
+        if isinstance(lat_e, type(None)):
+            lat_e = _get_edges4centres(grid.lat_c, grid.lat_e, limit=90.)
+        if isinstance(alt_e, type(None)):
+            alt_e = {'hPa': grid.alt_e_hPa, 'km': grid.alt_e_km}[alt_unit]
+    lon_e, lat_e = [np.asarray(i, dtype=np.float64) for i in (lon_e, lat_e)]
+    # Wrap longitudes onto a global grid (e.g. -182.5 to 177.5 for 4x5)
+    if np.isclose(lon_e[-1] - lon_e[0], 360.):
+        lons = (lons - lon_e[0]) % 360. + lon_e[0]
+    inds = [_get_bin_indices(lons, lon_e), _get_bin_indices(lats, lat_e)]
+    if not isinstance(alts, type(None)):
+        alts = np.atleast_1d(np.asarray(alts, dtype=np.float64))
+        alt_e = np.asarray(alt_e, dtype=np.float64)
+        # Pressure edges decrease with height
+        if alt_e[0] > alt_e[-1]:
+            alts, alt_e = -alts, -alt_e
+        alts = np.maximum(alts, alt_e[0])
+        inds += [_get_bin_indices(alts, alt_e)]
+    return tuple(inds)
+
+
+def _get_bin_indices(values, edges):
+    """ Get the indices of bins (given by increasing edges) containing values """
+    inds = np.searchsorted(edges, values, side='right') - 1
+    # Values on the final edge are in the last bin
+    inds[values == edges[-1]] = len(edges) - 2
+    inds[(values < edges[0]) | (values > edges[-1]) | np.isnan(values)] = -1
+    return inds
+
+
+def _get_edges4centres(centres, edges=None, limit=None):
+    """ Get box edges (from centres, if edges are not available/valid) """
+    if (not isinstance(edges, type(None))) and (len(edges) == len(centres)+1):
+        return edges
+    centres = np.asarray(centres, dtype=np.float64)
+    mids = (centres[1:] + centres[:-1]) / 2.
+    edges = np.concatenate([[2*centres[0] - mids[0]], mids,
+                            [2*centres[-1] - mids[-1]]])
+    if not isinstance(limit, type(None)):
+        edges = np.clip(edges, -limit, limit)
+    return edges
+
+
+# --- Spatial indexes (KD-trees of points on the unit sphere)
+spatial_index = namedtuple('spatial_index', ['tree', 'lon', 'lat', 'shape'])
+_spatial_index_cache = OrderedDict()
+_spatial_index_cache_max = 32
+
+
+def get_spatial_index(lons, lats, shape=None):
+    """
+    Get a (cached) spatial index of points for nearest neighbour/radius queries
+
+    Parameters
+    ----------
+    lons (array): longitudes of points (degrees East)
+    lats (array): latitudes of points (degrees North)
+    shape (tuple): shape of the points (e.g. (lon, lat) for a model grid), so
+        that flat indices can be converted with np.unravel_index
+
+    Returns
+    -------
+    (spatial_index) named tuple of tree (scipy.spatial.cKDTree), lon, lat (flat,
+    read-only arrays of the points) and shape
+
+    Notes
+    -----
+     - Points are indexed as cartesian coordinates on the unit sphere, so
+     queries are not distorted near the poles or the dateline.
+     - Indexes are cached by the values of the points, so repeat calls for the
+     same site list or grid do not rebuild the tree.
+     - See query_spatial_index and query_spatial_index_radius.
+    """
+    import hashlib
+    lons, lats = [np.ascontiguousarray(i, dtype=np.float64).ravel()
+                  for i in (lons, lats)]
+    if isinstance(shape, type(None)):
+        shape = lons.shape
+    key = hashlib.sha1(lons.tobytes() + lats.tobytes()).hexdigest()
+    key = (key, tuple(shape))
+    try:
+        index = _spatial_index_cache.pop(key)
+    except KeyError:
+        from scipy.spatial import cKDTree
+        index = spatial_index(tree=cKDTree(_lonlat2xyz(lons, lats)),
+                              lon=_get_read_only_array(lons),
+                              lat=_get_read_only_array(lats),
+                              shape=tuple(shape))
+        while len(_spatial_index_cache) >= _spatial_index_cache_max:
+            _spatial_index_cache.popitem(last=False)
+    # Store as most recently used
+    _spatial_index_cache[key] = index
+    return index
+
+
+def get_spatial_index4res(res='4x5', wd=None, filename='ctm.nc'):
+    """
+    Get a (cached) spatial index of the centres of a model grid
+
+    Parameters
+    ----------
+    res (str): the resolution if wd not given (e.g. '4x5' )
+    wd (str): Specify the wd to get the grid of a run's output from.
+    filename (str): name of NetCDF to use
+
+    Returns
+    -------
+    (spatial_index) with a shape of (lon, lat)
+    """
+    grid = get_grid4res(res=res, wd=wd, filename=filename)
+    lons, lats = np.meshgrid(grid.lon_c, grid.lat_c, indexing='ij')
+    return get_spatial_index(lons, lats, shape=lons.shape)
+
+
+def query_spatial_index(index, lons, lats, k=1, max_distance=None,
+                        Re=6375.):
+    """
+    Get the nearest k points in a spatial index to each of the given points
+
+    Parameters
+    ----------
+    index (spatial_index): output of get_spatial_index
+    lons (array): longitudes of points to find neighbours for (degrees East)
+    lats (array): latitudes of points to find neighbours for (degrees North)
+    k (int): number of nearest neighbours to return
+    max_distance (float): only return neighbours within this great circle
+        distance (in units of Re)
+    Re (float): radius of Earth (default is km, use 3956. for miles)
+
+    Returns
+    -------
+    (tuple) of np.arrays of flat indices of the nearest points and their great
+    circle distances. Arrays have a shape of (N) if k=1, else (N, k). Missing
+    neighbours (beyond max_distance) have an index of -1 and a distance of inf.
+    """
+    xyz = _lonlat2xyz(lons, lats)
+    upper_bound = np.inf
+    if not isinstance(max_distance, type(None)):
+        upper_bound = _arc2chord(max_distance, Re=Re)
+    chord, inds = index.tree.query(xyz, k=k, distance_upper_bound=upper_bound)
+    missing = ~np.isfinite(chord)
+    inds = np.where(missing, -1, inds)
+    dists = np.full(chord.shape, np.inf)
+    dists[~missing] = 2. * np.arcsin(np.minimum(chord[~missing]/2., 1.)) * Re
+    return inds, dists
+
+
+def query_spatial_index_radius(index, lons, lats, radius=None, Re=6375.):
+    """
+    Get the points in a spatial index within a distance of each given point
+
+    Parameters
+    ----------
+    index (spatial_index): output of get_spatial_index
+    lons (array): longitudes of points to search around (degrees East)
+    lats (array): latitudes of points to search around (degrees North)
+    radius (float): great circle distance to search within (in units of Re)
+    Re (float): radius of Earth (default is km, use 3956. for miles)
+
+    Returns
+    -------
+    (list) of np.arrays of (sorted) flat indices, one per point given
+    """
+    xyz = _lonlat2xyz(lons, lats)
+    inds = index.tree.query_ball_point(xyz, r=_arc2chord(radius, Re=Re))
+    return [np.array(sorted(i), dtype=int) for i in inds]
+
+
+def get_nearest_gridbox(lons, lats, res='4x5', wd=None, filename='ctm.nc'):
+    """
+    Get the indices of the grid box centres nearest to points
+
+    Parameters
+    ----------
+    lons (array): longitudes of points (degrees East)
+    lats (array): latitudes of points (degrees North)
+    res (str): the resolution if wd not given (e.g. '4x5' )
+    wd (str): Specify the wd to get the grid of a run's output from.
+    filename (str): name of NetCDF to use
+
+    Returns
+    -------
+    (tuple) of np.arrays of lon (i) and lat (j) indices
+
+    Notes
+    -----
+     - Unlike get_gridbox_indices, this also gives the closest box for points
+     outside of a (regional) grid.
+    """
+    index = get_spatial_index4res(res=res, wd=wd, filename=filename)
+    inds, NIU = query_spatial_index(index, lons, lats)
+    return np.unravel_index(inds, index.shape)
+
+
+def _lonlat2xyz(lons, lats):
+    """ Get cartesian coordinates on the unit sphere, as (N, 3) """
+    lons, lats = [np.radians(np.atleast_1d(np.asarray(i, dtype=np.float64))
+                             ).ravel() for i in (lons, lats)]
+    cos_lat = np.cos(lats)
+    return np.column_stack((cos_lat*np.cos(lons), cos_lat*np.sin(lons),
+                            np.sin(lats)))
+
+
+def _arc2chord(distance, Re=6375.):
+    """ Convert a great circle distance to a chord length on the unit sphere """
+    return 2. * np.sin(min(distance / Re, np.pi) / 2.)
+
+
+def _get_read_only_array(arr):
+    """ Get a read-only (unmasked) copy of an array (None is returned as is) """
+    if isinstance(arr, type(None)):
+        return None
+    arr = np.array(np.ma.getdata(arr))
+    arr.flags.writeable = False
+    return arr
+
+
+def _get_lonlat4res(res='4x5', centre=True, wd=None, filename='ctm.nc',
+                    lat_bounds='latitude_bnds', lon_bounds='longitude_bnds',
+                    lon_var='longitude', lat_var='latitude', engine='netCDF4',
+                    verbose=True):
+    """
+    Extract lon and lat (centres or edges) for a resolution (from file)
+
+    Notes
+    -----
+     - See get_latlonalt4res for details of the parameters.
+    """
     if isinstance(wd, type(None)):
         AC_tools_dir = os.path.dirname(__file__)
         dwd = os.path.join(AC_tools_dir, 'data/LM')
@@ -303,9 +829,8 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
     if centre:
         try:
             # Extract lat and lon from model output data file
-            with Dataset(data_fname, 'r') as d:
-                lat = d[lat_var][:]
-                lon = d[lon_var][:]
+            lat = get_NetCDF_var(data_fname, lat_var, engine=engine)
+            lon = get_NetCDF_var(data_fname, lon_var, engine=engine)
         except:
             try:
                 print('WARNING: coord vars not found! -using abrvs.')
@@ -314,9 +839,8 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
                 lat_var = 'lat'
                 print(('Now using: ', lon_var, lat_var))
                 # Extract lat and lon from model output data file
-                with Dataset(data_fname, 'r') as d:
-                    lat = d[lat_var][:]
-                    lon = d[lon_var][:]
+                lat = get_NetCDF_var(data_fname, lat_var, engine=engine)
+                lon = get_NetCDF_var(data_fname, lon_var, engine=engine)
             except IOError:
                 error = "Could not get {lat}, {lon} from {fn}"\
                     .format(fn=data_fname, lat=lat_var, lon=lon_var)
@@ -329,13 +853,10 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
     if (not centre) and (res not in exception_res):
         # Extract lat and lon from model output data file
         try:
-            with Dataset(data_fname, 'r') as d:
-                lat = d[lat_bounds][:]
-                lon = d[lon_bounds][:]
-                # Select lower edge of each bound, and final upper edge
-                lat = [i[0] for i in lat]+[lat[-1][1]]
-                lon = [i[0] for i in lon]+[lon[-1][1]]
-                lat, lon = [np.array(i) for i in (lat, lon)]
+            lat = get_NetCDF_var(data_fname, lat_bounds, engine=engine)
+            lon = get_NetCDF_var(data_fname, lon_bounds, engine=engine)
+            # Select lower edge of each bound, and final upper edge
+            lat, lon = [np.append(i[:, 0], i[-1, 1]) for i in (lat, lon)]
         except:
             try:
                 print('WARNING: coord vars not found! -using abrvs.')
@@ -344,9 +865,8 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
                 lat_var = 'lat'
                 print(('Now using: ', lon_var, lat_var))
                 # Extract lat and lon from model output data file
-                with Dataset(data_fname, 'r') as d:
-                    lat = d[lat_var][:]
-                    lon = d[lon_var][:]
+                lat = get_NetCDF_var(data_fname, lat_var, engine=engine)
+                lon = get_NetCDF_var(data_fname, lon_var, engine=engine)
             except IOError:
                 error = "Could not get {lat}, {lon} from {fn}"\
                         .format(fn=data_fname, lat=lat_bounds,
@@ -408,30 +928,7 @@ def get_latlonalt4res(res=None, centre=True, hPa=False, nest=None,
         else:
             lat = np.arange(-89.95833588, 89.95833588+step_size, step_size)
             lon = np.arange(-179.95832825, 179.95835876, step_size)
-    # Get dictionary variable name in Gerrit's GEOS-Chem dimensions list
-    # ( now only doing this for alt, as alt values not in model output? )
-    if hPa:
-        alt = 'c_hPa_geos5'
-    else:
-        alt = 'c_km_geos5'
-    # Use reduced vertical grid? (then add '_r')
-    if not full_vertical_grid:
-        alt += '_r'
-    d = gchemgrid(rtn_dict=True)
-    alt = d[alt]
-
-    # Also provide high resolution grid if requested from this function all
-    if nest == 'high res global':
-        lon, lat = np.arange(-180, 180, 0.25), np.arange(-90, 90, 0.25)
-        return lon, lat, alt
-
-    if debug:
-        print((lon, lat, alt))
-    rtn_list = lon, lat, alt
-    if not isinstance(dtype, type(None)):
-        return [i.astype(dtype) for i in rtn_list]
-    else:
-        return rtn_list
+    return lon, lat
 
 
 def hPa_to_Km(input, reverse=False, debug=False):
@@ -475,6 +972,366 @@ def find_nearest_value(array, value):
     return idx
 
 
+# --- Shared pool of open (read-only) NetCDF file handles
+# ( {abspath: (mtime, netCDF4.Dataset)}, ordered from least to most recently used )
+_NetCDF_handle_pool = OrderedDict()
+# ( {id(netCDF4.Dataset): [netCDF4.Dataset, abspath, callers yet to release it]} )
+_NetCDF_handle_users = {}
+# ( {(abspath, chunks): (mtime, xr.Dataset)} )
+_NetCDF_xr_dataset_pool = {}
+_NetCDF_handle_pool_lock = threading.RLock()
+_NetCDF_handle_pool_max = 16
+
+
+def get_NetCDF_handle(fname, debug=False):
+    """
+    Get an open (read-only) NetCDF file handle from the module's shared pool
+
+    Parameters
+    ----------
+    fname (str): full path of the NetCDF file (e.g. <wd>/ctm.nc)
+    debug (boolean): legacy debug option, replaced by python logging
+
+    Returns
+    -------
+    (netCDF4.Dataset)
+
+    Notes
+    -----
+     - Handles are keyed by file path and modification time, so a file that has
+     been re-written (e.g. by bpch_to_netCDF) is re-opened rather than re-used.
+     - Once more than the maximum number of handles are open, the least recently
+     used handle is dropped from the pool (see set_NetCDF_handle_pool_size).
+     - Each call counts as a user of the handle until release_NetCDF_handle is
+     called. Handles dropped from the pool (or for re-written files) are only
+     closed once all their users have released them, so variables read from
+     a handle stay valid until it is released.
+     - The returned Dataset is shared, so do not close it; use
+     release_NetCDF_handle once finished with it (or close_NetCDF_handles).
+    """
+    fname = os.path.abspath(fname)
+    mtime = os.path.getmtime(fname)
+    with _NetCDF_handle_pool_lock:
+        try:
+            pooled_mtime, rootgrp = _NetCDF_handle_pool.pop(fname)
+            if (pooled_mtime != mtime) or (not rootgrp.isopen()):
+                logging.debug('Re-opening changed NetCDF: {}'.format(fname))
+                _retire_NetCDF_handle(rootgrp)
+                rootgrp = Dataset(fname, 'r')
+        except KeyError:
+            logging.debug('Adding NetCDF to handle pool: {}'.format(fname))
+            rootgrp = Dataset(fname, 'r')
+        # (Re)insert as the most recently used handle
+        _NetCDF_handle_pool[fname] = (mtime, rootgrp)
+        _NetCDF_handle_users.setdefault(id(rootgrp), [rootgrp, fname, 0])[2] += 1
+        # Drop the least recently used handles if over the pool size
+        while len(_NetCDF_handle_pool) > _NetCDF_handle_pool_max:
+            old_fname, (NIU, old_rootgrp) = _NetCDF_handle_pool.popitem(
+                last=False)
+            logging.debug('Dropping pooled NetCDF: {}'.format(old_fname))
+            _retire_NetCDF_handle(old_rootgrp)
+    return rootgrp
+
+
+def release_NetCDF_handle(rootgrp):
+    """
+    Release a NetCDF handle from get_NetCDF_handle once finished with it
+
+    Parameters
+    ----------
+    rootgrp (netCDF4.Dataset): handle returned by get_NetCDF_handle
+
+    Returns
+    -------
+    (None)
+
+    Notes
+    -----
+     - The handle stays open in the pool for re-use, unless it has already been
+     dropped from the pool and this was its last user (then it is closed).
+    """
+    with _NetCDF_handle_pool_lock:
+        try:
+            users = _NetCDF_handle_users[id(rootgrp)]
+        except KeyError:
+            return
+        users[2] -= 1
+        if users[2] > 0:
+            return
+        del _NetCDF_handle_users[id(rootgrp)]
+        pooled = [i for NIU, i in _NetCDF_handle_pool.values()]
+        if not any([i is rootgrp for i in pooled]):
+            logging.debug('Closing released NetCDF: {}'.format(users[1]))
+            _close_NetCDF_handle(rootgrp)
+
+
+def _retire_NetCDF_handle(rootgrp):
+    """ Close a handle dropped from the pool, unless it is still in use """
+    if id(rootgrp) in _NetCDF_handle_users:
+        logging.debug('Delaying close of NetCDF in use: {}'.format(
+            _NetCDF_handle_users[id(rootgrp)][1]))
+        return
+    _close_NetCDF_handle(rootgrp)
+
+
+def set_NetCDF_handle_pool_size(max_handles=16):
+    """
+    Set the maximum number of NetCDF handles held open in the shared pool
+
+    Parameters
+    ----------
+    max_handles (int): maximum number of simultaneously open handles
+
+    Returns
+    -------
+    (None)
+    """
+    global _NetCDF_handle_pool_max
+    assert max_handles >= 1, 'The handle pool must allow at least 1 handle!'
+    with _NetCDF_handle_pool_lock:
+        _NetCDF_handle_pool_max = int(max_handles)
+        while len(_NetCDF_handle_pool) > _NetCDF_handle_pool_max:
+            NIU, (NIU, rootgrp) = _NetCDF_handle_pool.popitem(last=False)
+            _retire_NetCDF_handle(rootgrp)
+
+
+def close_NetCDF_handles(fname=None):
+    """
+    Close pooled NetCDF handles (all handles, or just those for a given file)
+
+    Parameters
+    ----------
+    fname (str): full path of NetCDF file to close handle for (all if None)
+
+    Returns
+    -------
+    (None)
+
+    Notes
+    -----
+     - Handles are closed even if not yet released (including those dropped
+     from the pool that are waiting to be released).
+    """
+    with _NetCDF_handle_pool_lock:
+        if isinstance(fname, type(None)):
+            fnames = list(_NetCDF_handle_pool.keys())
+        else:
+            fnames = [os.path.abspath(fname)]
+        for fname_ in fnames:
+            try:
+                NIU, rootgrp = _NetCDF_handle_pool.pop(fname_)
+                _NetCDF_handle_users.pop(id(rootgrp), None)
+                _close_NetCDF_handle(rootgrp)
+            except KeyError:
+                pass
+        # Also close handles waiting to be released
+        for key, (rootgrp, fname_, NIU) in list(_NetCDF_handle_users.items()):
+            if isinstance(fname, type(None)) or (fname_ in fnames):
+                del _NetCDF_handle_users[key]
+                _close_NetCDF_handle(rootgrp)
+        # And the pooled xarray datasets
+        for key, (NIU, ds) in list(_NetCDF_xr_dataset_pool.items()):
+            if isinstance(fname, type(None)) or (key[0] in fnames):
+                del _NetCDF_xr_dataset_pool[key]
+                ds.close()
+
+
+def get_NetCDF_xr_dataset(fname, chunks=None):
+    """
+    Get a (dask backed) xr.Dataset of a NetCDF file from the module's shared pool
+
+    Parameters
+    ----------
+    fname (str): full path of the NetCDF file (e.g. <wd>/ctm.nc)
+    chunks (dict or str): chunks to open the dataset with (see xr.open_dataset)
+
+    Returns
+    -------
+    (xr.Dataset)
+
+    Notes
+    -----
+     - Datasets are re-used for the same file and chunks. A file that has been
+     re-written is re-opened, and the old dataset closed.
+     - Times are not decoded (as for ctm.nc files read by get_GC_output).
+     - xarray re-opens files as needed, so dask arrays from a dataset that has
+     since been closed can still be computed.
+     - Datasets are closed by close_NetCDF_handles.
+    """
+    import xarray as xr
+    fname = os.path.abspath(fname)
+    mtime = os.path.getmtime(fname)
+    key = (fname, repr(chunks))
+    with _NetCDF_handle_pool_lock:
+        pooled_mtime, ds = _NetCDF_xr_dataset_pool.get(key, (None, None))
+        if pooled_mtime != mtime:
+            if not isinstance(ds, type(None)):
+                logging.debug('Re-opening changed NetCDF: {}'.format(fname))
+                ds.close()
+            ds = xr.open_dataset(fname, chunks=chunks, decode_times=False)
+            _NetCDF_xr_dataset_pool[key] = (mtime, ds)
+    return ds
+
+
+def _close_NetCDF_handle(rootgrp):
+    """ Close a NetCDF handle, ignoring handles that are already closed """
+    try:
+        if rootgrp.isopen():
+            rootgrp.close()
+    except RuntimeError:
+        pass
+
+
+# --- Shared memory maps of uncompressed NetCDF variables
+# ( {abspath: (mtime, scipy netcdf_file or None, {var: read-only array})} )
+_NetCDF_mmap_pool = {}
+
+
+def get_NetCDF_mmap_var(fname, var):
+    """
+    Get a (zero-copy) read-only memory map of an uncompressed NetCDF variable
+
+    Parameters
+    ----------
+    fname (str): full path of the NetCDF file (e.g. <wd>/ctm.nc)
+    var (str): name of variable in NetCDF
+
+    Returns
+    -------
+    (np.array) or None if the variable can not be memory mapped
+
+    Notes
+    -----
+     - NetCDF3 files are mapped with scipy.io.netcdf_file(mmap=True). Contiguous
+     variables without compression in NetCDF4 files are mapped from their file
+     offset (found with h5py, if installed).
+     - Compressed/chunked variables, or those with scale_factor/add_offset,
+     can not be mapped (None is returned).
+     - Arrays are values as stored in the file (e.g. big-endian and without
+     masking of fill values). As the pages are shared via the operating
+     system's page cache, processes reading the same file share one copy.
+    """
+    fname = os.path.abspath(fname)
+    mtime = os.path.getmtime(fname)
+    with _NetCDF_handle_pool_lock:
+        pooled_mtime, ncfile, mmaps = _NetCDF_mmap_pool.get(fname,
+                                                            (None, None, {}))
+        if pooled_mtime != mtime:
+            _close_NetCDF_mmap(ncfile)
+            ncfile, mmaps = None, {}
+        if var not in mmaps:
+            ncfile, mmaps[var] = _get_NetCDF_mmap_var(fname, var,
+                                                      ncfile=ncfile)
+        _NetCDF_mmap_pool[fname] = (mtime, ncfile, mmaps)
+        return mmaps[var]
+
+
+def _get_NetCDF_mmap_var(fname, var, ncfile=None):
+    """ Memory map a NetCDF variable (see get_NetCDF_mmap_var) """
+    rootgrp = get_NetCDF_handle(fname)
+    try:
+        return _get_NetCDF_mmap_var4handle(fname, rootgrp, var, ncfile=ncfile)
+    finally:
+        release_NetCDF_handle(rootgrp)
+
+
+def _get_NetCDF_mmap_var4handle(fname, rootgrp, var, ncfile=None):
+    """ Memory map a NetCDF variable using an open NetCDF handle """
+    var_data = rootgrp.variables[var]
+    if any([(i in var_data.ncattrs()) for i in ('scale_factor', 'add_offset')]):
+        return ncfile, None
+    arr = None
+    if rootgrp.data_model in ('NETCDF3_CLASSIC', 'NETCDF3_64BIT_OFFSET'):
+        from scipy.io import netcdf_file
+        if isinstance(ncfile, type(None)):
+            ncfile = netcdf_file(fname, 'r', mmap=True, maskandscale=False)
+        arr = ncfile.variables[var].data.view()
+    elif rootgrp.data_model in ('NETCDF4', 'NETCDF4_CLASSIC'):
+        filters = var_data.filters()
+        if isinstance(filters, type(None)):
+            filters = {}
+        if any([filters[i] for i in filters if i != 'complevel']) or \
+                (var_data.chunking() != 'contiguous'):
+            return ncfile, None
+        try:
+            import h5py
+        except ImportError:
+            logging.debug('h5py not installed, so can not memory map NetCDF4')
+            return ncfile, None
+        with h5py.File(fname, 'r') as f:
+            offset = f[var].id.get_offset()
+        # ( Variables are not written to disk until given values )
+        if isinstance(offset, type(None)):
+            return ncfile, None
+        endian = {'little': '<', 'big': '>', 'native': '='}[var_data.endian()]
+        dtype = np.dtype(var_data.dtype).newbyteorder(endian)
+        arr = np.memmap(fname, dtype=dtype, mode='r', offset=offset,
+                        shape=var_data.shape).view(np.ndarray)
+    if not isinstance(arr, type(None)):
+        arr.flags.writeable = False
+    return ncfile, arr
+
+
+def close_NetCDF_mmaps():
+    """
+    Release the shared memory maps of NetCDF variables
+
+    Returns
+    -------
+    (None)
+
+    Notes
+    -----
+     - Arrays already returned stay valid (the maps are only closed once no
+     arrays refer to them).
+    """
+    with _NetCDF_handle_pool_lock:
+        for NIU, ncfile, NIU in _NetCDF_mmap_pool.values():
+            _close_NetCDF_mmap(ncfile)
+        _NetCDF_mmap_pool.clear()
+
+
+def _close_NetCDF_mmap(ncfile):
+    """ Close a scipy netcdf_file, without warning if arrays still use it """
+    import warnings
+    if isinstance(ncfile, type(None)):
+        return
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        ncfile.close()
+
+
+def get_NetCDF_var(fname, var, engine='netCDF4'):
+    """
+    Get the values of a NetCDF variable via netCDF4 or a memory map
+
+    Parameters
+    ----------
+    fname (str): full path of the NetCDF file (e.g. <wd>/ctm.nc)
+    var (str): name of variable in NetCDF
+    engine (str): 'netCDF4' to read (copy) values, or 'mmap' to use a read-only
+        memory map if possible (see get_NetCDF_mmap_var)
+
+    Returns
+    -------
+    (np.array)
+    """
+    if engine == 'mmap':
+        arr = get_NetCDF_mmap_var(fname, var)
+        if not isinstance(arr, type(None)):
+            return arr
+    rootgrp = get_NetCDF_handle(fname)
+    try:
+        return rootgrp.variables[var][:]
+    finally:
+        release_NetCDF_handle(rootgrp)
+
+
+# Make sure pooled handles are released when the interpreter exits
+atexit.register(close_NetCDF_handles)
+atexit.register(close_NetCDF_mmaps)
+
+
 def iGEOSChem_ver(wd, also_return_GC_version=False, verbose=True, debug=False):
     """
     Get iGEOS-Chem verson
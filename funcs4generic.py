@@ -14,10 +14,12 @@ NOTE(S):
 import numpy as np
 from matplotlib.backends.backend_pdf import PdfPages
 import matplotlib.pyplot as plt
+import pandas as pd
 from pandas import DataFrame
 # time
 import time
 import datetime as datetime
+from collections import OrderedDict, namedtuple
 # math
 from math import radians, sin, cos, asin, sqrt, pi, atan2
 
@@ -95,7 +97,7 @@ def get_xy(Lon, Lat, lon_edges, lat_edges, debug=False):
     hasobs, lonrange, latrange = np.histogram2d(
         [Lon], [Lat], [lon_edges, lat_edges])
     gridindx, gridindy = np.where(hasobs >= 1)
-    if not gridindx:
+    if len(gridindx) == 0:
         if debug:
             print(('Lat, lon outside of x,y range.  Assigning -1 for', Lon, Lat))
         return -1, -1
@@ -194,17 +196,18 @@ def obs2grid(glon=None, glat=None, galt=None, nest='high res global',
                                              debug=debug)
 
     # Assume use of known CAST sites... unless others given.
+    loc_dict = get_loc(rtn_dict=True)
     if isinstance(sites, type(None)):
-        loc_dict = get_loc(rtn_dict=True)
         sites = list(loc_dict.keys())
 
-    # pull out site location indicies
-    indices_list = []
-    for site in sites:
-        lon, lat, alt = loc_dict[site]
-        vars = get_xy(lon,  lat, glon, glat)
-        indices_list += [vars]
-    return indices_list
+    # pull out site location indicies (for all sites at once)
+    lons = [loc_dict[site][0] for site in sites]
+    lats = [loc_dict[site][1] for site in sites]
+    x, y = get_gridbox_indices(lons, lats, lon_e=glon, lat_e=glat)
+    # Sites outside of the grid are given indices of -1, -1 (as get_xy)
+    outside = (x < 0) | (y < 0)
+    x[outside], y[outside] = -1, -1
+    return list(zip(x, y))
 
 
 
@@ -237,36 +240,47 @@ def get_suffix(n):
     return ordinal(n)
 
 
-def get_shortest_in(needle, haystack, r_distance=False):
+def get_shortest_in(needle, haystack=None, r_distance=False, index=None):
     """
-    needle is a single (lat,long) tuple. haystack is a numpy array to find the point in
-    that has the shortest distance to needle
+    Get the point in haystack with the shortest distance to needle
 
-    NOTES:
-     - adapted from stackoverflow (Credit: jterrace):
+    Parameters
+    ----------
+    needle (tuple): (lat, lon) of point, or an array of points as (N, 2)
+    haystack (np.array): points to search, as (lat, lon) with shape (M, 2)
+    r_distance (boolean): return the distance (miles), rather than the index
+    index (spatial_index): index of haystack (from get_spatial_index), to use
+        instead of haystack
+
+    Returns
+    -------
+    (int or float) index in haystack of (or distance to) the nearest point
+    (np.arrays if an array of needles is given)
+
+    Notes
+    -----
+     - The haystack is indexed once (see get_spatial_index), so repeat calls
+     or arrays of needles do not recompute distances to every point. Finding
+     the cached index still hashes the haystack, so for many single needle
+     calls, pass the index (get_spatial_index(lons, lats)) instead.
+     - previously adapted from stackoverflow (Credit: jterrace):
     (http://stackoverflow.com/questions/6656475/python-speeding-up-geographic-comparison)
     """
     # set Earth's radius
     earth_radius_miles = 3956.0
-
-    # convert to radians
-    dlat = np.radians(haystack[:, 0]) - radians(needle[0])
-    dlon = np.radians(haystack[:, 1]) - radians(needle[1])
-
-    # get the vector
-    a = np.square(np.sin(dlat/2.0)) + cos(radians(needle[0])) * np.cos(
-        np.radians(haystack[:, 0])) * np.square(np.sin(dlon/2.0))
-
-    # convert to distance
-    great_circle_distance = 2 * np.arcsin(np.minimum(np.sqrt(a),
-                                                     np.repeat(1, len(a))))
-    d = earth_radius_miles * great_circle_distance
-
+    needles = np.atleast_2d(np.asarray(needle, dtype=np.float64))
+    if isinstance(index, type(None)):
+        haystack = np.asarray(haystack, dtype=np.float64)
+        index = get_spatial_index(haystack[:, 1], haystack[:, 0])
+    inds, dists = query_spatial_index(index, needles[:, 1], needles[:, 0],
+                                      Re=earth_radius_miles)
+    if np.ndim(needle) == 1:
+        inds, dists = inds[0], dists[0]
     if r_distance:
-        return np.min(d)
+        return dists
     # return the index
     else:
-        return list(d).index(np.min(d))
+        return inds
 
 
 def gen_log_space(limit, n):
@@ -691,7 +705,7 @@ def mask_3D(hPa, sect, MBL=True, res='4x5', extra_mask=None,
         # only consider MBL
         if (MBL and sect == 'BL') or (sect == 'MBL') or M_all:
             if use_multiply_method:
-                return m.mask * extra_mask * land_unmasked(res)
+                return m.mask * extra_mask * get_region_mask('~Land', res=res)
             else:
                 print("WARNING: needs 3D arrays, use 'mask_all_but' instead")
                 sys.exit()
@@ -705,7 +719,7 @@ def mask_3D(hPa, sect, MBL=True, res='4x5', extra_mask=None,
     # --- Only consider MBL (or MFT/MFT for Saiz-Lopez 2014 comparison)
     if (MBL and sect == 'BL') or (sect == 'MBL') or M_all:
         if use_multiply_method:
-            return m.mask * land_unmasked(res)
+            return m.mask * get_region_mask('~Land', res=res)
         else:
             land_unmasked_ = mask_all_but('Land', mask3D=True, res=res,
                                           use_multiply_method=False, trop_limit=trop_limit)
@@ -861,11 +875,10 @@ def location_unmasked(res='4x5', lat=None, lon=None, mask2D=False):
     """
     # Create a dummy array of ones, with all locations masked
     m = np.ma.array(np.ones(get_dims4res(res)), mask=True)
-    # Get location index
+    # Get location index (of the grid box containing it)
     assert all([type(i) == float for i in (lat, lon)]
                ), 'lat & lon must be floats'
-    lat_ind = get_gc_lat(lat=lat, res=res)
-    lon_ind = get_gc_lon(lon=lon, res=res)
+    lon_ind, lat_ind = [i[0] for i in get_gridbox_indices(lon, lat, res=res)]
     # Unmask grid box for location
     m.mask[lon_ind, lat_ind] = False
     # Return 2D or 3D?
@@ -911,7 +924,7 @@ def get_analysis_masks(masks='basic',  hPa=None, M_all=False, res='4x5',
             if M_all:
                 ind = [n for n, i in enumerate(mtitles) if not ('MBL' in i)]
                 for n in ind:
-                    maskes[n] = maskes[n]*land_unmasked(res=res)
+                    maskes[n] = maskes[n]*get_region_mask('~Land', res=res)
         # --- Use pythonic approach
         else:
             maskes = [mask_all_but(i, trop_limit=trop_limit, mask3D=True,
@@ -930,11 +943,8 @@ def get_analysis_masks(masks='basic',  hPa=None, M_all=False, res='4x5',
             [i+' (Tropics)' for i in tsects3D] +   \
             [i+' (Mid Lats)' for i in tsects3D]
         # Standard maskes none, tropics, mid-lats (3)
-        maskes = [
-            np.logical_not(i) for i in (all_unmasked(res=res),
-                                        tropics_unmasked(
-                                            res, saizlopez=saizlopez),
-                                        mid_lats_unmasked(res))]
+        maskes = [get_region_mask(i, res=res, saizlopez=saizlopez)
+                  for i in ('All', 'Tropics', 'Mid Lats')]
         # Additional masks - tsects3D (4+1) * standard maskes (3)
         dmaskes = [
             [mask_3D(hPa, i, MBL=False, extra_mask=mask, M_all=M_all, res=res)
@@ -948,7 +958,7 @@ def get_analysis_masks(masks='basic',  hPa=None, M_all=False, res='4x5',
         if M_all:
             ind = [n for n, i in enumerate(mtitles) if not 'MBL' in i]
             for n in ind:
-                maskes[n] = maskes[n]*land_unmasked(res=res)
+                maskes[n] = maskes[n]*get_region_mask('~Land', res=res)
         if debug:
             print([len(i) for i in (maskes, dmaskes, mtitles, tsects3D)])
         # Also create print strings...
@@ -1009,238 +1019,35 @@ def mask_all_but(region='All', M_all=False, saizlopez=False,
     "unmask_all" yeilds completely unmasked array
     function was oringialyl used to mulitple masks, however, this approch is
     unpythonic and therefore reccomended against.
+    Regions are cached (see get_region_mask), so 3D/4D masks are returned as
+    read-only (broadcast) views. Copy them (e.g. with np.array) to edit.
+    region can also be an expression (e.g. 'Ocean & Tropics').
     """
     logging.info('mask_all_but called for region {}'.format(region))
-    # --- Setup cases...
-    # ( except None, unmask_all and global to retrive no mask )
-    case = {
-        'Tropics': 0,
-        'tropics': 0,
-        'mid_lats': 1,
-        'Mid Lats': 1,
-        'Mid lats': 1,
-        'south_pole': 2,
-        'south pole': 2,
-        'north_pole': 3,
-        'north pole': 3,
-        None: 4,
-        'unmask_all': 4,
-        'All': 4,
-        'global': 4,
-        # NEED TESTING ...
-        'Extratropics': 5,
-        'Ex. Tropics': 5,
-        'Oceanic': 6,
-        'Ocean': 6,
-        'NH': 7,
-        'SH': 8,
-        'Ice': 10,
-        'Land': 11,
-        'lat40_2_40': 12,
-        'Ocean Tropics': 13,
-        'Oceanic Tropics': 13,
-        'Ocn. Trop.': 13,
-        'Land Tropics': 14,
-        'All Sur.': 15,
-        'surface': 15,
-        'Ocean Sur.': 16,
-        'Land Sur.': 17,
-        'Ice Sur.': 18,
-        'lat50_2_50': 19,
-        '50S-50N': 19,
-        #    'Oceanic lat50_2_50': 20,
-        'Ocn. 50S-50N': 20,
-        #     'South >60': 2,
-        #      'North >60': 3
-        'North Sea': 21,
-        'Med. Sea': 22,
-        'Mediterranean Sea': 22,
-        'Black Sea': 23,
-        'Irish Sea': 24,
-        'Europe': 25,
-        'EU': 25,
-        #    'Surface BL': 26,
-        'Land Tropics Sur.': 27,
-        'Boreal Land': 28,
-        'Alps':  29,
-        'loc': 30,
-        'location': 30,
-        'France': 31,
-    }[region]
+    # Build mask from cached regions ( see get_region_mask )
+    if isinstance(region, type(None)):
+        region = 'All'
+    expr = '({})'.format(region)
+    # Apply Saiz-Lopez Marine MFT/MUT?
+    if M_all:
+        if use_multiply_method:  # Kludge
+            expr = '{} & ~Land'.format(expr)
+        else:
+            # check this!!!
+            expr = '{} & Land'.format(expr)
 
     # --- This is a simple way of using masks ( as multiplers )
     # i.e. all (future) functions should have use_multiply_method=False
     # and not use the code below
     if use_multiply_method:  # Kludge
         print(('!'*50, 'WARNING: using mulitply method for masking. '))
-
-        # For case, pull mask from case list
-        if case == 0:
-            mask = tropics_unmasked(res=res, saizlopez=saizlopez)
-        elif case == 1:
-            mask = mid_lats_unmasked(res=res)
-        elif case == 2:
-            mask = southpole_unmasked(res=res)
-        elif case == 3:
-            mask = northpole_unmasked(res=res)
-        elif case == 4:
-            #        mask = np.logical_not( all_unmasked( res=res ) )
-            mask = all_unmasked(res=res)
-        elif case == 5:
-            mask = extratropics_unmasked(res=res)
-        elif case == 6:
-            mask = ocean_unmasked(res=res)
-        elif case == 7:
-            mask = NH_unmasked(res=res)
-        elif case == 8:
-            mask = SH_unmasked(res=res)
-        elif case == 10:
-            mask = ice_unmasked(res=res)
-        elif case == 11:
-            mask = land_unmasked(res=res)
-        elif case == 12:
-            mask = mask_lat40_2_40(res=res)
-        elif case == 13:  # 'Oceanic Tropics'
-            mask = np.ma.mask_or(ocean_unmasked(res=res),
-                                 tropics_unmasked(res=res, saizlopez=saizlopez))
-        elif case == 14:  # 'Land Tropics'
-            mask = np.ma.mask_or(land_unmasked(res=res),
-                                 tropics_unmasked(res=res, saizlopez=saizlopez))
-        elif case == 15:  # 'All Sur.'
-            mask = surface_unmasked(res=res)
-        elif case == 16:  # 'Ocean Sur.'
-            mask = np.ma.mask_or(surface_unmasked(res=res),
-                                 ocean_unmasked(res=res))
-        elif case == 17:  # 'Land Sur.':
-            mask = np.ma.mask_or(surface_unmasked(res=res),
-                                 land_unmasked(res=res))
-        elif case == 18:  # 'Ice Sur.'
-            mask = np.ma.mask_or(surface_unmasked(res=res),
-                                 ice_unmasked(res=res))
-        elif case == 19:  # '50S-50N'
-            mask = lat2lat_2D_unmasked(lowerlat=-50, higherlat=50,
-                                       res=res)
-        elif case == 20:  # 'Ocn. 50S-50N'
-            mask = np.ma.mask_or(lat2lat_2D_unmasked(lowerlat=-50,
-                                                     higherlat=50, res=res), ocean_unmasked(res=res)[..., 0])
-        elif case == 21:
-            mask = get_north_sea_unmasked(res=res)
-        elif case == 25:
-            mask = get_EU_unmasked(res=res)
-#        if case == 26:
-#            mask = get_2D_BL_unmasked( res=res )
-        elif case == 27:  # 'Land Tropics Sur.':
-            tmp = np.ma.mask_or(surface_unmasked(res=res),
-                                land_unmasked(res=res))
-            mask = np.ma.mask_or(tmp, tropics_unmasked(res=res))
-        else:
-            print('WARNING - Mask not setup for case={}'.format(case))
-            sys.exit()
-        # Invert mask to leave exception unmasked if used to multiply
-        mask = np.logical_not(mask)
-
     # --- This is a more pythonic way of using masks (Use as preference)
     else:
-        # For case, pull mask from case list
-        if case == 0:
-            mask = tropics_unmasked(res=res, saizlopez=saizlopez)
-        elif case == 1:
-            mask = mid_lats_unmasked(res=res)
-        elif case == 2:
-            mask = southpole_unmasked(res=res)
-        elif case == 3:
-            mask = northpole_unmasked(res=res)
-        elif case == 4:
-            #        mask = np.logical_not( all_unmasked( res=res ) )
-            mask = all_unmasked(res=res)
-        elif case == 5:
-            mask = extratropics_unmasked(res=res)
-        elif case == 6:
-            mask = ocean_unmasked(res=res)
-        elif case == 7:
-            mask = NH_unmasked(res=res)
-        elif case == 8:
-            mask = SH_unmasked(res=res)
-        elif case == 10:
-            mask = ice_unmasked(res=res)
-        elif case == 11:
-            mask = land_unmasked(res=res)
-        elif case == 12:
-            mask = mask_lat40_2_40(res=res)
-        elif case == 13:
-            mask = np.ma.mask_or(ocean_unmasked(res=res),
-                                 tropics_unmasked(res=res, saizlopez=saizlopez))
-        elif case == 14:
-            mask = np.ma.mask_or(land_unmasked(res=res),
-                                 tropics_unmasked(res=res, saizlopez=saizlopez))
-        elif case == 15:  # 'All Sur.'
-            mask = surface_unmasked(res=res)
-        elif case == 16:  # 'Ocean Sur.'
-            mask = np.ma.mask_or(surface_unmasked(res=res),
-                                 ocean_unmasked(res=res))
-        elif case == 17:  # 'Land Sur.':
-            mask = np.ma.mask_or(surface_unmasked(res=res),
-                                 land_unmasked(res=res))
-        elif case == 18:  # 'Ice Sur.'
-            mask = np.ma.mask_or(surface_unmasked(res=res),
-                                 ice_unmasked(res=res))
-        elif case == 19:
-            mask = lat2lat_2D_unmasked(lowerlat=-50, higherlat=50,
-                                       res=res)
-        elif case == 20:
-            mask = np.ma.mask_or(lat2lat_2D_unmasked(lowerlat=-50,
-                                                     higherlat=50, res=res), ocean_unmasked(res=res)[..., 0])
-        elif case == 21:
-            mask = get_north_sea_unmasked(res=res)
-        elif case == 22:
-            mask = get_mediterranean_sea_unmasked(res=res)
-        elif case == 23:
-            mask = get_unmasked_black_sea(res=res)
-        elif case == 24:
-            mask = get_unmasked_irish_sea(res=res)
-        elif case == 25:
-            mask = get_EU_unmasked(res=res)
-#        if case == 26:
-#            mask = get_2D_BL_unmasked( res=res )
-        elif case == 27:  # 'Land Tropics Sur.':
-            tmp = np.ma.mask_or(surface_unmasked(res=res),
-                                land_unmasked(res=res))
-            mask = np.ma.mask_or(tmp, tropics_unmasked(res=res))
-        elif case == 28:
-            mask = np.ma.mask_or(lat2lat_2D_unmasked(lowerlat=50,
-                                                     higherlat=80, res=res), land_unmasked(res=res)[..., 0])
-        elif case == 29:  # Alps
-            # Alps mask
-            lowerlat = 43
-            higherlat = 47
-            lowerlon = 5
-            higherlon = 15
-            # Get a mask for lat and lon range, then combine
-            mask1 = lat2lat_2D_unmasked(res=res, lowerlat=lowerlat,
-                                        higherlat=higherlat)
-            mask2 = lon2lon_2D_unmasked(res=res, lowerlon=lowerlon,
-                                        higherlon=higherlon)
-            mask = np.ma.mask_or(mask1, mask2)
-        elif case == 30:  # Location ('loc' )
-            # Alps
-            mask = location_unmasked(lat=lat, lon=lon, res=res)
-        elif case == 31:  # Rough(!) France map
-            # mask
-            mask = get_France_unmasked(res=res)
-
-        else:
-            print('WARNING - Mask not setup for case={}'.format(case))
-            sys.exit()
+        expr = '~({})'.format(expr)
+    mask = get_region_mask(expr, res=res, saizlopez=saizlopez, lat=lat,
+                           lon=lon)
 
     logging.debug('prior to setting dimensions: {}'.format(mask.shape))
-    # Apply Saiz-Lopez Marine MFT/MUT? <= should this be before multiply op.?
-    if M_all:
-        if use_multiply_method:  # Kludge
-            mask = mask*land_unmasked(res=res)
-        else:
-            # check this!!!
-            mask = np.ma.mask_or(mask, land_unmasked(res=res))
-
     # Ensure returned arrays are 2D
     if mask2D:
         if len(mask.shape) == 2:
@@ -1250,15 +1057,14 @@ def mask_all_but(region='All', M_all=False, saizlopez=False,
         elif len(mask.shape) == 4:
             mask = mask[..., 0, 0]
 
-    # Create 3D array by concatenating through altitude dimension
+    # Create 3D array by broadcasting through altitude dimension
     if mask3D:
         if any([(mask.shape[-1] == i) for i in (38, 47)]):
             pass
-        else:  # concatenate dimensions
-            if len(mask.shape) == 3:
-                mask = np.concatenate([mask]*47, axis=2)
-            elif len(mask.shape) == 2:
-                mask = np.concatenate([mask[..., None]]*47, axis=2)
+        else:  # broadcast dimensions
+            if len(mask.shape) == 2:
+                mask = mask[..., None]
+            mask = np.broadcast_to(mask, mask.shape[:2]+(47,))
 
     # Remove above the "chemical tropopause" from GEOS-Chem (v9-2)
     if trop_limit:
@@ -1267,18 +1073,575 @@ def mask_all_but(region='All', M_all=False, saizlopez=False,
         else:
             mask = mask[..., :38]
 
-    # Create 4D array by concatenating through time dimension
+    # Create 4D array by broadcasting through time dimension
     # ( assuming year long array of 1 months )
     if mask4D:
         if any([(mask.shape[-1] == i) for i in [12]]):
             pass
-        else:  # concatenate dimensions
-            mask = np.concatenate([mask[..., None]]*12, axis=3)
+        else:  # broadcast dimensions
+            mask = np.broadcast_to(mask[..., None], mask.shape+(12,))
     logging.debug('post to setting dimensions: {}'.format(mask.shape))
     logging.info("returning a 'mask' of type:{}".format(type(mask)))
     return mask
 
 
+# --- Cache of 2D region masks ( as packed bits, keyed by region, res and
+# any arguments used to build them )
+_region_mask_cache = {}
+
+# Alternative names for regions
+_region_aliases = {
+    None: 'All',
+    'unmask_all': 'All',
+    'global': 'All',
+    'tropics': 'Tropics',
+    'mid_lats': 'Mid Lats',
+    'Mid lats': 'Mid Lats',
+    'south_pole': 'South Pole',
+    'south pole': 'South Pole',
+    'north_pole': 'North Pole',
+    'north pole': 'North Pole',
+    'Extratropics': 'Ex. Tropics',
+    'Oceanic': 'Ocean',
+    'Oceanic Tropics': 'Ocean Tropics',
+    'Ocn. Trop.': 'Ocean Tropics',
+    'surface': 'All Sur.',
+    'lat50_2_50': '50S-50N',
+    'Mediterranean Sea': 'Med. Sea',
+    'EU': 'Europe',
+    'location': 'loc',
+}
+
+# Regions that are combinations of other regions and sections
+_region_expressions = {
+    'Ocean Tropics': 'Ocean & Tropics',
+    'Land Tropics': 'Land & Tropics',
+    'All Sur.': 'Surface',
+    'Ocean Sur.': 'Surface & Ocean',
+    'Land Sur.': 'Surface & Land',
+    'Ice Sur.': 'Surface & Ice',
+    'Ocn. 50S-50N': '50S-50N & Ocean',
+    'Land Tropics Sur.': 'Surface & (Land & Tropics)',
+    'Boreal Land': '50N-80N & Land',
+    'MBL': 'BL & ~Land',
+}
+
+# Sections of the atmosphere by pressure (hPa) ( lower and upper bounds )
+_region_hPa_sections = {
+    'BL': [1200., 900.], 'FT': [900., 350.], 'UT': [350., 75.],
+}
+
+
+def get_region_mask(region='All', res='4x5', hPa=None, saizlopez=False,
+                    lat=None, lon=None):
+    """
+    Get boolean array that is True within a region (or combination of regions)
+
+    Parameters
+    -------
+    region (str): name of region (as for mask_all_but), section of the
+        atmosphere ('Surface', 'BL', 'MBL', 'FT' or 'UT') or an expression
+        combining these with & (and), | (or), ~ (not) and brackets
+        (e.g. 'Ocean & Tropics & MBL')
+    res (str): the resolution of the model grid (e.g. '4x5' )
+    hPa (array): pressure (hPa) of grid boxes (needed for BL, MBL, FT and UT)
+    saizlopez (boolean): use tropics definition from Saiz-Lopez er al 2014
+    lon, lat (float): lat/lon locations to leave nearest grid box unmasked
+        (for region 'loc')
+
+    Returns
+    -------
+    (np.array) with dimensions of (lon, lat) or (lon, lat, alt)
+
+    Notes
+    -----
+     - The 2D mask of each region is built once per resolution, then cached as
+     packed bits. Combinations of regions are made in 2D, then broadcast to
+     the levels of the mask functions they came from (e.g. 47 for
+     tropics_unmasked, 1 for land_unmasked) as a read-only view.
+     - Sections of the atmosphere give (lon, lat, alt) arrays.
+     - Use np.logical_not (or "~") for a np.ma style mask (True outside region)
+    """
+    if isinstance(region, type(None)):
+        region = 'All'
+    kwargs = {'res': res, 'hPa': hPa, 'saizlopez': saizlopez, 'lat': lat,
+              'lon': lon}
+    mask, nlev = _get_region_mask4expression(region, **kwargs)
+    if (mask.ndim == 2) and (not isinstance(nlev, type(None))):
+        mask = np.broadcast_to(mask[..., None], mask.shape+(nlev,))
+    return mask
+
+
+def _get_region_mask4expression(region, **kwargs):
+    """
+    Evaluate a region expression, returning (mask, number of levels)
+
+    Notes
+    -----
+     - Masks are (lon, lat) arrays with a number of levels to broadcast them
+     to (None for 2D), or (lon, lat, alt) arrays (with their number of levels)
+    """
+    import re
+    tokens = [i.strip() for i in re.split(r'([&|~()])', region)]
+    tokens = [i for i in tokens if i != '']
+    err_msg = "Could not understand region '{}'".format(region)
+
+    def get_or(pos):
+        mask, pos = get_and(pos)
+        while (pos < len(tokens)) and (tokens[pos] == '|'):
+            other, pos = get_and(pos+1)
+            mask = _combine_region_masks(mask, other, np.logical_or)
+        return mask, pos
+
+    def get_and(pos):
+        mask, pos = get_not(pos)
+        while (pos < len(tokens)) and (tokens[pos] == '&'):
+            other, pos = get_not(pos+1)
+            mask = _combine_region_masks(mask, other, np.logical_and)
+        return mask, pos
+
+    def get_not(pos):
+        if pos >= len(tokens):
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        if tokens[pos] == '~':
+            (mask, nlev), pos = get_not(pos+1)
+            return (np.logical_not(mask), nlev), pos
+        if tokens[pos] == '(':
+            mask, pos = get_or(pos+1)
+            if (pos >= len(tokens)) or (tokens[pos] != ')'):
+                logging.error(err_msg)
+                raise ValueError(err_msg)
+            return mask, pos+1
+        if tokens[pos] in '&|)':
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        return _get_region_mask4name(tokens[pos], **kwargs), pos+1
+
+    mask, pos = get_or(0)
+    if pos != len(tokens):
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    return mask
+
+
+def _combine_region_masks(mask1, mask2, operator):
+    """ Combine two (mask, number of levels) pairs with a logical operator """
+    (mask1, nlev1), (mask2, nlev2) = mask1, mask2
+    # Combine horizontal regions in 2D
+    if (mask1.ndim == 2) and (mask2.ndim == 2):
+        nlevs = [i for i in (nlev1, nlev2) if not isinstance(i, type(None))]
+        nlev = None
+        # A 2D (lon, lat) region removes a singular level (lon, lat, 1)
+        if len(nlevs) == 2:
+            nlev = max(nlevs)
+        elif (len(nlevs) == 1) and (nlevs[0] != 1):
+            nlev = nlevs[0]
+        return operator(mask1, mask2), nlev
+    # Otherwise combine as (lon, lat, alt)
+    if mask1.ndim == 2:
+        mask1 = mask1[..., None]
+    if mask2.ndim == 2:
+        mask2 = mask2[..., None]
+    mask = operator(mask1, mask2)
+    return mask, mask.shape[-1]
+
+
+def _get_region_mask4name(name, res='4x5', hPa=None, saizlopez=False,
+                          lat=None, lon=None):
+    """ Get (mask, number of levels) for a named region or section """
+    name = _region_aliases.get(name, name)
+    kwargs = {'res': res, 'hPa': hPa, 'saizlopez': saizlopez, 'lat': lat,
+              'lon': lon}
+    if name in _region_expressions:
+        return _get_region_mask4expression(_region_expressions[name],
+                                           **kwargs)
+    # Sections of the atmosphere
+    if name == 'Surface':
+        dims = get_dims4res(res)
+        mask = np.broadcast_to(np.arange(dims[-1]) == 0, dims)
+        return mask, dims[-1]
+    if name in _region_hPa_sections:
+        if isinstance(hPa, type(None)):
+            err_msg = 'hPa must be provided for region: {}'.format(name)
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        l, h = _region_hPa_sections[name]
+        mask = (hPa < l) & (hPa >= h)
+        return mask, mask.shape[-1]
+    # Regions ( built once, then cached )
+    builders = _get_region_mask_builders()
+    if name not in builders:
+        err_msg = 'Mask not setup for region: {}'.format(name)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    func, args = builders[name]
+    kwargs = dict([(i, kwargs[i]) for i in args])
+    key = (name, res) + tuple(sorted(kwargs.items()))
+    try:
+        packed, shape, nlev = _region_mask_cache[key]
+    except KeyError:
+        # Region functions return a np.ma style mask (True outside region)
+        mask = np.logical_not(func(res=res, **kwargs))
+        nlev = None
+        if mask.ndim == 3:
+            mask, nlev = mask[..., 0], mask.shape[-1]
+        packed, shape = np.packbits(mask), mask.shape
+        _region_mask_cache[key] = packed, shape, nlev
+    mask = np.unpackbits(packed)[:shape[0]*shape[1]].reshape(shape)
+    return mask.astype(bool), nlev
+
+
+def _get_region_mask_builders():
+    """ Get functions (and their arguments) to build region masks """
+    from functools import partial
+    return {
+        'All': (all_unmasked, ()),
+        'Tropics': (tropics_unmasked, ('saizlopez',)),
+        'Mid Lats': (mid_lats_unmasked, ()),
+        'South Pole': (southpole_unmasked, ()),
+        'North Pole': (northpole_unmasked, ()),
+        'Ex. Tropics': (extratropics_unmasked, ()),
+        'Ocean': (ocean_unmasked, ()),
+        'NH': (NH_unmasked, ()),
+        'SH': (SH_unmasked, ()),
+        'Ice': (ice_unmasked, ()),
+        'Land': (land_unmasked, ()),
+        'lat40_2_40': (mask_lat40_2_40, ()),
+        '50S-50N': (partial(lat2lat_2D_unmasked, lowerlat=-50, higherlat=50),
+                    ()),
+        '50N-80N': (partial(lat2lat_2D_unmasked, lowerlat=50, higherlat=80),
+                    ()),
+        'Med. Sea': (get_mediterranean_sea_unmasked, ()),
+        'Black Sea': (get_black_sea_unmasked, ()),
+        'Europe': (get_EU_unmasked, ()),
+        'Alps': (get_Alps_unmasked, ()),
+        'loc': (location_unmasked, ('lat', 'lon')),
+        'France': (get_France_unmasked, ()),
+    }
+
+
+def get_regional_stats(arrs, masks, specs=None, regions=None, weights=None,
+                       times=None, stats=('mean', 'sum', 'p5', 'p50', 'p95'),
+                       time_axis=-1, res='4x5'):
+    """
+    Get statistics of arrays for many regions at once (as a tidy DataFrame)
+
+    Parameters
+    -------
+    arrs (list): arrays (e.g. of species) with dimensions (lon, lat, alt, time)
+        or (lon, lat, time). np.ma masked and NaN values are ignored.
+    masks (list): boolean arrays, True within region (e.g. from
+        get_region_mask), or names of regions (see get_region_mask)
+    specs (list): names of arrays (e.g. species)
+    regions (list): names of regions (default: masks if names, else numbers)
+    weights (array): weights for mean and sum (e.g. surface area, air mass or
+        molecules)
+    times (list): labels for the time dimension (e.g. months)
+    stats (list): statistics to calculate. 'mean' and 'sum' (weighted, if
+        weights are given), 'count', 'min', 'max', 'median' and percentiles
+        (e.g. 'p5' for the 5th percentile)
+    time_axis (int): axis of time dimension (None if arrays have no time)
+    res (str): the resolution for masks given as names (e.g. '4x5' )
+
+    Returns
+    -------
+    (pd.DataFrame) with columns region, species, time, stat and value
+
+    Notes
+    -----
+     - Masks and weights with fewer dimensions than the arrays are broadcast
+     over the extra (trailing) dimensions (e.g. (lon, lat) for surface area).
+     For arrays without altitude, the surface of 3D masks is used.
+     - Means and sums for all regions and arrays are calculated together as
+     one matrix product (np.tensordot) of masks and arrays, rather than
+     making a masked copy of each array for each region. Percentiles, min and
+     max use one selection of the grid boxes in each region.
+     - Percentiles are not weighted.
+    """
+    import warnings
+    if isinstance(arrs, np.ndarray):
+        arrs = [arrs]
+    if isinstance(masks, (str, np.ndarray)):
+        masks = [masks]
+    # Move time to the last dimension (adding one if not present)
+    if isinstance(time_axis, type(None)):
+        arrs = [np.ma.asanyarray(i)[..., None] for i in arrs]
+    else:
+        arrs = [np.moveaxis(np.ma.asanyarray(i), time_axis, -1) for i in arrs]
+    shape = arrs[0].shape
+    nspec, ntime = len(arrs), shape[-1]
+    npoint = int(np.prod(shape[:-1]))
+    # Set names (and labels) for dimensions
+    if isinstance(specs, type(None)):
+        specs = list(range(nspec))
+    if isinstance(regions, type(None)):
+        regions = [i if isinstance(i, str) else n
+                   for n, i in enumerate(masks)]
+    if isinstance(times, type(None)):
+        times = list(range(ntime))
+    # Get data as (species, points, time), with invalid values set to zero
+    data = np.empty((nspec, npoint, ntime))
+    valid = np.empty((nspec, npoint, ntime), dtype=bool)
+    for n, arr in enumerate(arrs):
+        data[n] = np.ma.getdata(arr).reshape(npoint, ntime)
+        valid[n] = ~np.ma.getmaskarray(arr).reshape(npoint, ntime)
+    valid &= np.isfinite(data)
+    data[~valid] = 0
+    # Get masks as (region, points)
+    M = np.empty((len(masks), npoint), dtype=bool)
+    for n, mask in enumerate(masks):
+        if isinstance(mask, str):
+            mask = get_region_mask(mask, res=res)
+        mask = np.asarray(mask).astype(bool)
+        # Use the surface of 3D masks for 2D (lon, lat) arrays
+        while mask.ndim > (len(shape)-1):
+            mask = mask[..., 0]
+        mask = mask.reshape(mask.shape + (1,)*(len(shape)-1-mask.ndim))
+        M[n] = np.broadcast_to(mask, shape[:-1]).ravel()
+    # Weighted sums, weights and counts as (region, species, time)
+    Mf = M.astype(np.float64)
+    count = np.tensordot(Mf, valid, axes=([1], [1]))
+    if isinstance(weights, type(None)):
+        sums = np.tensordot(Mf, data, axes=([1], [1]))
+        wsums = count
+    else:
+        weights = np.asarray(np.ma.filled(weights, 0), dtype=np.float64)
+        weights = weights.reshape(weights.shape +
+                                  (1,)*(len(shape)-weights.ndim))
+        weights = np.broadcast_to(weights, shape).reshape(npoint, ntime)
+        sums = np.tensordot(Mf, data*weights, axes=([1], [1]))
+        wsums = np.tensordot(Mf, valid*weights, axes=([1], [1]))
+    values = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        for stat in stats:
+            if stat == 'mean':
+                values[stat] = sums / wsums
+            elif stat == 'sum':
+                values[stat] = sums
+            elif stat == 'count':
+                values[stat] = count
+        # Min, max and percentiles from grid boxes in each region
+        pstats = [i for i in stats if i not in ('mean', 'sum', 'count')]
+        if len(pstats) > 0:
+            percentiles = []
+            for stat in pstats:
+                if stat in ('min', 'max', 'median'):
+                    percentiles += [{'min': 0, 'max': 100, 'median': 50}[stat]]
+                elif stat.startswith('p'):
+                    percentiles += [float(stat[1:])]
+                else:
+                    err_msg = 'Statistic not recognised: {}'.format(stat)
+                    logging.error(err_msg)
+                    raise ValueError(err_msg)
+            pvalues = np.full((len(pstats), len(masks), nspec, ntime), np.nan)
+            for n in range(len(masks)):
+                ind = np.flatnonzero(M[n])
+                if len(ind) == 0:
+                    continue
+                region_data = np.where(valid[:, ind, :], data[:, ind, :],
+                                       np.nan)
+                pvalues[:, n] = _get_nan_percentiles(region_data, percentiles)
+            for n, stat in enumerate(pstats):
+                values[stat] = pvalues[n]
+    # Return as a tidy DataFrame
+    index = pd.MultiIndex.from_product([regions, specs, times],
+                                       names=['region', 'species', 'time'])
+    df = pd.DataFrame(dict([(i, values[i].ravel()) for i in stats]),
+                      index=index, columns=list(stats))
+    df = df.reset_index().melt(id_vars=['region', 'species', 'time'],
+                               var_name='stat', value_name='value')
+    return df
+
+
+def _get_nan_percentiles(arr, percentiles):
+    """
+    Get percentiles of (species, points, time) array over points, ignoring NaNs
+
+    Notes
+    -----
+     - Same as np.nanpercentile (linear interpolation), but sorts each array
+     once and is vectorised (np.nanpercentile loops over 1D slices if there
+     are any NaNs).
+    """
+    arr = np.sort(arr, axis=1)  # NaNs are sorted to the end
+    n = np.sum(~np.isnan(arr), axis=1)[:, None, :]
+    values = np.full((len(percentiles), arr.shape[0], arr.shape[2]), np.nan)
+    for i, percentile in enumerate(percentiles):
+        pos = (percentile / 100.) * np.maximum(n-1, 0)
+        low = np.floor(pos).astype(int)
+        high = np.minimum(low+1, np.maximum(n-1, 0))
+        low_values = np.take_along_axis(arr, low, axis=1)
+        high_values = np.take_along_axis(arr, high, axis=1)
+        values[i] = (low_values + (high_values-low_values)*(pos-low))[:, 0]
+    values[:, n[:, 0] == 0] = np.nan
+    return values
+
+
+# Label rasters of sets of regions (see get_region_labels)
+_region_labels_cache = {}
+region_labels = namedtuple('region_labels', ['labels', 'regions', 'lut'])
+
+
+def get_region_labels(regions, res='4x5', mask2D=True, saizlopez=False):
+    """
+    Get a set of regions as one integer label array and a membership table
+
+    Parameters
+    -------
+    regions (list): names of regions or expressions (see get_region_mask)
+    res (str): the resolution of the model grid (e.g. '4x5' )
+    mask2D (boolean): use (lon, lat) masks, rather than (lon, lat, alt)
+    saizlopez (boolean): use tropics definition from Saiz-Lopez er al 2014
+
+    Returns
+    -------
+    (region_labels) named tuple of labels (np.array of the smallest unsigned
+    integer type with dimensions (lon, lat) or (lon, lat, alt)), regions
+    (tuple of names) and lut (np.array of uint8, with dimensions of
+    (region, label), that is 1 if a label is within a region)
+
+    Notes
+    -----
+     - Regions may overlap (e.g. 'Tropics' and 'Ocean'), so each label is a
+     unique combination of the regions a grid box is within. The regions are
+     then a lookup of the labels (see get_region_membership) and regional
+     sums/means are a np.bincount over labels (see get_regional_values4labels)
+     - A label array takes 1-2 bytes per grid box for the whole set of
+     regions, rather than a boolean or float64 array for each region.
+     - Label arrays are cached per set of regions and resolution (read-only).
+    """
+    if isinstance(regions, str):
+        regions = [regions]
+    regions = tuple(regions)
+    key = (regions, res, mask2D, saizlopez)
+    try:
+        return _region_labels_cache[key]
+    except KeyError:
+        pass
+    masks = []
+    for region in regions:
+        mask = get_region_mask(region, res=res, saizlopez=saizlopez)
+        if mask2D:
+            while mask.ndim > 2:
+                mask = mask[..., 0]
+        masks += [np.asarray(mask, dtype=bool)]
+    # Broadcast any 2D masks to the altitude of 3D masks
+    shape = np.broadcast_shapes(*[i.shape + (1,)*(3-i.ndim) if not mask2D
+                                  else i.shape for i in masks])
+    masks = [np.broadcast_to(i.reshape(i.shape+(1,)*(len(shape)-i.ndim)),
+                             shape) for i in masks]
+    # Label each unique combination of regions (as packed bits)
+    bits = np.packbits(np.stack(masks, axis=-1), axis=-1)
+    bits = np.ascontiguousarray(bits).reshape(-1, bits.shape[-1])
+    codes, labels = np.unique(bits, axis=0, return_inverse=True)
+    lut = np.unpackbits(codes, axis=-1)[:, :len(regions)].T
+    dtype = np.min_scalar_type(max(len(codes)-1, 0))
+    labels = labels.astype(dtype).reshape(shape)
+    labels.setflags(write=False)
+    lut = np.ascontiguousarray(lut, dtype=np.uint8)
+    lut.setflags(write=False)
+    _region_labels_cache[key] = region_labels(labels, regions, lut)
+    return _region_labels_cache[key]
+
+
+def get_region_membership(labels, region):
+    """
+    Get array that is 1 within a region of a set of labels (see
+    get_region_labels)
+
+    Parameters
+    -------
+    labels (region_labels): labels of a set of regions
+    region (str): name of region in the set
+
+    Returns
+    -------
+    (np.array) of uint8 with dimensions of labels (use .astype(bool) for a
+    boolean array or ~ for a np.ma style mask)
+    """
+    try:
+        n = labels.regions.index(region)
+    except ValueError:
+        err_msg = 'Region not in labels: {} ({})'.format(region,
+                                                        labels.regions)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    return labels.lut[n][labels.labels]
+
+
+def get_regional_values4labels(arr, labels, weights=None, stat='mean'):
+    """
+    Get sums, means or counts of an array in each region of a set of labels
+
+    Parameters
+    -------
+    arr (array): array with dimensions of labels, plus any extra trailing
+        dimensions (e.g. (lon, lat, time) for (lon, lat) labels). np.ma
+        masked and NaN values are ignored.
+    labels (region_labels): labels of a set of regions (see get_region_labels)
+    weights (array): weights for mean and sum (e.g. surface area or air mass)
+    stat (str): statistic to calculate ('sum', 'mean' or 'count')
+
+    Returns
+    -------
+    (np.array) with dimensions of (region, extra dimensions of arr)
+
+    Notes
+    -----
+     - Each label is summed once with np.bincount, then the sums of labels
+     are added up for each region (lut matrix product).
+    """
+    import warnings
+    if stat not in ('sum', 'mean', 'count'):
+        err_msg = 'Statistic not recognised: {}'.format(stat)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    arr = np.ma.asanyarray(arr)
+    lshape = labels.labels.shape
+    if arr.shape[:len(lshape)] != lshape:
+        err_msg = 'Array shape {} does not start with labels shape {}'.format(
+            arr.shape, lshape)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    extra = arr.shape[len(lshape):]
+    npoint, nextra = int(np.prod(lshape)), int(np.prod(extra))
+    nlabel = labels.lut.shape[1]
+    data = np.ma.getdata(arr).reshape(npoint, nextra).astype(np.float64)
+    valid = ~np.ma.getmaskarray(arr).reshape(npoint, nextra)
+    valid &= np.isfinite(data)
+    data[~valid] = 0
+    if not isinstance(weights, type(None)):
+        weights = np.asarray(np.ma.filled(weights, 0), dtype=np.float64)
+        weights = weights.reshape(weights.shape +
+                                  (1,)*(arr.ndim-weights.ndim))
+        weights = np.broadcast_to(weights, arr.shape).reshape(npoint, nextra)
+    # One bincount over (label, extra) bins, offsetting labels of each column
+    bins = (labels.labels.reshape(npoint, 1).astype(np.intp) +
+            np.arange(nextra)*nlabel).ravel()
+
+    def _bincount(vals):
+        vals = np.bincount(bins, weights=vals.ravel(),
+                           minlength=nlabel*nextra)
+        return labels.lut.dot(vals.reshape(nextra, nlabel).T)
+    if stat == 'count':
+        values = _bincount(valid.astype(np.float64))
+    elif isinstance(weights, type(None)):
+        values = _bincount(data)
+        if stat == 'mean':
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                values = values / _bincount(valid.astype(np.float64))
+    else:
+        values = _bincount(data*weights)
+        if stat == 'mean':
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                values = values / _bincount(valid*weights)
+    return values.reshape((len(labels.regions),) + extra)
+
+
 def lon2lon_2D_unmasked(lowerlon, higherlon, res='2x2.5', debug=False):
     """
     Takes a lower and higher latitude value and then creates
@@ -1367,6 +1730,21 @@ def get_France_unmasked(res='4x5'):
     return mask
 
 
+def get_Alps_unmasked(res='4x5'):
+    """ A rough Mask of the Alps """
+    # Alps mask
+    lowerlat = 43
+    higherlat = 47
+    lowerlon = 5
+    higherlon = 15
+    # Get a mask for lat and lon range, then combine
+    mask1 = lat2lat_2D_unmasked(res=res, lowerlat=lowerlat,
+                                higherlat=higherlat)
+    mask2 = lon2lon_2D_unmasked(res=res, lowerlon=lowerlon,
+                                higherlon=higherlon)
+    return np.ma.mask_or(mask1, mask2)
+
+
 def get_mediterranean_sea_unmasked(res='0.25x0.3125'):
     """
     A rough Mask of the Mediterranean Sea for use with ~0.5/~0.25 mdodel output.
@@ -1612,7 +1990,8 @@ def convert_mg_per_m3_2_ppbv(data=None,  spec='O3', rtn_units=False,
 
 
 def get_2D_nighttime_mask4date_pd(date=None, ncfile=None, res='4x5',
-                                  mask_daytime=False, buffer_hours=0, debug=False):
+                                  mask_daytime=False, buffer_hours=0,
+                                  use_cache=False, debug=False):
     """
     Creates 2D (lon,lat) masked (1=Masked) for nighttime for a given list of
     dates
@@ -1627,6 +2006,9 @@ def get_2D_nighttime_mask4date_pd(date=None, ncfile=None, res='4x5',
      (This will act to increase the size of the mask - e.g. if masking
       nightime, then an extra hour of nightime would be added to sunrise, and
       removed from sunset. )
+    use_cache (boolean): use the hourly on-disk cache of daytime values (see
+        get_solar_cube4year), with date rounded to the nearest hour (not used
+        if buffer_hours are given)
 
     Returns
     -------
@@ -1638,21 +2020,10 @@ def get_2D_nighttime_mask4date_pd(date=None, ncfile=None, res='4x5',
     -----
      - if ncfile provide programme will work for that grid.
     """
-    # Astronomical math
-    import ephem
-    from ephem import AlwaysUpError, NeverUpError
-    # And functions in other AC_tools modules
-    from .funcs4time import add_days, add_hrs
+    # Vectorised solar calculations
+    from .funcs4time import get_daytime_mask4dates
     logging.info('get_2D_nighttime_mask4date_pd called for {}'.format(date))
 
-    # Profile function...
-    if debug:
-        start_time = time.time()
-
-    # --- Local variables?
-    # reference data for ephem (number of days since noon on 1899 December 31)
-    ref_date = datetime.datetime(1899, 12, 31, 12)
-
     # --- Get LON and LAT variables
     if isinstance(ncfile, type(None)):
         # extract from refence files
@@ -1662,142 +2033,20 @@ def get_2D_nighttime_mask4date_pd(date=None, ncfile=None, res='4x5',
         # lons from ncfile file/arguments.
         print('Not implemented')
         sys.exit()
-    if debug:
-        print(("--- (start-1) %s seconds ---" % (time.time() - start_time)))
-
-    # --- setup function to mask based on date, lat and lon
-    def mask_nighttime(lon, lat, date=date, mask_daytime=mask_daytime,
-                       ref_date=datetime.datetime(1899, 12, 31, 12),
-                       buffer_hours=buffer_hours, debug=False):
-        """
-        sub-function to mask if nightime for a given date at a specific lat/lon
-        """
-        # --- get lat and lon values from columns
-        if debug:
-            print(("--- (s4-1) %s seconds ---" % (time.time() - start_time)))
-        # --- get sunrise and sunset for location
-        o = ephem.Observer()
-        # set lat (decimal?), lon (decimal?), and date (UTC)
-        o.lat = str(lat)
-        o.long = str(lon)
-        o.date = date
-        # planetary body
-        s = ephem.Sun()
-        if debug:
-            print(("--- (s4-2) %s seconds ---" % (time.time() - start_time)))
 
-        # Compute sun vs observer
-        s.compute()
-        if debug:
-            print(("--- (s4-3) %s seconds ---" % (time.time() - start_time)))
+    # --- Lookup mask from the cache of daytime values
+    if use_cache and (buffer_hours == 0):
+        mask = get_solar_values4dates([date], res=res, var='daytime')
+        if not mask_daytime:
+            mask = ~mask
+        return mask[..., 0].T.astype(int)
 
-        # Work out if day or night based on sunrises and sunsets
-        mask_value = 0
-        try:
-
-            # get sunrise time and date
-            next_rising = o.next_rising(s)
-            next_setting = o.next_setting(s)
-
-            # convert to datetime.datetime
-            next_rising = add_days(ref_date, next_rising)
-            next_setting = add_days(ref_date, next_setting)
-
-            # did the sun last rise or set? (inc. any adjustments)
-            sun_last_rose = False
-            if next_setting < next_rising:
-                sun_last_rose = True
-
-            # Add buffer to rising/setting if provided with buffer_hours
-            if buffer_hours != 0:
-
-                # Calculate last rise
-                previous_rising = o.previous_rising(s)
-                # convert to datetime.datetime
-                previous_rising = add_days(ref_date, previous_rising)
-                # Calculate last setting
-                previous_setting = o.previous_setting(s)
-                # convert to datetime.datetime
-                previous_setting = add_days(ref_date, previous_setting)
-
-                # Calculate absolute difference
-                time_from_rise = (date-previous_rising).total_seconds()
-                time_till_set = (date-next_setting).total_seconds()
-                time_from_set = (date-previous_setting).total_seconds()
-                time_till_rise = (date-next_rising).total_seconds()
-
-                # If absolutely difference less than buffer
-                if abs(time_from_rise)/60./60. <= buffer_hours:
-                    mask_value = 1
-                elif abs(time_till_set)/60./60. <= buffer_hours:
-                    mask_value = 1
-                elif abs(time_from_set)/60./60. < buffer_hours:
-                    mask_value = 1
-                elif abs(time_till_rise)/60./60. < buffer_hours:
-                    mask_value = 1
-
-            # --- Check if daytime or nighttime and mask if condition met.
-            if sun_last_rose:
-                if mask_daytime:
-                    # ... and has not set yet, it must be daytime
-                    if (date < next_setting):
-                        mask_value = 1
-
-            # if the sun last set... (mask nighttime is default)
-            else:
-                # if mask nighttime (aka not mask_daytime)
-                if not mask_daytime:
-                    # ... and has not risen yet, it must be nighttime
-                    if (date < next_rising):
-                        mask_value = 1
-
-        # Add gotcha for locations where sun is always up.
-        except AlwaysUpError:
-            if mask_daytime:
-                mask_value = 1
-
-        # Add gotcha for locations where sun is always down.
-        except NeverUpError:
-            if not mask_daytime:
-                mask_value = 1
-
-        except:
-            print('FAIL')
-            sys.exit()
-
-        # Mask value in array
-        return mask_value
-
-    # --- Setup an unstack(ed) pandas dataframe to contain masked values
-    if debug:
-        print(("--- (2) %s seconds ---" % (time.time() - start_time)))
-    # Use list comprehension to setup list of indices for lat and lon
-    # Better way of doing this? (e.g. pd.melt?)
-    ind_lat_lons_list = [[lon_, lat_] for lat_ in lats for lon_ in lons]
-    if debug:
-        print(("--- (3) %s seconds ---" % (time.time() - start_time)))
-    # Make this into a pd.DataFrame and label columns.
-    df = pd.DataFrame(ind_lat_lons_list)
-    df.columns = ['lons', 'lats']
-    if debug:
-        print(("--- (4) %s seconds ---" % (time.time() - start_time)))
-    # Apply function to calculate mask value
-#    df['mask'] = df.apply(mask_nighttime, axis=1)
-    df['mask'] = df.apply(lambda x: mask_nighttime(
-        x['lons'], x['lats']), axis=1)
-    if debug:
-        print(("--- (5) %s seconds ---" % (time.time() - start_time)))
-    # Re-index by lat and lon
-    df = pd.DataFrame(df['mask'].values, index=[df['lats'], df['lons']])
-    if debug:
-        print(("--- (6) %s seconds ---" % (time.time() - start_time)))
-    # Unstack and return just as array
-    df = df.unstack()
-    marr = df.values
-    if debug:
-        print(("--- (end-7) %s seconds ---" % (time.time() - start_time)))
-
-    return marr
+    # --- Mask for all grid boxes at once (see get_daytime_mask4dates)
+    mask = get_daytime_mask4dates([date], lons, lats,
+                                  mask_daytime=mask_daytime,
+                                  buffer_hours=buffer_hours)
+    # Return as (lat, lon) array of 1s and 0s
+    return mask[..., 0].T.astype(int)
 
 
 def get_2D_solartime_array4_date(date=None, ncfile=None, res='4x5',
@@ -1825,21 +2074,10 @@ def get_2D_solartime_array4_date(date=None, ncfile=None, res='4x5',
     -----
      - if ncfile provide programme will work for that grid.
     """
-    # Astronomical math
-    import ephem
-    from ephem import AlwaysUpError, NeverUpError
-    # And functions in other AC_tools modules
-    from .funcs4time import add_days, add_hrs
+    # Vectorised solar calculations
+    from .funcs4time import get_solartime4dates, unix_time
     logging.info('get_2D_solartime_array4_dates called for {}'.format(date))
 
-    # Profile function...
-    if debug:
-        start_time = time.time()
-
-    # --- Local variables?
-    # reference data for ephem (number of days since noon on 1899 December 31)
-    ref_date = datetime.datetime(1899, 12, 31, 12)
-
     # --- Get LON and LAT variables (if lons/lats not provdided)
     if any([not isinstance(i, type(None)) for i in (lats, lons)]):
         pass
@@ -1853,60 +2091,189 @@ def get_2D_solartime_array4_date(date=None, ncfile=None, res='4x5',
             print('Not implemented')
             sys.exit()
 
-    # --- setup function to get solartime based on date, lat and lon
-    def _solartime(lon, lat, date=date, rtn_as_epoch=True):
-        """
-        Get solartime for location (lat, lon) and date
-
-        Returns
-        ---
-        (float) Epoch time
-        """
-        # --- get sunrise and sunset for location
-        o = ephem.Observer()
-        # set lat (decimal?), lon (decimal?), and date (UTC)
-        o.lat = str(lat)
-        o.long = str(lon)
-        o.date = date
-        # planetary body
-        s = ephem.Sun()
-        # Compute sun vs observer
-        s.compute(o)
-        # below code was adapted from stackoverflow (Credit: J.F. Sebastian)
-        # http://stackoverflow.com/questions/13314626/local-solar-time-function-from-utc-and-longitude
-        # sidereal time == ra (right ascension) is the highest point (noon)
-        hour_angle = o.sidereal_time() - s.ra
-        s_time = ephem.hours(
-            hour_angle + ephem.hours('12:00')).norm  # norm for 24h
-        # ephem.hours is a float number that represents an angle in radians
-        # and converts to/from a string as "hh:mm:ss.ff".
-        s_time = "%s" % s_time
-        if len(s_time) != 11:
-            s_time = '0'+s_time
-        # return as datetime
-        s_time = datetime.datetime.strptime(s_time[:8], '%H:%M:%S')
-        if rtn_as_epoch:
-            s_time = unix_time(s_time)
-        return s_time
-
-    # --- Setup an unstack(ed) pandas dataframe to contain masked values
-    # Use list comprehension to setup list of indices for lat and lon
-    # Better way of doing this? (e.g. pd.melt?)
-    ind_lat_lons_list = [[lon_, lat_] for lat_ in lats for lon_ in lons]
-    # Make this into a pd.DataFrame and label columns.
-    df = pd.DataFrame(ind_lat_lons_list)
-    df.columns = ['lons', 'lats']
-    # Apply function to calculate mask value
-    df[varname] = df.apply(lambda x: _solartime(x['lons'], x['lats']), axis=1)
-    # Re-index by lat and lon
-    df = pd.DataFrame(df[varname].values, index=[df['lats'], df['lons']])
-    # Unstack and return just as array
-    return df.unstack().values
+    # --- Solar time for all grid boxes at once (see get_solartime4dates)
+    s_time = get_solartime4dates([date], lons, lats)[..., 0].T
+    # Return as epoch time of solar time on 1900-01-01 (whole seconds)
+    s_time = np.floor(s_time*60.*60.)
+    return s_time + unix_time(datetime.datetime(1900, 1, 1))
+
+
+# Variables in the cache of solar values (see get_solar_cube4year), stored as
+# (dtype, scale factor)
+_solar_cache_vars = OrderedDict([
+    ('cos_sza', ('int16', 1E4)),  # cosine of solar zenith angle
+    ('solar_time', ('int16', 60.)),  # solar time (minutes)
+    ('daytime', ('uint8', 1.)),  # 1 if the sun is up
+])
+solar_cube = namedtuple('solar_cube', ['dates', 'lon', 'lat', 'cos_sza',
+                                       'solar_time', 'daytime'])
+
+
+def get_solar_cube4year(year, res='4x5', freq='h', cache_dir=None,
+                        horizon=-0.8333):
+    """
+    Get (lon, lat, time) arrays of cos(SZA), solar time and daytime for a year,
+    from an on-disk cache (which is made if not present)
+
+    Parameters
+    -------
+    year (int): year of the dates (UTC)
+    res (str): resolution, if using resolutions listed in get_latlonalt4res
+    freq (str): frequency of dates (a pandas offset alias, e.g. 'h' or '15min')
+    cache_dir (str): directory of the cache (default: ~/.AC_tools/solar_cache)
+    horizon (float): elevation (degrees) of the centre of the sun at sunrise
+        and sunset (see get_daytime_mask4dates)
+
+    Returns
+    -------
+    (solar_cube) named tuple of dates (pd.DatetimeIndex), lon, lat and the
+    cos_sza, solar_time and daytime arrays (read-only memory maps)
+
+    Notes
+    -----
+     - Each variable is saved as a .npy file of scaled integers
+     (cos_sza*1E4 and solar time in minutes as int16, daytime as uint8), so a
+     year of hourly 4x5 values is ~60MB for each int16 variable. These are then
+     memory mapped, so only the dates used are read from disk.
+     - Use get_solar_values4dates to get decoded values for dates.
+     - Files are written to a temporary file then renamed, so processes can
+     share a cache directory.
+    """
+    import os
+    from .funcs4time import get_solar_elevation4dates, get_solartime4dates
+    if isinstance(cache_dir, type(None)):
+        cache_dir = os.path.join(os.path.expanduser('~'), '.AC_tools',
+                                 'solar_cache')
+    lons, lats, NIU = get_latlonalt4res(res=res)
+    dates = pd.date_range(datetime.datetime(year, 1, 1),
+                          datetime.datetime(year+1, 1, 1), freq=freq,
+                          inclusive='left')
+    shape = (len(lons), len(lats), len(dates))
+    # Filenames for each variable in the cache
+    fstr = 'solar_{}_{}_{}_{}_{:.4f}.npy'
+    filenames = dict([(var, os.path.join(cache_dir, fstr.format(
+        res, year, freq, var, horizon))) for var in _solar_cache_vars])
+    # Make any missing files, in chunks of dates
+    missing = [i for i in _solar_cache_vars
+               if not os.path.exists(filenames[i])]
+    if len(missing) > 0:
+        logging.info('Making solar cache for {} ({}, {})'.format(year, res,
+                                                                 freq))
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        tmp_str = '{}.{}.tmp'.format('{}', os.getpid())
+        arrs = dict([(var, np.lib.format.open_memmap(
+            tmp_str.format(filenames[var]), mode='w+',
+            dtype=_solar_cache_vars[var][0], shape=shape)) for var in missing])
+        chunk = max(1, int(1E7 / (len(lons)*len(lats))))
+        for n in range(0, len(dates), chunk):
+            dates_ = dates[n:n+chunk]
+            elev = get_solar_elevation4dates(dates_, lons, lats)
+            values = {
+                'cos_sza': lambda: np.sin(np.radians(elev)),
+                # ( rounded to minutes, so 23:59:30 is 00:00 not 24:00 )
+                'solar_time': lambda: np.mod(np.round(get_solartime4dates(
+                    dates_, lons, lats)*60.), 1440.)/60.,
+                'daytime': lambda: elev > horizon,
+            }
+            for var in missing:
+                scale = _solar_cache_vars[var][1]
+                arrs[var][..., n:n+chunk] = np.round(values[var]()*scale)
+        for var in missing:
+            arrs[var].flush()
+            del arrs[var]
+            os.replace(tmp_str.format(filenames[var]), filenames[var])
+    # Memory map the cache
+    arrs = dict([(var, np.load(filenames[var], mmap_mode='r'))
+                 for var in _solar_cache_vars])
+    return solar_cube(dates=dates, lon=lons, lat=lats, **arrs)
+
+
+def get_solar_values4dates(dates, res='4x5', var='daytime', freq='h',
+                           cache_dir=None, horizon=-0.8333):
+    """
+    Get (lon, lat, time) array of cached solar values for dates
+
+    Parameters
+    -------
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC)
+    res (str): resolution, if using resolutions listed in get_latlonalt4res
+    var (str): variable ('cos_sza', 'solar_time' (hours) or 'daytime')
+    freq (str): frequency of cached dates (a pandas offset alias, e.g. 'h')
+    cache_dir (str): directory of the cache (see get_solar_cube4year)
+    horizon (float): elevation (degrees) of the centre of the sun at sunrise
+        and sunset (see get_daytime_mask4dates)
+
+    Returns
+    -------
+    (np.array) float for cos_sza and solar_time and boolean for daytime
+
+    Notes
+    -----
+     - Dates are rounded to the nearest date in the cache (e.g. hour).
+    """
+    if var not in _solar_cache_vars:
+        err_msg = 'Variable not in solar cache: {}'.format(var)
+        logging.error(err_msg)
+        raise ValueError(err_msg)
+    dates = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(dates)))
+    dates = dates.round(freq)
+    dtype, scale = _solar_cache_vars[var]
+    lons, lats, NIU = get_latlonalt4res(res=res)
+    out = np.empty((len(lons), len(lats), len(dates)), dtype=dtype)
+    # Lookup dates in the cache of each year
+    for year in np.unique(dates.year):
+        cube = get_solar_cube4year(year, res=res, freq=freq,
+                                   cache_dir=cache_dir, horizon=horizon)
+        in_year = np.flatnonzero(dates.year == year)
+        ind = cube.dates.get_indexer(dates[in_year])
+        if (ind < 0).any():
+            err_msg = 'Dates not in solar cache (freq={}): {}'.format(
+                freq, dates[in_year][ind < 0])
+            logging.error(err_msg)
+            raise ValueError(err_msg)
+        out[..., in_year] = getattr(cube, var)[..., ind]
+    if var == 'daytime':
+        return out.astype(bool)
+    return out / scale
+
+
+def mask_nighttime_values(arr, dates, res='4x5', mask_daytime=False,
+                          freq='h', cache_dir=None):
+    """
+    Mask nighttime (or daytime) values of model output using cached daytime
+
+    Parameters
+    -------
+    arr (array): array with dimensions (lon, lat, time) or
+        (lon, lat, alt, time)
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC) of
+        the time dimension
+    res (str): resolution, if using resolutions listed in get_latlonalt4res
+    mask_daytime (boolean): mask daytime instead of nightime
+    freq (str): frequency of cached dates (see get_solar_values4dates)
+    cache_dir (str): directory of the cache (see get_solar_cube4year)
+
+    Returns
+    -------
+    (np.ma.array)
+    """
+    daytime = get_solar_values4dates(dates, res=res, var='daytime',
+                                     freq=freq, cache_dir=cache_dir)
+    if mask_daytime:
+        mask = daytime
+    else:
+        mask = ~daytime
+    if arr.ndim == 4:
+        mask = mask[:, :, None, :]
+    mask = np.broadcast_to(mask, arr.shape)
+    return np.ma.array(arr, mask=np.ma.mask_or(np.ma.getmaskarray(arr), mask))
 
 
 def save_2D_arrays_to_3DNetCDF(ars=None, dates=None, res='4x5', lons=None,
                                lats=None, varname='MASK', Description=None, Contact=None,
-                               filename='misc_output', var_type='f8', debug=False):
+                               filename='misc_output', var_type='f8', profile=None,
+                               complevel=None, debug=False):
     """
     makes a NetCDF from a list of dates and list of (lon, lat) arrays
 
@@ -1920,6 +2287,8 @@ def save_2D_arrays_to_3DNetCDF(ars=None, dates=None, res='4x5', lons=None,
     filename (str): name for output netCDF file
     varname (str): name for variable in NetCDF
     var_type (str): variable type (e.g. 'f8' (64-bit floating point))
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
+    complevel (int): zlib compression level to use with profile
 
     Returns
     -------
@@ -2004,7 +2373,16 @@ def save_2D_arrays_to_3DNetCDF(ars=None, dates=None, res='4x5', lons=None,
 
     # --- Create new NetCDF variable (as f8) with common dimensions
     # (e.g. 'f8' = 64-bit floating point, 'i8'=(64-bit singed integer) )
-    ncfile.createVariable(varname, var_type, ('time', 'lat', 'lon'), )
+    # ( compressed and chunked for expected use if a write profile given )
+    kwargs = {}
+    if not isinstance(profile, type(None)):
+        from .bpch2netCDF import get_NetCDF_write_kwargs
+        kwargs = get_NetCDF_write_kwargs(profile=profile,
+                                         dims=('time', 'lat', 'lon'),
+                                         shape=(len(dates), len(lats),
+                                                len(lons)),
+                                         complevel=complevel)
+    ncfile.createVariable(varname, var_type, ('time', 'lat', 'lon'), **kwargs)
     # Close NetCDF
     ncfile.close()
 
@@ -2129,7 +2507,7 @@ def interpolate_sparse_grid2value(Y_CORDS=None, X_CORDS=None,
 
 
 def split_NetCDF_by_month(folder=None, filename=None, ext_str='',
-                          file_prefix='ts_ctm'):
+                          file_prefix='ts_ctm', profile=None, complevel=None):
     """
     Split a NetCDF file by month into new NetCDF files using xarray
 
@@ -2139,6 +2517,8 @@ def split_NetCDF_by_month(folder=None, filename=None, ext_str='',
     filename (str): the NetCDF filename (e.g. ctm.nc)
     file_prefix (str): prefix to attach to new saved file
     ext_str (str): extra string for new filenames
+    profile (str): NetCDF write profile ("map", "timeseries" or "balanced")
+    complevel (int): zlib compression level to use with profile
     """
     import xarray as xr
     # --- Open data
@@ -2163,7 +2543,12 @@ def split_NetCDF_by_month(folder=None, filename=None, ext_str='',
                                                 str(month_))
         logging.info('saving month NetCDF as: {}'.format(file2save))
         # Save the file...
-        ds_tmp.to_netcdf(folder+file2save)
+        encoding = None
+        if not isinstance(profile, type(None)):
+            from .bpch2netCDF import get_NetCDF_encoding4profile
+            encoding = get_NetCDF_encoding4profile(ds_tmp, profile=profile,
+                                                   complevel=complevel)
+        ds_tmp.to_netcdf(folder+file2save, encoding=encoding)
         # Delete temporary dataset
         del ds_tmp
 
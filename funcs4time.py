@@ -528,3 +528,194 @@ def solartime(observer, sun=None):
     return ephem.hours(hour_angle + ephem.hours('12:00')).norm  # norm for 24h
 
 
+def get_solar_position4dates(dates):
+    """
+    Get the solar declination and equation of time for dates (UTC)
+
+    Parameters
+    -------
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC)
+
+    Returns
+    -------
+    (tuple) of np.arrays for solar declination (degrees) and the equation of
+    time (minutes), with a value for each date
+
+    Notes
+    -----
+     - Uses the NOAA solar calculator equations (after Meeus, "Astronomical
+     Algorithms"), which are accurate to a few seconds of time for dates
+     between 1800 and 2100.
+     - https://gml.noaa.gov/grad/solcalc/calcdetails.html
+    """
+    return _get_solar_position4secs(_get_unix_seconds4dates(dates))
+
+
+def _get_solar_position4secs(secs):
+    """ Get solar declination and equation of time for seconds since 1970 """
+    # Julian century (since J2000.0)
+    T = (secs/86400. + 2440587.5 - 2451545.) / 36525.
+    # Geometric mean longitude and anomaly of the sun (degrees)
+    L0 = np.mod(280.46646 + T*(36000.76983 + T*0.0003032), 360.)
+    M = np.radians(357.52911 + T*(35999.05029 - 0.0001537*T))
+    # Eccentricity of earth's orbit
+    e = 0.016708634 - T*(0.000042037 + 0.0000001267*T)
+    # Equation of centre, true and apparent longitude of the sun (degrees)
+    C = np.sin(M)*(1.914602 - T*(0.004817 + 0.000014*T)) + \
+        np.sin(2*M)*(0.019993 - 0.000101*T) + np.sin(3*M)*0.000289
+    omega = np.radians(125.04 - 1934.136*T)
+    app_lon = np.radians(L0 + C - 0.00569 - 0.00478*np.sin(omega))
+    # Obliquity of the ecliptic (corrected)
+    eps0 = 23. + (26. + (21.448 - T*(46.815 + T*(0.00059 - T*0.001813)))
+                  / 60.) / 60.
+    eps = np.radians(eps0 + 0.00256*np.cos(omega))
+    # Declination and equation of time
+    decl = np.degrees(np.arcsin(np.sin(eps)*np.sin(app_lon)))
+    y = np.tan(eps/2.)**2
+    L0 = np.radians(L0)
+    eqtime = 4.*np.degrees(y*np.sin(2*L0) - 2*e*np.sin(M) +
+                           4*e*y*np.sin(M)*np.cos(2*L0) -
+                           0.5*y**2*np.sin(4*L0) - 1.25*e**2*np.sin(2*M))
+    return decl, eqtime
+
+
+def get_solartime4dates(dates, lons, lats=None):
+    """
+    Get apparent (local) solar time for dates (UTC) at longitudes
+
+    Parameters
+    -------
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC)
+    lons (array): longitudes (degrees east)
+    lats (array): latitudes (optional), to return a (lon, lat, time) array
+
+    Returns
+    -------
+    (np.array) of solar time (hours, 0-24), with dimensions (lon, time) or
+    (lon, lat, time) if lats are given
+
+    Notes
+    -----
+     - Vectorised alternative to the ephem based solartime (solar noon is when
+     the sun crosses the meridian).
+    """
+    secs = _get_unix_seconds4dates(dates)
+    decl, eqtime = _get_solar_position4secs(secs)
+    lons = np.asarray(lons, dtype=np.float64)
+    # True solar time (minutes) = UTC + equation of time + 4 mins per degree
+    mins = np.mod(secs, 86400.)/60. + eqtime
+    stime = np.mod(mins[None, :] + 4.*lons[:, None], 1440.) / 60.
+    if not isinstance(lats, type(None)):
+        shape = (len(lons), len(np.atleast_1d(lats)), len(secs))
+        stime = np.broadcast_to(stime[:, None, :], shape).copy()
+    return stime
+
+
+def get_solar_elevation4dates(dates, lons, lats):
+    """
+    Get the (geometric) elevation of the sun for dates (UTC) at lons and lats
+
+    Parameters
+    -------
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC)
+    lons (array): longitudes (degrees east)
+    lats (array): latitudes (degrees north)
+
+    Returns
+    -------
+    (np.array) of solar elevation (degrees) with dimensions (lon, lat, time)
+    """
+    decl, eqtime = get_solar_position4dates(dates)
+    stime = get_solartime4dates(dates, lons)
+    hour_angle = np.radians(stime*15. - 180.)[:, None, :]
+    lats = np.radians(np.asarray(lats, dtype=np.float64))[None, :, None]
+    decl = np.radians(decl)[None, None, :]
+    sin_elev = np.sin(lats)*np.sin(decl) + \
+        np.cos(lats)*np.cos(decl)*np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_elev, -1., 1.)))
+
+
+def get_sunrise_sunset4dates(dates, lons, lats, horizon=-0.8333):
+    """
+    Get the solar times of sunrise and sunset for dates (UTC) at lons and lats
+
+    Parameters
+    -------
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC)
+    lons (array): longitudes (degrees east)
+    lats (array): latitudes (degrees north)
+    horizon (float): elevation (degrees) of the centre of the sun at sunrise
+        and sunset (default: upper limb on the horizon, with refraction)
+
+    Returns
+    -------
+    (tuple) of np.arrays of sunrise and sunset (solar time, hours), with
+    dimensions (lon, lat, time). NaN where the sun is always up or down.
+
+    Notes
+    -----
+     - Uses the declination at each date, rather than iterating to the time
+     of sunrise/sunset, which is accurate to within a minute or so.
+    """
+    decl, eqtime = get_solar_position4dates(dates)
+    lats = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    decl = np.radians(decl)[None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos_ha = (np.sin(np.radians(horizon)) - np.sin(lats)*np.sin(decl)) / \
+            (np.cos(lats)*np.cos(decl))
+        cos_ha[np.abs(cos_ha) > 1] = np.nan
+        ha = np.degrees(np.arccos(cos_ha)) / 15.
+    shape = (len(np.atleast_1d(lons)),) + ha.shape
+    sunrise = np.broadcast_to((12. - ha)[None, ...], shape).copy()
+    sunset = np.broadcast_to((12. + ha)[None, ...], shape).copy()
+    return sunrise, sunset
+
+
+def get_daytime_mask4dates(dates, lons, lats, mask_daytime=False,
+                           buffer_hours=0, horizon=-0.8333):
+    """
+    Get a (lon, lat, time) mask (True=masked) of nighttime (or daytime)
+
+    Parameters
+    -------
+    dates (list/array of datetime.datetime or np.datetime64): dates (UTC)
+    lons (array): longitudes (degrees east)
+    lats (array): latitudes (degrees north)
+    mask_daytime (boolean): mask daytime instead of nightime
+    buffer_hours (float/int): number of hours to buffer sunrise/sunset with
+     (the mask is extended by this many hours either side of sunrise and
+      sunset)
+    horizon (float): elevation (degrees) of the centre of the sun at sunrise
+        and sunset (default: upper limb on the horizon, with refraction)
+
+    Returns
+    -------
+    (np.array) boolean with dimensions (lon, lat, time)
+
+    Notes
+    -----
+     - The sun is up where its elevation is above the horizon, which matches
+     the sunrise/sunset of ephem to within seconds.
+    """
+    daytime = get_solar_elevation4dates(dates, lons, lats) > horizon
+    if mask_daytime:
+        mask = daytime
+    else:
+        mask = ~daytime
+    if buffer_hours != 0:
+        stime = get_solartime4dates(dates, lons, lats)
+        sunrise, sunset = get_sunrise_sunset4dates(dates, lons, lats,
+                                                   horizon=horizon)
+        with np.errstate(invalid='ignore'):
+            for event in (sunrise, sunset):
+                hrs = np.abs(np.mod(stime - event + 12., 24.) - 12.)
+                mask |= (hrs <= buffer_hours)
+    return mask
+
+
+def _get_unix_seconds4dates(dates):
+    """ Get seconds since 1970-01-01 for dates (naive dates are UTC) """
+    dates = pd.to_datetime(np.atleast_1d(dates))
+    if not isinstance(dates.tz, type(None)):
+        dates = dates.tz_convert('UTC').tz_localize(None)
+    return (dates.values.astype('datetime64[ns]').astype(np.int64) / 1E9)
@@ -2154,6 +2154,44 @@ def get_loc(loc=None, rtn_dict=False, debug=False):
         return loc_dict[loc]
 
 
+def get_nearest_loc(lons, lats, locs=None, k=1, max_distance=None,
+                    index=None):
+    """
+    Get the nearest locations (in "get_loc" dictionary) to points
+
+    Parameters
+    ----------
+    lons (array): longitudes of points (degrees East)
+    lats (array): latitudes of points (degrees North)
+    locs (list): names of locations to consider (default: all in get_loc)
+    k (int): number of nearest locations to return for each point
+    max_distance (float): only return locations within this distance (km)
+    index (spatial_index): index of locs (from get_spatial_index), to use
+        instead of building/finding it
+
+    Returns
+    -------
+    (tuple) of np.arrays of location names and great circle distances (km).
+    Arrays have a shape of (N) if k=1, else (N, k). Names of missing locations
+    (beyond max_distance) are None.
+
+    Notes
+    -----
+     - A spatial index of the locations is built once and cached (see
+     get_spatial_index), so matching many points (e.g. a ship track) is fast.
+    """
+    loc_dict = get_loc(rtn_dict=True)
+    if isinstance(locs, type(None)):
+        locs = sorted(loc_dict.keys())
+    if isinstance(index, type(None)):
+        index = get_spatial_index([loc_dict[i][0] for i in locs],
+                                  [loc_dict[i][1] for i in locs])
+    inds, dists = query_spatial_index(index, lons, lats, k=k,
+                                      max_distance=max_distance)
+    names = np.array(list(locs) + [None], dtype=object)
+    return names[inds], dists
+
+
 def GC_var(input_x=None, rtn_dict=False, debug=False):
     """
     General Dictionary to manage common variables used by GC